@@ -1,28 +1,64 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from starlette.requests import HTTPConnection
 import json
 import asyncio
+import math
 import os
-from typing import List, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, List, Literal, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
-import httpx
 
 # Import our custom modules
 from models.jewelry_generator import JewelryGenerator
 from models.parametric_engine import ParametricEngine
-from utils.ai_prompt_processor import AIPromptProcessor
+from models.parameter_schema import DEFAULT_VERTEX_BUDGET, ParameterError, normalize_parameters
+from models.geometry_assets import default_library
+from models.cost_model import CostModel
+from models.mesh import Model
+from models.mesh_codec import encode_model as encode_quantized
+from utils.prompt_cache import PromptCache
+from utils.admission import AdmissionController, AdmissionError
+from utils.design_store import DesignStore
+from utils.compression import encode_async, etag_matches
+from utils.geometry_delta import GeometrySession
+from utils.connection_manager import ConnectionManager
+from utils.shared_cache import shared_memory_dir
 
 load_dotenv()
 
-# Initialize OpenAI client
+# The LLM side is optional: without a key the parametric engine and stored
+# designs are served as usual and only AI generation is unavailable
 openai_api_key = os.getenv("OPENAI_API_KEY")
 if not openai_api_key:
-    raise RuntimeError("OPENAI_API_KEY not set in environment variables.")
-client = OpenAI()
+    print("[main.py] OPENAI_API_KEY not set; AI generation is disabled")
+AI_UNAVAILABLE = "AI processing is unavailable"
+# Built by prompt_processor() when the first AI request arrives
+llm_client = None
+ai_processor = None
+# Approximate prompt cache, persisted across restarts
+prompt_cache = PromptCache.from_env()
+# Generated designs, persisted and keyed by the hash of their inputs
+design_store = DesignStore.from_env()
 
-app = FastAPI(title="Jewelry 3D Platform API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # In the background, so the process answers GET / (liveness) while /api/ready still says 503
+    warmup_task = asyncio.create_task(warm_up())
+    yield
+    warmup_task.cancel()
+    # Drain pooled upstream connections on shutdown
+    if llm_client is not None:
+        await llm_client.aclose()
+    print(f"[main.py] Prompt cache: {prompt_cache.stats()}")
+    prompt_cache.save()
+    design_store.close()
+    admission.executor.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(title="Jewelry 3D Platform API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -33,39 +69,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize AI components with error handling
-try:
-    jewelry_generator = JewelryGenerator()
-    parametric_engine = ParametricEngine()
-    ai_processor = AIPromptProcessor()
-    print("✅ All components initialized successfully")
-except Exception as e:
-    print(f"❌ Error initializing components: {e}")
-    # Initialize with fallback
-    jewelry_generator = JewelryGenerator()
-    parametric_engine = ParametricEngine()
-    ai_processor = None
+# Map the pre-baked geometry assets once at import, before any worker fork
+geometry_assets = default_library()
+
+# Predicted geometry cost gates and orders work before it reaches the engine
+cost_model = CostModel.load()
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("GEOMETRY_CONCURRENCY", "2")),
+    max_queue=int(os.getenv("GEOMETRY_QUEUE_SIZE", "64")),
+    client_rate_ms=float(os.getenv("CLIENT_CPU_MS_PER_SECOND", "500")),
+    client_burst_ms=float(os.getenv("CLIENT_CPU_MS_BURST", "5000"))
+)
+
+# Builds run on the admission controller's workers, one thread per admitted request;
+# requests predicted to exceed the vertex budget are rejected (422) before building
+vertex_budget = int(os.getenv("GEOMETRY_VERTEX_BUDGET", str(DEFAULT_VERTEX_BUDGET)))
+parametric_engine = ParametricEngine(assets=geometry_assets, executor=admission.executor,
+                                     vertex_budget=vertex_budget or None)
+jewelry_generator = JewelryGenerator(engine=parametric_engine)
+
+def prompt_processor():
+    """The AI prompt processor, built on first use; None when no LLM is configured"""
+    global llm_client, ai_processor
+    if ai_processor is None and openai_api_key:
+        # Imported here so the LLM client stack (httpx) stays off the startup path
+        from utils.ai_prompt_processor import AIPromptProcessor
+        from utils.llm_client import LLMClient
+        # One pooled LLM client for the whole process
+        llm_client = LLMClient.from_env(openai_api_key)
+        ai_processor = AIPromptProcessor(llm_client, prompt_cache)
+    return ai_processor
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+def client_id(connection: Optional[HTTPConnection]) -> str:
+    """Key for per-client budgets: the peer address"""
+    if connection is None or connection.client is None:
+        return "local"
+    return connection.client.host
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+def prompt_context(request) -> tuple:
+    """What besides the text shapes a prompt's extraction (matches the prompt cache)"""
+    return request.jewelry_type, request.style, request.material
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+# How model_data geometry is sent: JSON lists, or compact quantized buffers (models/mesh_codec.py)
+MODEL_ENCODERS = {"json": Model.to_dict, "quantized": encode_quantized}
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+def design_etag(design_id: str, geometry_encoding: str = "json") -> str:
+    # Weak: one design is sent in several compressions, around varying request echoes
+    if geometry_encoding != "json":
+        return f'W/"{design_id}.{geometry_encoding}"'
+    return f'W/"{design_id}"'
 
-manager = ConnectionManager()
+def not_modified(http_request: Optional[Request], etag: str) -> Optional[Response]:
+    """304 for a GET whose If-None-Match already names this design"""
+    if http_request is None or not etag_matches(http_request.headers.get("if-none-match"), etag):
+        return None
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+
+async def json_response(payload: dict, http_request: Optional[Request], headers: Optional[dict] = None) -> Response:
+    """JSON compressed as the client accepts, serialized and (when large) compressed off the event loop"""
+    body = await asyncio.to_thread(lambda: json.dumps(payload).encode("utf-8"))
+    accept_encoding = http_request.headers.get("accept-encoding") if http_request is not None else None
+    body, encoding = await encode_async(body, accept_encoding)
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def load_or_build(design_id: str, engine_cached: bool, build: Callable[[], Awaitable[Model]],
+                        attributes: bool = False, triangle_budget: Optional[int] = None,
+                        persist: bool = True) -> Model:
+    """The stored design unless the engine cache has it anyway; new designs are stored"""
+    if not engine_cached:
+        model = await asyncio.to_thread(design_store.load, design_id)
+        if model is not None:
+            return model
+    model = await build()
+    if persist:
+        await asyncio.to_thread(design_store.save, design_id, model, attributes, triangle_budget)
+    return model
+
+# WebSocket connections and shared design sessions (rooms), with per-connection send queues
+manager = ConnectionManager.from_env()
+# Longest session name a client may pick
+MAX_SESSION_NAME = 128
+
+async def share_design(websocket: WebSocket, source: str, data: dict) -> None:
+    """Send a design to everyone else in the sender's session (encoded once for all of them)"""
+    room = manager.room_of(websocket)
+    if room is not None and data.get("success"):
+        await manager.broadcast({"type": "session_update", "source": source, "data": data}, room, exclude=websocket)
 
 # Pydantic models
 class JewelryRequest(BaseModel):
@@ -74,44 +167,95 @@ class JewelryRequest(BaseModel):
     style: Optional[str] = "modern"
     material: Optional[str] = "gold"
     complexity: Optional[str] = "medium"
+    include_attributes: bool = False
+    geometry_encoding: Literal["json", "quantized"] = "json"
+
+class BatchExtractionRequest(BaseModel):
+    prompts: List[str] = Field(..., min_length=1, max_length=10000)
+    jewelry_type: str = "auto"
+    style: str = "auto"
+    material: str = "auto"
 
 class ParametricRequest(BaseModel):
     jewelry_type: str
     parameters: dict
+    include_attributes: bool = False
+    # A hard cap on the whole model (models/mesh_decimation.py); None keeps full detail
+    triangle_budget: Optional[int] = Field(None, ge=1)
+    geometry_encoding: Literal["json", "quantized"] = "json"
 
 @app.get("/")
 async def root():
     return {"message": "Jewelry 3D Platform API"}
 
-@app.post("/api/generate-jewelry")
-async def generate_jewelry(request: JewelryRequest):
+async def build_ai_model(request: JewelryRequest, processed_prompt: dict,
+                         connection: Optional[HTTPConnection], persist: bool = True) -> dict:
+    """Cost-estimate, admit and build (or load) the model for a processed prompt"""
+    # Predict the geometry cost before any of it is built
+    jewelry_type, parameters = jewelry_generator.resolve_parameters(processed_prompt)
+    design_id = DesignStore.design_id(jewelry_type, parameters, request.include_attributes,
+                                      appearance=jewelry_generator.appearance(processed_prompt))
+    engine_cached = parametric_engine.is_cached(jewelry_type, parameters, request.include_attributes)
+    estimate = cost_model.estimate(
+        jewelry_type,
+        parameters,
+        attributes=request.include_attributes,
+        cached=engine_cached or await asyncio.to_thread(design_store.has, design_id)
+    )
+    async with admission.admit(client_id(connection), estimate.cpu_ms):
+        # Generate the 3D model
+        model = await load_or_build(
+            design_id,
+            engine_cached,
+            lambda: jewelry_generator.generate_model(processed_prompt, attributes=request.include_attributes),
+            attributes=request.include_attributes,
+            persist=persist
+        )
+        model.metadata = {**(model.metadata or {}), "prompt": processed_prompt.get("original_prompt", "")}
+        # Arrays become JSON lists only here, at the response boundary
+        model_data = await admission.run(MODEL_ENCODERS[request.geometry_encoding], model)
+    if persist and processed_prompt.get("source") != "fallback":
+        # Repeating this prompt now skips the LLM as well as the geometry
+        await asyncio.to_thread(design_store.record_prompt, request.prompt, prompt_context(request),
+                                processed_prompt, design_id)
+    return {
+        "success": True,
+        "design_id": design_id,
+        "model_data": model_data,
+        "prompt": request.prompt,
+        "processed_prompt": processed_prompt,
+        "cost": estimate.to_dict()
+    }
+
+async def recorded_prompt(request: JewelryRequest) -> Optional[tuple]:
+    """Processed parameters and design ID stored for this exact prompt, if it was seen before"""
+    found = await asyncio.to_thread(design_store.find_prompt, request.prompt, prompt_context(request))
+    if found is None:
+        return None
+    processed_prompt, design_id = found
+    processed_prompt["original_prompt"] = request.prompt
+    return processed_prompt, design_id
+
+async def generate_jewelry(request: JewelryRequest, connection: Optional[HTTPConnection],
+                           recorded: Optional[tuple] = None) -> dict:
     """Generate 3D jewelry model from natural language prompt"""
     try:
-        # Process the AI prompt
-        processed_prompt = await ai_processor.process_prompt(
-            request.prompt,
-            request.jewelry_type,
-            request.style,
-            request.material
-        )
-        # Generate the 3D model
-        model_data = await jewelry_generator.generate_model(processed_prompt)
-        # If model_data contains an error, return it as a failed response
-        if "error" in model_data:
-            print(f"[main.py] Error in jewelry generation: {model_data['error']}")
-            return {
-                "success": False,
-                "error": model_data["error"],
-                "model_data": model_data,
-                "prompt": request.prompt,
-                "processed_prompt": processed_prompt
-            }
-        return {
-            "success": True,
-            "model_data": model_data,
-            "prompt": request.prompt,
-            "processed_prompt": processed_prompt
-        }
+        # Process the AI prompt (unless this exact prompt was already answered)
+        if recorded is not None:
+            processed_prompt = recorded[0]
+        else:
+            processor = prompt_processor()
+            if processor is None:
+                raise RuntimeError(AI_UNAVAILABLE)
+            processed_prompt = await processor.process_prompt(
+                request.prompt,
+                request.jewelry_type,
+                request.style,
+                request.material
+            )
+        return await build_ai_model(request, processed_prompt, connection)
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers())
     except Exception as e:
         print(f"[main.py] Exception in /api/generate-jewelry: {e}")
         return {
@@ -121,26 +265,242 @@ async def generate_jewelry(request: JewelryRequest):
             "prompt": request.prompt
         }
 
-@app.post("/api/parametric-jewelry")
-async def create_parametric_jewelry(request: ParametricRequest):
+@app.post("/api/generate-jewelry")
+async def generate_jewelry_endpoint(request: JewelryRequest, http_request: Request):
+    recorded = await recorded_prompt(request)
+    if recorded is None and prompt_processor() is None:
+        raise HTTPException(status_code=503, detail=AI_UNAVAILABLE)
+    result = await generate_jewelry(request, http_request, recorded)
+    # No ETag: a POST is never revalidated; GET /api/designs/{design_id} is
+    return await json_response(result, http_request)
+
+async def stream_jewelry(request: JewelryRequest, websocket: WebSocket):
+    """Generate over /ws while the LLM is still answering.
+
+    Fields are parsed out of the streamed completion as they arrive. Once the
+    jewelry type and its shape-defining fields are known, a speculative model
+    is built and pushed as "jewelry_preview" while the rest streams in; the
+    final "jewelry_generated" follows when the completion is done (a cache
+    hit when the remaining fields don't change the geometry).
+    """
+    async def send_preview(fields: dict):
+        try:
+            result = await build_ai_model(request, {**fields, "original_prompt": request.prompt}, websocket,
+                                          persist=False)
+            await manager.send_personal_message(
+                json.dumps({"type": "jewelry_preview", "data": result}),
+                websocket
+            )
+        except Exception as e:
+            # The preview is best effort; the final model still follows
+            print(f"[main.py] Skipping jewelry preview: {e}")
+
+    preview = None
+    try:
+        # A prompt seen before goes straight to its stored design, no preview needed
+        recorded = await recorded_prompt(request)
+        if recorded is not None:
+            known = recorded[0]
+        else:
+            processor = prompt_processor()
+            if processor is None:
+                raise RuntimeError(AI_UNAVAILABLE)
+            known = {}
+            async for fields in processor.stream_prompt(
+                request.prompt,
+                request.jewelry_type,
+                request.style,
+                request.material
+            ):
+                if fields.pop("complete", False):
+                    known = fields
+                    break
+                known.update(fields)
+                if preview is None and jewelry_generator.preview_ready(known):
+                    preview = asyncio.create_task(send_preview(dict(known)))
+        if preview is not None:
+            # Keep previews ahead of the final result on the socket
+            await preview
+        result = await build_ai_model(request, known, websocket)
+    except Exception as e:
+        print(f"[main.py] Exception in generate_jewelry_stream: {e}")
+        if preview is not None:
+            preview.cancel()
+        if isinstance(e, AdmissionError):
+            # Throttled or queue full: the same status and Retry-After as generate_jewelry
+            result = {**error_reply(e.status_code, e.detail, e.headers().get("Retry-After")),
+                      "prompt": request.prompt}
+        else:
+            result = {
+                "success": False,
+                "error": str(e),
+                "model_data": {},
+                "prompt": request.prompt
+            }
+    await manager.send_personal_message(
+        json.dumps({"type": "jewelry_generated", "data": result}),
+        websocket
+    )
+
+@app.post("/api/extract-parameters")
+async def extract_parameters(request: BatchExtractionRequest):
+    """Bulk parameter extraction (e.g. a supplier catalogue), streamed as NDJSON.
+
+    One {"type": "result"} line per prompt in completion order, then a
+    {"type": "summary"} line with throughput and upstream token use.
+    """
+    processor = prompt_processor()
+    if processor is None:
+        raise HTTPException(status_code=503, detail=AI_UNAVAILABLE)
+    from utils.ai_prompt_processor import BatchReport
+
+    async def lines():
+        report = BatchReport()
+        async for result in processor.process_batch(
+            request.prompts,
+            request.jewelry_type,
+            request.style,
+            request.material,
+            batch_size=int(os.getenv("LLM_BATCH_SIZE", "20")),
+            concurrency=int(os.getenv("LLM_BATCH_CONCURRENCY", "4")),
+            report=report
+        ):
+            yield json.dumps({"type": "result", **result}) + "\n"
+        summary = report.to_dict()
+        print(f"[main.py] Bulk extraction: {summary}")
+        yield json.dumps({"type": "summary", **summary}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def parametric_design(request: ParametricRequest) -> tuple:
+    """Normalized parameters and design ID of a parametric request (no geometry involved)"""
+    parameters = normalize_parameters(
+        request.jewelry_type,
+        request.parameters,
+        vertex_budget=parametric_engine.vertex_budget
+    )
+    design_id = DesignStore.design_id(request.jewelry_type, parameters, request.include_attributes,
+                                      request.triangle_budget)
+    return parameters, design_id
+
+async def create_parametric_jewelry(request: ParametricRequest, connection: Optional[HTTPConnection],
+                                    design: Optional[tuple] = None,
+                                    encode_model: Optional[Callable[[Model], dict]] = None) -> dict:
     """Create parametric jewelry model with specific parameters"""
+    encode_model = encode_model or MODEL_ENCODERS[request.geometry_encoding]
     try:
-        model_data = await parametric_engine.create_model(
+        parameters, design_id = design or parametric_design(request)
+        engine_cached = parametric_engine.is_cached(
+            request.jewelry_type, parameters, request.include_attributes, request.triangle_budget
+        )
+        estimate = cost_model.estimate(
             request.jewelry_type,
-            request.parameters
+            parameters,
+            attributes=request.include_attributes,
+            triangle_budget=request.triangle_budget,
+            cached=engine_cached or await asyncio.to_thread(design_store.has, design_id)
         )
+        async with admission.admit(client_id(connection), estimate.cpu_ms):
+            model = await load_or_build(
+                design_id,
+                engine_cached,
+                lambda: parametric_engine.create_model(
+                    request.jewelry_type,
+                    parameters,
+                    attributes=request.include_attributes,
+                    triangle_budget=request.triangle_budget
+                ),
+                attributes=request.include_attributes,
+                triangle_budget=request.triangle_budget
+            )
+            model_data = await admission.run(encode_model, model)
         
         return {
             "success": True,
+            "design_id": design_id,
             "model_data": model_data,
-            "parameters": request.parameters
+            "parameters": request.parameters,
+            "cost": estimate.to_dict()
         }
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers())
+    except ParameterError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/parametric-jewelry")
+async def create_parametric_jewelry_endpoint(request: ParametricRequest, http_request: Request):
+    try:
+        design = parametric_design(request)
+    except ParameterError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    result = await create_parametric_jewelry(request, http_request, design)
+    return await json_response(result, http_request)
+
+def design_headers(etag: str) -> dict:
+    # A design ID is the hash of its inputs, so its content can never change
+    return {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+
+@app.get("/api/designs/{design_id}")
+async def get_design(design_id: str, http_request: Request, geometry_encoding: Literal["json", "quantized"] = "json"):
+    """Stored design by ID, as the same model_data the generation endpoints return"""
+    if not DesignStore.is_design_id(design_id) or not await asyncio.to_thread(design_store.has, design_id):
+        raise HTTPException(status_code=404, detail="Design not found")
+    etag = design_etag(design_id, geometry_encoding)
+    response = not_modified(http_request, etag)
+    if response is not None:
+        return response
+    model = await asyncio.to_thread(design_store.load, design_id)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Design not found")
+    model_data = await asyncio.to_thread(MODEL_ENCODERS[geometry_encoding], model)
+    return await json_response({"success": True, "design_id": design_id, "model_data": model_data},
+                               http_request, design_headers(etag))
+
+@app.get("/api/designs/{design_id}/mesh")
+async def get_design_mesh(design_id: str, http_request: Request):
+    """Stored design as its packed binary buffers (see Model.from_bytes)"""
+    if not DesignStore.is_design_id(design_id) or not os.path.exists(design_store.blob_path(design_id)):
+        raise HTTPException(status_code=404, detail="Design not found")
+    # Strong: the blob is sent byte for byte, uncompressed
+    etag = f'"{design_id}.jmdl"'
+    if etag_matches(http_request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=design_headers(etag))
+    await asyncio.to_thread(design_store.touch, design_id)
+    return FileResponse(design_store.blob_path(design_id), media_type="application/octet-stream",
+                        headers=design_headers(etag))
+
+def delta_quantum(value: Any) -> Optional[float]:
+    """A delta message's "quantum": None when absent, else a positive finite float"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        try:
+            quantum = float(value)
+        except ValueError:
+            quantum = math.nan
+        if math.isfinite(quantum) and quantum > 0:
+            return quantum
+    raise ValueError(f"quantum must be a positive number, got {value!r}")
+
+def error_reply(status_code: int, detail: str, retry_after: Optional[str] = None) -> dict:
+    """What the HTTP endpoint would answer with an error status, as a reply frame's data"""
+    data = {"success": False, "error": detail, "status": status_code, "model_data": {}}
+    if retry_after is not None:
+        data["retry_after"] = int(retry_after)
+    return data
+
+async def send_error_reply(websocket: WebSocket, reply_type: str, status_code: int, detail: str,
+                           retry_after: Optional[str] = None, **fields) -> None:
+    data = {**error_reply(status_code, detail, retry_after), **fields}
+    await manager.send_personal_message(json.dumps({"type": reply_type, "data": data}), websocket)
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
+    # What this client last received, for delta-encoded parametric updates
+    geometry_session = GeometrySession()
     try:
         while True:
             data = await websocket.receive_text()
@@ -148,23 +508,205 @@ async def websocket_endpoint(websocket: WebSocket):
             
             if message["type"] == "generate_jewelry":
                 # Handle real-time jewelry generation
-                result = await generate_jewelry(JewelryRequest(**message["data"]))
+                try:
+                    request = JewelryRequest(**message["data"])
+                except ValidationError as e:
+                    await send_error_reply(websocket, "jewelry_generated", 422, str(e))
+                    continue
+                try:
+                    result = await generate_jewelry(request, websocket, await recorded_prompt(request))
+                except HTTPException as e:
+                    # Throttled (429) or queue full (503): the socket stays open
+                    await send_error_reply(websocket, "jewelry_generated", e.status_code, e.detail,
+                                           (e.headers or {}).get("Retry-After"), prompt=request.prompt)
+                    continue
                 await manager.send_personal_message(
                     json.dumps({"type": "jewelry_generated", "data": result}),
                     websocket
                 )
+                await share_design(websocket, "jewelry_generated", result)
+            
+            elif message["type"] == "generate_jewelry_stream":
+                # Same as generate_jewelry, with an early preview of the geometry
+                try:
+                    request = JewelryRequest(**message["data"])
+                except ValidationError as e:
+                    await send_error_reply(websocket, "jewelry_generated", 422, str(e))
+                    continue
+                await stream_jewelry(request, websocket)
             
             elif message["type"] == "parametric_jewelry":
                 # Handle parametric jewelry creation
-                result = await create_parametric_jewelry(ParametricRequest(**message["data"]))
+                reply_type = "parametric_delta" if message.get("delta") else "parametric_generated"
+                try:
+                    request = ParametricRequest(**message["data"])
+                except ValidationError as e:
+                    await send_error_reply(websocket, reply_type, 422, str(e))
+                    continue
+                if message.get("delta"):
+                    # Only what changed since the client's last model (see GeometrySession);
+                    # a client that lost track sends the seq it holds, or none, to start over
+                    try:
+                        quantum = delta_quantum(message.get("quantum"))
+                    except ValueError as e:
+                        await send_error_reply(websocket, reply_type, 422, str(e))
+                        continue
+                    if message.get("base", geometry_session.seq) != geometry_session.seq:
+                        geometry_session.reset()
+                    shared = {}
+
+                    def encode_delta(model: Model) -> dict:
+                        if manager.room_of(websocket) is not None:
+                            # The session gets whole models: one dropped frame must not desync a peer
+                            shared["model_data"] = MODEL_ENCODERS[request.geometry_encoding](model)
+                        return geometry_session.encode(model, quantum)
+
+                    build = create_parametric_jewelry(request, websocket, encode_model=encode_delta)
+                else:
+                    build = create_parametric_jewelry(request, websocket)
+                    shared = {}
+                try:
+                    result = await build
+                except HTTPException as e:
+                    # Rejected (422), throttled (429/503) or failed (500): the socket stays open
+                    await send_error_reply(websocket, reply_type, e.status_code, e.detail,
+                                                (e.headers or {}).get("Retry-After"))
+                    continue
+                await manager.send_personal_message(
+                    json.dumps({"type": reply_type, "data": result}),
+                    websocket
+                )
+                await share_design(websocket, "parametric_generated", {**result, **shared})
+
+            elif message["type"] == "join_session":
+                # Several people editing one design see each other's updates
+                session = str(message.get("data", {}).get("session", ""))
+                if not session or len(session) > MAX_SESSION_NAME:
+                    await manager.send_personal_message(
+                        json.dumps({"type": "error", "data": {"error": "Invalid session name"}}),
+                        websocket
+                    )
+                    continue
+                members = manager.join(websocket, session)
                 await manager.send_personal_message(
-                    json.dumps({"type": "parametric_generated", "data": result}),
+                    json.dumps({"type": "session_joined", "data": {"session": session, "members": members}}),
                     websocket
                 )
-                
+                # Then the session's current design, if anyone has shared one yet
+                manager.catch_up(websocket)
+
+            elif message["type"] == "leave_session":
+                manager.leave(websocket)
+                await manager.send_personal_message(json.dumps({"type": "session_left", "data": {}}), websocket)
+
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Also on errors, so no connection or writer task outlives its socket
         manager.disconnect(websocket)
 
+# Designs every worker should find already built: each type's defaults (what
+# the UI opens with), with and without shading attributes, and a pavé ring so
+# the stone-overlap path (and its scipy import) is warm too
+COMMON_DESIGNS = [(jewelry_type, {}, attributes)
+                  for jewelry_type in ("ring", "necklace", "earrings", "bracelet")
+                  for attributes in (False, True)]
+COMMON_DESIGNS.append(("ring", {"stone_setting": "pave", "stone_count": 24}, False))
+
+# Set once the lifespan warm-up is done; GET /api/ready answers 503 until then
+readiness = {"ready": False, "designs": 0, "llm_connections": 0, "seconds": None, "error": None}
+
+def warmup_designs() -> list:
+    """(jewelry_type, parameters, attributes) to build before reporting ready.
+
+    WARMUP_DESIGNS names a JSON file of {"jewelry_type", "parameters",
+    "include_attributes"} objects (the /api/parametric-jewelry request body)
+    to use instead of the defaults, e.g. the most requested designs.
+    """
+    path = os.getenv("WARMUP_DESIGNS")
+    if not path:
+        return COMMON_DESIGNS
+    with open(path) as handle:
+        return [(entry["jewelry_type"], entry.get("parameters", {}), entry.get("include_attributes", False))
+                for entry in json.load(handle)]
+
+async def warm_up() -> None:
+    """Make the first requests after a deploy as fast as steady state, then report ready.
+
+    The warm-up designs go through the engine (filling its model and
+    topology caches and the per-resolution index and trig tables), into
+    the design store, and through every model encoder; the LLM client's
+    pool opens its connections. WARMUP=0 skips all of it.
+    """
+    started = time.perf_counter()
+    try:
+        if os.getenv("WARMUP", "1") != "0":
+            for jewelry_type, raw_parameters, attributes in warmup_designs():
+                parameters = normalize_parameters(jewelry_type, raw_parameters,
+                                                  vertex_budget=parametric_engine.vertex_budget)
+                model = await parametric_engine.create_model(jewelry_type, parameters, attributes=attributes)
+                design_id = DesignStore.design_id(jewelry_type, parameters, attributes)
+                await asyncio.to_thread(design_store.save, design_id, model, attributes)
+                for encode in MODEL_ENCODERS.values():
+                    await asyncio.to_thread(encode, model)
+                readiness["designs"] += 1
+            if prompt_processor() is not None:
+                readiness["llm_connections"] = await llm_client.warm_up(
+                    int(os.getenv("WARMUP_LLM_CONNECTIONS", "2"))
+                )
+    except Exception as e:
+        # A broken warm-up list must not keep the pod out of rotation for good
+        print(f"[main.py] Warm-up failed: {e!r}")
+        readiness["error"] = str(e)
+    readiness["seconds"] = round(time.perf_counter() - started, 3)
+    readiness["ready"] = True
+    print(f"[main.py] Ready: {readiness}")
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness probe: 200 once the warm-up is done, 503 before"""
+    if not readiness["ready"]:
+        return Response(content=json.dumps(readiness), status_code=503, media_type="application/json")
+    return readiness
+
+async def prewarm_designs() -> int:
+    """Build the warm-up designs into the shared design store, skipping those already there"""
+    built = 0
+    for jewelry_type, raw_parameters, attributes in warmup_designs():
+        parameters = normalize_parameters(jewelry_type, raw_parameters, vertex_budget=parametric_engine.vertex_budget)
+        design_id = DesignStore.design_id(jewelry_type, parameters, attributes)
+        if await asyncio.to_thread(design_store.has, design_id):
+            continue
+        model = await parametric_engine.create_model(jewelry_type, parameters, attributes=attributes)
+        await asyncio.to_thread(design_store.save, design_id, model, attributes)
+        built += 1
+    return built
+
+def serve_workers(workers: int, host: str = "0.0.0.0", port: int = 8000) -> None:
+    """Production mode: several worker processes sharing their cache tiers.
+
+    Designs are shared through the design store, whose blobs every worker
+    memory-maps from the same page cache; prompt extractions through a
+    shared-memory ring that each worker's prompt cache publishes to and
+    reads from. The warm-up designs are built once here, before the workers start.
+    """
+    import uvicorn
+    print(f"[main.py] Pre-warmed {asyncio.run(prewarm_designs())} designs")
+    ring_path = os.path.join(shared_memory_dir(), f"jewelry-prompt-cache-{os.getpid()}")
+    # Workers are spawned, so they pick this up when they import the app
+    os.environ["PROMPT_CACHE_RING"] = ring_path
+    try:
+        uvicorn.run("main:app", host=host, port=port, workers=workers)
+    finally:
+        if os.path.exists(ring_path):
+            os.remove(ring_path)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    host = os.getenv("BACKEND_HOST", "0.0.0.0")
+    port = int(os.getenv("BACKEND_PORT", "8000"))
+    if workers > 1:
+        serve_workers(workers, host, port)
+    else:
+        uvicorn.run(app, host=host, port=port) 
\ No newline at end of file
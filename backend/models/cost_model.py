@@ -0,0 +1,132 @@
+import json
+import os
+from typing import Dict, Any, List, Optional
+
+from models.mesh_decimation import MIN_PART_TRIANGLES
+from models.parameter_schema import TemplateParameters
+
+DEFAULT_CALIBRATION_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                        "assets", "cost_model.json")
+
+# Approximate JSON size of one serialized float (vertex data) and index
+FLOAT_BYTES = 19
+INDEX_BYTES = 5
+# Extra floats per vertex for normals, uvs and tangents
+ATTRIBUTE_FLOATS = 3 + 2 + 4
+
+# Fallback coefficients (ms), used until tools/calibrate_cost_model.py has been run
+DEFAULT_COEFFICIENTS: Dict[str, Any] = {
+    "templates": {
+        "ring": {"base_ms": 0.5, "vertex_ms": 0.002, "triangle_ms": 0.0005, "part_ms": 0.02},
+        "necklace": {"base_ms": 0.2, "vertex_ms": 0.0005, "triangle_ms": 0.0, "part_ms": 0.0},
+        "earrings": {"base_ms": 0.2, "vertex_ms": 0.002, "triangle_ms": 0.0005, "part_ms": 0.0},
+        "bracelet": {"base_ms": 0.2, "vertex_ms": 0.002, "triangle_ms": 0.0005, "part_ms": 0.0}
+    },
+    "attributes": {"base_ms": 0.5, "vertex_ms": 0.0005, "part_ms": 0.1},
+    "decimation": {"base_ms": 5.0, "triangle_ms": 0.002, "collapse_ms": 0.02, "part_ms": 0.1},
+    "optimization": {"base_ms": 0.5, "vertex_ms": 0.0002, "part_ms": 0.01, "fresh_triangle_ms": 0.001},
+    "serialize": {"base_ms": 0.05, "value_ms": 0.00005},
+    "cached_ms": 0.2
+}
+
+
+def _missing_keys(expected: Dict[str, Any], actual: Any, prefix: str = "") -> List[str]:
+    """Coefficients in expected (nested by section) that actual lacks"""
+    missing = []
+    for key, value in expected.items():
+        if not isinstance(actual, dict) or key not in actual:
+            missing.append(prefix + key)
+        elif isinstance(value, dict):
+            missing.extend(_missing_keys(value, actual[key], f"{prefix}{key}."))
+    return missing
+
+
+class CostEstimate:
+    """Predicted size and CPU time of one model request"""
+
+    __slots__ = ("vertices", "triangles", "bytes", "cpu_ms", "cached")
+
+    def __init__(self, vertices: int, triangles: int, bytes: int, cpu_ms: float, cached: bool = False):
+        self.vertices = vertices
+        self.triangles = triangles
+        self.bytes = bytes
+        self.cpu_ms = cpu_ms
+        self.cached = cached
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (f"CostEstimate(vertices={self.vertices}, triangles={self.triangles}, "
+                f"bytes={self.bytes}, cpu_ms={self.cpu_ms:.2f}, cached={self.cached})")
+
+
+class CostModel:
+    """Linear per-template cost model, calibrated from benchmark runs.
+
+    CPU time is base + per-vertex + per-triangle + per-part for the template,
+    plus each stage the request runs. Decimation pays per part it simplifies
+    and per triangle it collapses; a budget below the part count drops the
+    smallest parts, so a tighter budget can be cheaper. Optimization is
+    cheap on the template's own topology (its vertex order is cached) but
+    pays per triangle on a freshly decimated one.
+    """
+
+    def __init__(self, coefficients: Optional[Dict[str, Any]] = None):
+        self.coefficients = coefficients or DEFAULT_COEFFICIENTS
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "CostModel":
+        path = path or os.getenv("COST_MODEL_PATH", DEFAULT_CALIBRATION_PATH)
+        try:
+            with open(path) as handle:
+                coefficients = json.load(handle)
+            missing = _missing_keys(DEFAULT_COEFFICIENTS, coefficients)
+            if missing:
+                raise ValueError(f"{path} predates {', '.join(missing)}; rerun tools/calibrate_cost_model.py")
+            return cls(coefficients)
+        except (OSError, ValueError) as e:
+            print(f"[cost_model.py] Using default coefficients ({e})")
+            return cls()
+
+    def estimate(self, jewelry_type: str, parameters: TemplateParameters, attributes: bool = False,
+                 triangle_budget: Optional[int] = None, cached: bool = False) -> CostEstimate:
+        coefficients = self.coefficients
+        template = coefficients["templates"][jewelry_type]
+        vertices = parameters.estimated_vertices()
+        triangles = parameters.estimated_triangles()
+        parts = parameters.estimated_parts()
+
+        cpu_ms = (template["base_ms"] + template["vertex_ms"] * vertices + template["triangle_ms"] * triangles
+                  + template["part_ms"] * parts)
+        if attributes:
+            # Facet-shaded stones split their vertices, decimated or not
+            vertices = parameters.estimated_vertices(attributes=True)
+        fresh_triangles = 0
+        if triangle_budget and triangle_budget < triangles:
+            stage = coefficients["decimation"]
+            # The budget keeps the largest parts that get MIN_PART_TRIANGLES each
+            kept_parts = min(parts, max(triangle_budget // MIN_PART_TRIANGLES, 1))
+            kept_triangles = triangles * kept_parts // parts
+            collapses = max(kept_triangles - triangle_budget, 0)
+            cpu_ms += (stage["base_ms"] + stage["triangle_ms"] * kept_triangles + stage["collapse_ms"] * collapses
+                       + stage["part_ms"] * kept_parts)
+            # Simplification removes vertices roughly in step with triangles
+            vertices = max(int(vertices * triangle_budget / triangles), 3)
+            triangles = fresh_triangles = triangle_budget
+            parts = kept_parts
+        if attributes:
+            stage = coefficients["attributes"]
+            cpu_ms += stage["base_ms"] + stage["vertex_ms"] * vertices + stage["part_ms"] * parts
+        stage = coefficients["optimization"]
+        cpu_ms += (stage["base_ms"] + stage["vertex_ms"] * vertices + stage["part_ms"] * parts
+                   + stage["fresh_triangle_ms"] * fresh_triangles)
+        if cached:
+            # Geometry comes from the cache; only serialization is left
+            cpu_ms = coefficients["cached_ms"]
+
+        floats = vertices * (3 + (ATTRIBUTE_FLOATS if attributes else 0))
+        stage = coefficients["serialize"]
+        cpu_ms += stage["base_ms"] + stage["value_ms"] * (floats + 3 * triangles)
+        size = floats * FLOAT_BYTES + 3 * triangles * INDEX_BYTES
+        return CostEstimate(vertices, triangles, size, cpu_ms, cached)
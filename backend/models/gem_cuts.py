@@ -0,0 +1,220 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Stone type -> default cut when the request doesn't name one
+DEFAULT_CUTS = {
+    "diamond": "round_brilliant",
+    "ruby": "oval",
+    "emerald": "emerald",
+    "sapphire": "cushion",
+}
+
+# All cuts are built at girdle radius 1 (the longest half-extent of the outline)
+GIRDLE_HALF_THICKNESS = 0.015
+
+
+def _ring(outline: np.ndarray, scale: float, z: float) -> np.ndarray:
+    return np.concatenate([outline * scale, np.full((len(outline), 1), z)], axis=1)
+
+
+def _orient_outward(vertices: np.ndarray, facets: List[Sequence[int]]) -> List[Tuple[int, ...]]:
+    """Reverse any facet whose winding faces the solid's centre (cuts are star-shaped)"""
+    centre = vertices.mean(axis=0)
+    oriented = []
+    for facet in facets:
+        points = vertices[list(facet)]
+        normal = np.cross(points[1] - points[0], points[2] - points[0])
+        if np.dot(normal, points.mean(axis=0) - centre) < 0:
+            facet = tuple(reversed(facet))
+        oriented.append(tuple(facet))
+    return oriented
+
+
+def facet_table(vertices: np.ndarray, facets: List[Sequence[int]]) -> Dict[str, np.ndarray]:
+    """Fan-triangulate facet polygons into index and triangle->facet arrays"""
+    facets = _orient_outward(vertices, facets)
+    indices = []
+    facet_ids = []
+    for facet_id, facet in enumerate(facets):
+        for k in range(1, len(facet) - 1):
+            indices.extend([facet[0], facet[k], facet[k + 1]])
+            facet_ids.append(facet_id)
+    return {
+        "vertices": vertices,
+        "indices": np.array(indices, dtype=np.int64),
+        "facets": np.array(facet_ids, dtype=np.int64)
+    }
+
+
+def round_brilliant() -> Dict[str, np.ndarray]:
+    """Round brilliant: 33 crown + 24 pavilion facets (pointed culet) and a faceted girdle.
+
+    Proportions follow the Tolkowsky ideal: 57% table, 16.2% crown height and
+    43.1% pavilion depth, all relative to the girdle diameter.
+    """
+    g = GIRDLE_HALF_THICKNESS
+    table_radius, crown_height, pavilion_depth = 0.57, 0.324, 0.862
+    z_table = g + crown_height
+    z_culet = -g - pavilion_depth
+
+    main_angles = np.arange(8) * np.pi / 4
+    half_angles = main_angles + np.pi / 8
+    girdle_angles = np.arange(16) * np.pi / 8
+
+    table = np.stack([table_radius * np.cos(main_angles), table_radius * np.sin(main_angles),
+                      np.full(8, z_table)], axis=1)
+    # Star points sit halfway down the crown between the bezels
+    star_radius = (table_radius + 1.0) / 2
+    stars = np.stack([star_radius * np.cos(half_angles), star_radius * np.sin(half_angles),
+                      np.full(8, g + crown_height / 2)], axis=1)
+    girdle_top = np.stack([np.cos(girdle_angles), np.sin(girdle_angles), np.full(16, g)], axis=1)
+    girdle_bottom = girdle_top * np.array([1.0, 1.0, -1.0])
+    # Lower-half points reach 77% of the way from girdle to culet
+    reach = 0.77
+    lower = np.stack([(1 - reach) * np.cos(half_angles), (1 - reach) * np.sin(half_angles),
+                      np.full(8, -g - reach * pavilion_depth)], axis=1)
+    culet = np.array([[0.0, 0.0, z_culet]])
+
+    vertices = np.concatenate([table, stars, girdle_top, girdle_bottom, lower, culet])
+    T, S, GT, GB, L, C = 0, 8, 16, 32, 48, 56
+
+    facets: List[Sequence[int]] = [tuple(T + k for k in range(8))]
+    for k in range(8):
+        k1 = (k + 1) % 8
+        km = (k - 1) % 8
+        facets.append((T + k, T + k1, S + k))                              # star
+        facets.append((T + k, S + km, GT + 2 * k, S + k))                  # bezel (kite)
+        facets.append((S + k, GT + 2 * k, GT + 2 * k + 1))                 # upper girdle
+        facets.append((S + k, GT + 2 * k + 1, GT + (2 * k + 2) % 16))     # upper girdle
+        facets.append((C, L + km, GB + 2 * k, L + k))                      # pavilion main (kite)
+        facets.append((L + k, GB + 2 * k, GB + 2 * k + 1))                 # lower girdle
+        facets.append((L + k, GB + 2 * k + 1, GB + (2 * k + 2) % 16))      # lower girdle
+    for m in range(16):
+        m1 = (m + 1) % 16
+        facets.append((GT + m, GT + m1, GB + m1, GB + m))                  # girdle
+    return facet_table(vertices, facets)
+
+
+def outline_cut(outline: np.ndarray, crown: Sequence[Tuple[float, float]],
+                pavilion: Sequence[Tuple[float, float]], culet_z: float) -> Dict[str, np.ndarray]:
+    """Faceted solid from a girdle outline and (scale, z) rings for crown and pavilion.
+
+    Crown rings run from the table down to the girdle and pavilion rings from the
+    girdle down towards the culet; neighbouring rings are joined by quad facets.
+    """
+    g = GIRDLE_HALF_THICKNESS
+    rings = [_ring(outline, scale, z) for scale, z in crown]
+    rings.append(_ring(outline, 1.0, g))
+    rings.append(_ring(outline, 1.0, -g))
+    rings.extend(_ring(outline, scale, z) for scale, z in pavilion)
+    n = len(outline)
+    vertices = np.concatenate(rings + [np.array([[0.0, 0.0, culet_z]])])
+    culet = len(vertices) - 1
+
+    facets: List[Sequence[int]] = [tuple(range(n))]  # table
+    for r in range(len(rings) - 1):
+        upper, lower = r * n, (r + 1) * n
+        for k in range(n):
+            k1 = (k + 1) % n
+            facets.append((upper + k, upper + k1, lower + k1, lower + k))
+    last = (len(rings) - 1) * n
+    for k in range(n):
+        facets.append((last + k, last + (k + 1) % n, culet))
+    return facet_table(vertices, facets)
+
+
+def _polygon_outline(corners: np.ndarray, points_per_side: int) -> np.ndarray:
+    """Resample a closed polygon with evenly spaced points along each side"""
+    t = np.arange(points_per_side) / points_per_side
+    starts = corners
+    ends = np.roll(corners, -1, axis=0)
+    return (starts[:, None, :] * (1 - t)[None, :, None] + ends[:, None, :] * t[None, :, None]).reshape(-1, 2)
+
+
+def princess() -> Dict[str, np.ndarray]:
+    """Square modified brilliant with chevron pavilion steps"""
+    half = np.sqrt(0.5)
+    corners = np.array([[half, half], [-half, half], [-half, -half], [half, -half]])
+    outline = _polygon_outline(corners, 4)
+    return outline_cut(outline,
+                       crown=[(0.7, 0.21), (0.86, 0.12)],
+                       pavilion=[(0.75, -0.3), (0.45, -0.55), (0.2, -0.7)],
+                       culet_z=-0.78)
+
+
+def oval() -> Dict[str, np.ndarray]:
+    """Oval brilliant, 1.4:1 length to width"""
+    angles = np.arange(16) * 2 * np.pi / 16
+    outline = np.stack([np.cos(angles), np.sin(angles) / 1.4], axis=1)
+    return outline_cut(outline,
+                       crown=[(0.55, 0.3), (0.8, 0.17)],
+                       pavilion=[(0.6, -0.38)],
+                       culet_z=-0.86)
+
+
+def pear() -> Dict[str, np.ndarray]:
+    """Pear brilliant: rounded head at +x tapering to a point at -x"""
+    t = np.arange(18) * 2 * np.pi / 18
+    outline = np.stack([np.cos(t), 0.7 * np.sin(t) * np.sqrt((1 + np.cos(t)) / 2)], axis=1)
+    return outline_cut(outline,
+                       crown=[(0.55, 0.28), (0.8, 0.16)],
+                       pavilion=[(0.6, -0.36)],
+                       culet_z=-0.82)
+
+
+def cushion() -> Dict[str, np.ndarray]:
+    """Cushion brilliant: squarish superellipse outline with rounded corners"""
+    angles = np.arange(20) * 2 * np.pi / 20
+    c, s = np.cos(angles), np.sin(angles)
+    outline = np.stack([np.sign(c) * np.sqrt(np.abs(c)), 0.92 * np.sign(s) * np.sqrt(np.abs(s))], axis=1)
+    return outline_cut(outline,
+                       crown=[(0.58, 0.3), (0.8, 0.17)],
+                       pavilion=[(0.65, -0.35), (0.3, -0.62)],
+                       culet_z=-0.78)
+
+
+def emerald() -> Dict[str, np.ndarray]:
+    """Emerald step cut: cut-corner rectangle with three crown and three pavilion steps"""
+    length, width, corner = 1.0, 0.7, 0.2
+    outline = np.array([
+        [length, width - corner], [length - corner, width], [-length + corner, width], [-length, width - corner],
+        [-length, -width + corner], [-length + corner, -width], [length - corner, -width], [length, -width + corner]
+    ]) / np.hypot(length, width - corner)
+    return outline_cut(outline,
+                       crown=[(0.7, 0.2), (0.8, 0.15), (0.9, 0.08)],
+                       pavilion=[(0.8, -0.2), (0.6, -0.4), (0.35, -0.58)],
+                       culet_z=-0.68)
+
+
+GEM_CUT_BUILDERS = {
+    "round_brilliant": round_brilliant,
+    "princess": princess,
+    "oval": oval,
+    "pear": pear,
+    "cushion": cushion,
+    "emerald": emerald,
+}
+
+
+def resolve_cut(stone_type: str, stone_cut: Optional[str] = None) -> str:
+    """Pick the cut for a stone, falling back from an explicit cut to the type's default"""
+    if stone_cut in GEM_CUT_BUILDERS:
+        return stone_cut
+    return DEFAULT_CUTS.get(stone_type, "round_brilliant")
+
+
+def place_cut(vertices: np.ndarray, indices: np.ndarray, positions: np.ndarray,
+              sizes, rotations: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Transform one cut's facet table into many stones with a single einsum.
+
+    Returns vertices shaped (stones, cut_vertices, 3); the cut's indices apply
+    to each stone unchanged.
+    """
+    template = np.asarray(vertices, dtype=np.float64)
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    sizes = np.broadcast_to(np.asarray(sizes, dtype=np.float64), (len(positions),))
+    if rotations is None:
+        placed = template[None, :, :] * sizes[:, None, None]
+    else:
+        placed = np.einsum("nij,vj->nvi", rotations * sizes[:, None, None], template)
+    return placed + positions[:, None, :], np.asarray(indices, dtype=np.int64)
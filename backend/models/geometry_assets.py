@@ -0,0 +1,238 @@
+import hashlib
+import inspect
+import json
+import os
+import struct
+import sys
+from typing import Dict, Any, Callable, Optional, Union
+
+import numpy as np
+
+from models.gem_cuts import GEM_CUT_BUILDERS
+
+# Packed file layout: magic, version, index length, JSON index, aligned array data
+MAGIC = b"JGEO"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sII")
+ALIGNMENT = 64
+
+DEFAULT_ASSET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "assets", "geometry_assets.bin")
+
+
+def _post_asset() -> Dict[str, np.ndarray]:
+    """Open cylinder of radius 1 and height 1, scaled per axis when placed"""
+    segments = 12
+    angles = np.arange(segments) * 2 * np.pi / segments
+    vertices = np.empty((segments * 2, 3))
+    vertices[0::2] = np.stack([np.cos(angles), np.sin(angles), np.full(segments, 0.5)], axis=1)
+    vertices[1::2] = np.stack([np.cos(angles), np.sin(angles), np.full(segments, -0.5)], axis=1)
+    base = np.arange(segments) * 2
+    next_base = (base + 2) % (segments * 2)
+    indices = np.stack([base, base + 1, next_base, next_base, base + 1, next_base + 1], axis=1)
+    return {"vertices": vertices, "indices": indices.ravel()}
+
+
+def _prong_setting_asset() -> Dict[str, np.ndarray]:
+    """Four prongs as unit directions; z is 0 at the base and 1 at the tip"""
+    prong_count = 4
+    angles = np.arange(prong_count) * 2 * np.pi / prong_count
+    vertices = np.empty((prong_count * 2, 3))
+    vertices[0::2] = np.stack([np.cos(angles), np.sin(angles), np.zeros(prong_count)], axis=1)
+    vertices[1::2] = np.stack([np.cos(angles), np.sin(angles), np.ones(prong_count)], axis=1)
+    base = np.arange(prong_count) * 2
+    next_base = (base + 2) % (prong_count * 2)
+    indices = np.stack([base, next_base, base + 1, next_base, next_base + 1, base + 1], axis=1)
+    return {"vertices": vertices, "indices": indices.ravel()}
+
+
+def _oval_link_asset() -> Dict[str, np.ndarray]:
+    """Single chain link quad of size 1"""
+    vertices = [[0, 0, 0], [1, 0, 0], [0, 0.5, 0], [1, 0.5, 0]]
+    indices = [0, 1, 2, 1, 3, 2]
+    return {"vertices": np.array(vertices), "indices": np.array(indices)}
+
+
+# Canonical meshes written by the build step, keyed by asset ID
+ASSET_BUILDERS: Dict[str, Callable[[], Dict[str, np.ndarray]]] = {
+    "stud/post": _post_asset,
+    "setting/prong4": _prong_setting_asset,
+    "link/oval": _oval_link_asset,
+}
+# Gem cuts ship with their facet tables (triangle -> facet id)
+ASSET_BUILDERS.update({f"gem/{cut}": builder for cut, builder in GEM_CUT_BUILDERS.items()})
+
+
+def _hash_code(digest: Any, code: Any) -> None:
+    digest.update(code.co_code)
+    for constant in code.co_consts:
+        # Nested functions and comprehensions have code objects, whose repr holds an address
+        if inspect.iscode(constant):
+            _hash_code(digest, constant)
+        elif isinstance(constant, frozenset):
+            # Set order follows string hashing, which changes from process to process
+            digest.update(repr(sorted(map(repr, constant))).encode("utf-8"))
+        else:
+            digest.update(repr(constant).encode("utf-8"))
+
+
+def builder_fingerprint(builder: Callable[[], Dict[str, np.ndarray]]) -> str:
+    """Hash of the source an asset is built from (its builder's whole module, helpers included).
+
+    Without source (a zipapp, a .pyc-only deploy, a frozen build) the
+    module's compiled functions are hashed instead, with FORMAT_VERSION.
+    """
+    module = inspect.getmodule(builder)
+    digest = hashlib.sha256(f"{builder.__name__}\n".encode("utf-8"))
+    try:
+        digest.update(inspect.getsource(module).encode("utf-8"))
+    except (OSError, TypeError):
+        digest.update(f"bytecode {FORMAT_VERSION}\n".encode("utf-8"))
+        for name, function in sorted(vars(module).items()):
+            if inspect.isfunction(function) and function.__module__ == module.__name__:
+                digest.update(name.encode("utf-8"))
+                _hash_code(digest, function.__code__)
+    return digest.hexdigest()[:16]
+
+
+def build_asset_library(path: str = DEFAULT_ASSET_PATH) -> str:
+    """Build step: write every canonical mesh into one packed, aligned binary file"""
+    index: Dict[str, Dict[str, Any]] = {}
+    builders = {asset_id: builder_fingerprint(builder) for asset_id, builder in ASSET_BUILDERS.items()}
+    blobs = []
+    offset = 0
+    for asset_id, builder in ASSET_BUILDERS.items():
+        arrays = builder()
+        entry = {}
+        for name, array in arrays.items():
+            if np.issubdtype(np.asarray(array).dtype, np.integer):
+                array = np.ascontiguousarray(array, dtype=np.uint32)
+            else:
+                array = np.ascontiguousarray(array, dtype=np.float32)
+            padding = (-offset) % ALIGNMENT
+            offset += padding
+            blobs.append(b"\0" * padding)
+            entry[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            blobs.append(array.tobytes())
+            offset += array.nbytes
+        index[asset_id] = entry
+
+    index_bytes = json.dumps({"assets": index, "builders": builders}, sort_keys=True).encode("utf-8")
+    data_start = HEADER.size + len(index_bytes)
+    data_start += (-data_start) % ALIGNMENT
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(index_bytes)) + index_bytes
+    header += b"\0" * (data_start - len(header))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write next to the target and rename so readers never map a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(header)
+        for blob in blobs:
+            handle.write(blob)
+    os.replace(tmp_path, path)
+    print(f"[geometry_assets.py] Wrote {len(index)} assets to {path}")
+    return path
+
+
+class GeometryAssetLibrary:
+    """Read-only canonical meshes backed by a single np.memmap.
+
+    Arrays are views into the mapped file, so every forked worker shares the
+    same physical pages and nothing is copied or rebuilt per request.
+    builders holds the fingerprint of the code each asset was built from.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as handle:
+            magic, version, index_length = HEADER.unpack(handle.read(HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported geometry asset file: {path}")
+            index = json.loads(handle.read(index_length).decode("utf-8"))
+        data_start = HEADER.size + index_length
+        data_start += (-data_start) % ALIGNMENT
+
+        self.path = path
+        self.builders: Dict[str, str] = index["builders"]
+        self._mmap = np.memmap(path, dtype=np.uint8, mode="r")
+        self._assets: Dict[str, Dict[str, np.ndarray]] = {}
+        for asset_id, entry in index["assets"].items():
+            arrays = {}
+            for name, spec in entry.items():
+                dtype = np.dtype(spec["dtype"])
+                count = int(np.prod(spec["shape"]))
+                start = data_start + spec["offset"]
+                raw = self._mmap[start:start + count * dtype.itemsize]
+                arrays[name] = raw.view(dtype).reshape(spec["shape"])
+            self._assets[asset_id] = arrays
+
+    def __contains__(self, asset_id: str) -> bool:
+        return asset_id in self._assets
+
+    def get(self, asset_id: str) -> Dict[str, np.ndarray]:
+        if asset_id not in self._assets:
+            raise KeyError(f"Unknown geometry asset: {asset_id}")
+        return self._assets[asset_id]
+
+    def vertices(self, asset_id: str) -> np.ndarray:
+        return self.get(asset_id)["vertices"]
+
+    def indices(self, asset_id: str) -> np.ndarray:
+        return self.get(asset_id)["indices"]
+
+    def place(self, asset_id: str, scale: Union[float, np.ndarray],
+              position: Optional[np.ndarray] = None) -> np.ndarray:
+        """Scale (uniformly or per axis) and translate one copy of an asset"""
+        vertices = self.vertices(asset_id).astype(np.float64) * scale
+        if position is not None:
+            vertices += np.asarray(position, dtype=np.float64)
+        return vertices
+
+    def instance(self, asset_id: str, offsets: np.ndarray,
+                 scales: Union[float, np.ndarray] = 1.0) -> Dict[str, np.ndarray]:
+        """Stamp many copies of an asset in one broadcast, with per-copy scale and offset"""
+        template = self.vertices(asset_id).astype(np.float64)
+        template_indices = self.indices(asset_id).astype(np.int64)
+        offsets = np.asarray(offsets, dtype=np.float64).reshape(-1, 3)
+        scales = np.broadcast_to(np.asarray(scales, dtype=np.float64), (len(offsets),))
+        vertices = template[None, :, :] * scales[:, None, None] + offsets[:, None, :]
+        bases = np.arange(len(offsets), dtype=np.int64)[:, None] * len(template)
+        return {
+            "vertices": vertices.reshape(-1, 3),
+            "indices": (template_indices[None, :] + bases).ravel()
+        }
+
+
+_default_library: Optional[GeometryAssetLibrary] = None
+
+
+def load_asset_library(path: Optional[str] = None) -> GeometryAssetLibrary:
+    """Map the packed asset file, building it first if it is missing or stale.
+
+    Stale means an asset is missing or was built by code that has changed
+    since (its builder fingerprint differs), e.g. a gem cut's proportions.
+    """
+    path = path or os.getenv("GEOMETRY_ASSETS_PATH", DEFAULT_ASSET_PATH)
+    try:
+        library = GeometryAssetLibrary(path)
+        stale = [asset_id for asset_id, builder in ASSET_BUILDERS.items()
+                 if asset_id not in library or library.builders.get(asset_id) != builder_fingerprint(builder)]
+        if not stale:
+            return library
+        print(f"[geometry_assets.py] Rebuilding {path}: stale assets {stale}")
+    except (FileNotFoundError, ValueError, KeyError, struct.error):
+        pass
+    build_asset_library(path)
+    return GeometryAssetLibrary(path)
+
+
+def default_library() -> GeometryAssetLibrary:
+    """Process-wide asset library, mapped once (before workers fork when preloaded)"""
+    global _default_library
+    if _default_library is None:
+        _default_library = load_asset_library()
+    return _default_library
+
+
+if __name__ == "__main__":
+    build_asset_library(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ASSET_PATH)
@@ -0,0 +1,238 @@
+import json
+import struct
+
+import numpy as np
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+# Packed model layout, as for the asset file: magic, version, index length,
+# JSON index (geometry tree with arrays replaced by references), aligned arrays
+MODEL_MAGIC = b"JMDL"
+MODEL_FORMAT_VERSION = 1
+MODEL_HEADER = struct.Struct("<4sII")
+MODEL_ALIGNMENT = 16
+MESH_ARRAYS = ("vertices", "indices", "normals", "uvs", "tangents")
+
+
+class Mesh:
+    """One renderable part backed by contiguous float32/uint32 arrays.
+
+    vertices is (n, 3) float32 and indices a flat uint32 triangle list.
+    Optional shading attributes (normals, uvs, tangents) are per vertex.
+    Anything else about the part (stone type, parametric surface, shading
+    hints) lives in the small meta dict. facets, for faceted stones, maps
+    each triangle to its cut facet for the attribute stage; it is never
+    serialized, and stages that rebuild the triangles drop it.
+    """
+
+    __slots__ = ("vertices", "indices", "type", "meta", "normals", "uvs", "tangents", "facets")
+
+    def __init__(self, vertices, indices, type: str, meta: Optional[Dict[str, Any]] = None,
+                 normals=None, uvs=None, tangents=None, facets=None):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self.indices = np.ascontiguousarray(indices, dtype=np.uint32).reshape(-1)
+        self.type = type
+        self.meta = meta if meta is not None else {}
+        self.normals = None if normals is None else np.ascontiguousarray(normals, dtype=np.float32).reshape(-1, 3)
+        self.uvs = None if uvs is None else np.ascontiguousarray(uvs, dtype=np.float32).reshape(-1, 2)
+        self.tangents = None if tangents is None else np.ascontiguousarray(tangents, dtype=np.float32).reshape(-1, 4)
+        self.facets = None if facets is None else np.asarray(facets).reshape(-1)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.indices) // 3
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.vertices, self.indices, self.normals, self.uvs, self.tangents)
+                   if array is not None)
+
+    def replace(self, **changes) -> "Mesh":
+        """Copy of this mesh with some fields swapped; untouched arrays are shared, not copied"""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields["meta"] = dict(self.meta)
+        fields.update(changes)
+        return Mesh(**fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Legacy JSON form: flat Python lists plus metadata keys"""
+        data = {
+            "vertices": self.vertices.ravel().tolist(),
+            "indices": self.indices.tolist(),
+            "type": self.type
+        }
+        data.update(self.meta)
+        for name in ("normals", "uvs", "tangents"):
+            array = getattr(self, name)
+            if array is not None:
+                data[name] = array.ravel().tolist()
+        return data
+
+    def __repr__(self) -> str:
+        return f"Mesh(type={self.type}, vertices={self.vertex_count}, triangles={self.triangle_count})"
+
+
+def iter_meshes(node: Any) -> Iterator[Mesh]:
+    """Yield every Mesh in a geometry tree of dicts, lists and meshes"""
+    if isinstance(node, Mesh):
+        yield node
+    elif isinstance(node, dict):
+        for value in node.values():
+            yield from iter_meshes(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from iter_meshes(item)
+
+
+def map_meshes(node: Any, func: Callable[[Mesh], Mesh]) -> Any:
+    """Rebuild a geometry tree with every Mesh replaced by func(mesh), in iter_meshes order"""
+    if isinstance(node, Mesh):
+        return func(node)
+    if isinstance(node, dict):
+        return {key: map_meshes(value, func) for key, value in node.items()}
+    if isinstance(node, list):
+        return [map_meshes(item, func) for item in node]
+    return node
+
+
+def geometry_to_dict(node: Any) -> Any:
+    """Convert a geometry tree to plain JSON-ready values"""
+    if isinstance(node, Mesh):
+        return node.to_dict()
+    if isinstance(node, dict):
+        return {key: geometry_to_dict(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [geometry_to_dict(item) for item in node]
+    if isinstance(node, np.ndarray):
+        return node.tolist()
+    if isinstance(node, np.generic):
+        return node.item()
+    return node
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class _Packer:
+    def __init__(self):
+        self.blobs: List[bytes] = []
+        self.offset = 0
+
+    def array(self, array: np.ndarray) -> Dict[str, Any]:
+        array = np.ascontiguousarray(array)
+        padding = (-self.offset) % MODEL_ALIGNMENT
+        self.blobs.append(b"\0" * padding)
+        self.offset += padding
+        spec = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": self.offset}
+        self.blobs.append(array.tobytes())
+        self.offset += array.nbytes
+        return spec
+
+    def node(self, node: Any) -> Any:
+        if isinstance(node, Mesh):
+            arrays = {name: self.array(getattr(node, name)) for name in MESH_ARRAYS
+                      if getattr(node, name) is not None}
+            return {"$mesh": {"type": node.type, "meta": node.meta, "arrays": arrays}}
+        if isinstance(node, np.ndarray):
+            return {"$array": self.array(node)}
+        if isinstance(node, dict):
+            return {key: self.node(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self.node(item) for item in node]
+        return node
+
+
+def _unpack_node(node: Any, data: memoryview) -> Any:
+    def array(spec: Dict[str, Any]) -> np.ndarray:
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        return np.frombuffer(data, dtype=dtype, count=count, offset=spec["offset"]).reshape(spec["shape"])
+
+    if isinstance(node, dict):
+        if "$mesh" in node:
+            mesh = node["$mesh"]
+            return Mesh(type=mesh["type"], meta=mesh["meta"],
+                        **{name: array(spec) for name, spec in mesh["arrays"].items()})
+        if "$array" in node:
+            return array(node["$array"])
+        return {key: _unpack_node(value, data) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_unpack_node(item, data) for item in node]
+    return node
+
+
+class Model:
+    """A generated piece: jewelry type, geometry tree of Mesh parts and its inputs"""
+
+    __slots__ = ("type", "geometry", "parameters", "metadata")
+
+    def __init__(self, type: str, geometry: Dict[str, Any], parameters: Optional[Dict[str, Any]] = None,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.type = type
+        self.geometry = geometry
+        self.parameters = parameters
+        self.metadata = metadata
+
+    def parts(self) -> Iterator[Mesh]:
+        return iter_meshes(self.geometry)
+
+    @property
+    def vertex_count(self) -> int:
+        return sum(mesh.vertex_count for mesh in self.parts())
+
+    @property
+    def triangle_count(self) -> int:
+        return sum(mesh.triangle_count for mesh in self.parts())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(mesh.nbytes for mesh in self.parts())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Legacy JSON response body"""
+        data = {"type": self.type, "geometry": geometry_to_dict(self.geometry)}
+        if self.parameters is not None:
+            data["parameters"] = self.parameters
+        if self.metadata is not None:
+            data["metadata"] = self.metadata
+        return data
+
+    def to_bytes(self) -> bytes:
+        """Packed binary form: the compact buffers as they are, no JSON lists"""
+        packer = _Packer()
+        index = {
+            "type": self.type,
+            "geometry": packer.node(self.geometry),
+            "parameters": self.parameters,
+            "metadata": self.metadata
+        }
+        index_bytes = json.dumps(index, default=_json_default).encode("utf-8")
+        data_start = MODEL_HEADER.size + len(index_bytes)
+        header = MODEL_HEADER.pack(MODEL_MAGIC, MODEL_FORMAT_VERSION, len(index_bytes)) + index_bytes
+        header += b"\0" * ((-data_start) % MODEL_ALIGNMENT)
+        return header + b"".join(packer.blobs)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "Model":
+        """Inverse of to_bytes; arrays are read-only views into blob"""
+        magic, version, index_length = MODEL_HEADER.unpack_from(blob)
+        if magic != MODEL_MAGIC or version != MODEL_FORMAT_VERSION:
+            raise ValueError("Unsupported packed model")
+        index = json.loads(bytes(blob[MODEL_HEADER.size:MODEL_HEADER.size + index_length]).decode("utf-8"))
+        data_start = MODEL_HEADER.size + index_length
+        data_start += (-data_start) % MODEL_ALIGNMENT
+        data = memoryview(blob)[data_start:]
+        return cls(index["type"], _unpack_node(index["geometry"], data),
+                   parameters=index["parameters"], metadata=index["metadata"])
+
+    def __repr__(self) -> str:
+        return (f"Model(type={self.type}, parts={sum(1 for _ in self.parts())}, "
+                f"vertices={self.vertex_count}, triangles={self.triangle_count}, bytes={self.nbytes})")
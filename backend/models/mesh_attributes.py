@@ -0,0 +1,153 @@
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+from models.mesh import Mesh, map_meshes
+from models.topology import grid_uvs
+
+# Part types whose facets should render with hard edges
+# (parts can also opt in with "shading": "flat", as gem cuts do)
+FLAT_SHADED_TYPES = {"stone", "stone_setting"}
+
+
+def smooth_normals(vertices: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Area-weighted vertex normals accumulated with a single scatter-add"""
+    normals = np.zeros_like(vertices)
+    if len(indices) == 0:
+        return normals
+    tris = indices.reshape(-1, 3)
+    v0, v1, v2 = vertices[tris[:, 0]], vertices[tris[:, 1]], vertices[tris[:, 2]]
+    # Unnormalized cross product is proportional to triangle area
+    face_normals = np.cross(v1 - v0, v2 - v0)
+    for corner in range(3):
+        np.add.at(normals, tris[:, corner], face_normals)
+    return _normalize(normals)
+
+
+def flat_normals(vertices: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split every triangle into its own vertices and give them the face normal"""
+    tris = indices.reshape(-1, 3)
+    flat_vertices = vertices[tris].reshape(-1, 3)
+    v0, v1, v2 = vertices[tris[:, 0]], vertices[tris[:, 1]], vertices[tris[:, 2]]
+    face_normals = _normalize(np.cross(v1 - v0, v2 - v0))
+    normals = np.repeat(face_normals, 3, axis=0)
+    flat_indices = np.arange(len(flat_vertices), dtype=np.int64)
+    return flat_vertices, flat_indices, normals
+
+
+@lru_cache(maxsize=64)
+def _facet_corners(index_bytes: bytes, facet_bytes: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split layout of one facet table: source vertex and facet per new vertex, and new indices.
+
+    It depends only on the topology, so every placed stone of a cut reuses it.
+    """
+    indices = np.frombuffer(index_bytes, dtype=np.uint32).astype(np.int64)
+    facets = np.frombuffer(facet_bytes, dtype=np.uint32).astype(np.int64)
+    # (facet, source vertex) pairs, numbered in sorted order
+    stride = int(indices.max()) + 1
+    unique, inverse = np.unique(np.repeat(facets, 3) * stride + indices, return_inverse=True)
+    return unique % stride, unique // stride, inverse.reshape(-1).astype(np.int64)
+
+
+def facet_normals(vertices: np.ndarray, indices: np.ndarray,
+                  facets: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hard edges from a cut's facet table: one vertex per facet corner, with the facet's normal.
+
+    A facet's triangles share their corner vertices, so a fan-triangulated
+    n-gon needs n vertices instead of the 3 * (n - 2) of flat_normals.
+    """
+    facets = np.asarray(facets, dtype=np.uint32)
+    sources, corner_facets, flat_indices = _facet_corners(
+        np.asarray(indices, dtype=np.uint32).tobytes(), facets.tobytes()
+    )
+    corners = vertices[indices.reshape(-1, 3)]
+    e1, e2 = corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]
+    # Area-weighted sums, so a slightly non-planar facet gets its average plane
+    sums = np.stack([
+        np.bincount(facets, weights=e1[:, 1] * e2[:, 2] - e1[:, 2] * e2[:, 1]),
+        np.bincount(facets, weights=e1[:, 2] * e2[:, 0] - e1[:, 0] * e2[:, 2]),
+        np.bincount(facets, weights=e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0])
+    ], axis=1)
+    return vertices[sources], flat_indices, _normalize(sums)[corner_facets]
+
+
+def torus_normals(vertices: np.ndarray, radius: float) -> np.ndarray:
+    """Analytic torus normals: direction from the tube centre circle to each vertex"""
+    phi = np.arctan2(vertices[:, 1], vertices[:, 0])
+    centres = np.stack([radius * np.cos(phi), radius * np.sin(phi), np.zeros_like(phi)], axis=1)
+    return _normalize(vertices - centres)
+
+
+def torus_tangents(vertices: np.ndarray) -> np.ndarray:
+    """Analytic torus tangents along the sweep direction (u), with +1 handedness"""
+    phi = np.arctan2(vertices[:, 1], vertices[:, 0])
+    return np.stack([-np.sin(phi), np.cos(phi), np.zeros_like(phi), np.ones_like(phi)], axis=1)
+
+
+def uv_tangents(vertices: np.ndarray, indices: np.ndarray,
+                normals: np.ndarray, uvs: np.ndarray) -> np.ndarray:
+    """Per-vertex tangents from UV derivatives, orthogonalized against the normals"""
+    tris = indices.reshape(-1, 3)
+    p0, p1, p2 = vertices[tris[:, 0]], vertices[tris[:, 1]], vertices[tris[:, 2]]
+    t0, t1, t2 = uvs[tris[:, 0]], uvs[tris[:, 1]], uvs[tris[:, 2]]
+    e1, e2 = p1 - p0, p2 - p0
+    d1, d2 = t1 - t0, t2 - t0
+    det = d1[:, 0] * d2[:, 1] - d2[:, 0] * d1[:, 1]
+    # Triangles with a degenerate UV mapping contribute nothing
+    inv = np.divide(1.0, det, out=np.zeros_like(det), where=np.abs(det) > 1e-12)
+    sdir = (e1 * d2[:, 1:2] - e2 * d1[:, 1:2]) * inv[:, None]
+    tdir = (e2 * d1[:, 0:1] - e1 * d2[:, 0:1]) * inv[:, None]
+
+    tan = np.zeros_like(vertices)
+    bitan = np.zeros_like(vertices)
+    for corner in range(3):
+        np.add.at(tan, tris[:, corner], sdir)
+        np.add.at(bitan, tris[:, corner], tdir)
+
+    # Gram-Schmidt against the normal, then pick handedness
+    tan = _normalize(tan - normals * np.sum(normals * tan, axis=1, keepdims=True))
+    handedness = np.where(np.sum(np.cross(normals, tan) * bitan, axis=1) < 0.0, -1.0, 1.0)
+    return np.concatenate([tan, handedness[:, None]], axis=1)
+
+
+def compute_attributes(mesh: Mesh) -> Mesh:
+    """Mesh with normals, and UVs/tangents where a parametric grid is known"""
+    vertices = mesh.vertices.astype(np.float64)
+    indices = mesh.indices.astype(np.int64)
+    surface: Optional[Dict[str, Any]] = mesh.meta.get("surface")
+
+    if len(vertices) == 0:
+        return mesh.replace(normals=np.zeros((0, 3)))
+
+    flat = mesh.meta.get("shading") == "flat" or mesh.type in FLAT_SHADED_TYPES
+    if flat and len(indices) > 0:
+        if mesh.facets is not None and len(mesh.facets) == mesh.triangle_count:
+            vertices, indices, normals = facet_normals(vertices, indices, mesh.facets)
+        else:
+            vertices, indices, normals = flat_normals(vertices, indices)
+        return mesh.replace(vertices=vertices, indices=indices, normals=normals)
+
+    uvs = None
+    tangents = None
+    if surface and surface.get("kind") == "torus":
+        normals = torus_normals(vertices, surface["radius"])
+        tangents = torus_tangents(vertices)
+    else:
+        normals = smooth_normals(vertices, indices)
+
+    if surface and surface.get("kind") in ("torus", "grid"):
+        uvs = grid_uvs(surface["radial_segments"], surface["tubular_segments"])
+        if tangents is None and len(indices) > 0:
+            tangents = uv_tangents(vertices, indices, normals, uvs)
+
+    return mesh.replace(normals=normals, uvs=uvs, tangents=tangents)
+
+
+def add_attributes(geometry: Any) -> Any:
+    """Attribute stage: geometry tree with shading attributes on every part"""
+    return map_meshes(geometry, compute_attributes)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 1e-12)
@@ -0,0 +1,196 @@
+import base64
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+from models.mesh import Mesh, Model
+
+# Compact mesh encoding for bandwidth-bound clients ("quantized" geometry).
+#
+# Positions (and UVs) are quantized to POSITION_BITS per axis inside each
+# part's bounding box, so the worst-case error per axis is half a step:
+#     extent / (2 * (2**POSITION_BITS - 1))
+# about 0.24 µm on a 31 mm ring band, plus the float32 rounding of the
+# decoded value (up to 1 µm at 31 mm). Normals (and tangent directions) are
+# octahedrally encoded as two signed NORMAL_BITS values, at most ~0.06° off
+# at 12 bits; every part reports its own bounds under "max_error". Indices
+# are delta- and zigzag-encoded and written as LEB128 varints, so triangles
+# that reference recently used vertices cost one or two bytes an index.
+ENCODING_NAME = "quantized"
+POSITION_BITS = 16
+NORMAL_BITS = 12
+
+
+def _buffer(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+def _unbuffer(data: str, dtype) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=dtype)
+
+
+def quantize(values: np.ndarray, bits: int = POSITION_BITS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(uint16 steps, offset, step size) per column, within the values' bounding box"""
+    values = np.asarray(values, dtype=np.float64)
+    offset = values.min(axis=0) if len(values) else np.zeros(values.shape[1])
+    extent = values.max(axis=0) - offset if len(values) else np.zeros(values.shape[1])
+    step = extent / (2 ** bits - 1)
+    # A flat axis (zero extent) stores offset only; its steps are all zero
+    steps = np.rint((values - offset) / np.where(step > 0, step, 1.0)).astype(np.uint16)
+    return steps, offset, step
+
+
+def dequantize(steps: np.ndarray, offset, step) -> np.ndarray:
+    return (np.asarray(offset) + steps.astype(np.float64) * np.asarray(step)).astype(np.float32)
+
+
+def _sign(values: np.ndarray) -> np.ndarray:
+    return np.where(values >= 0, 1.0, -1.0)
+
+
+def octahedral_encode(vectors: np.ndarray, bits: int = NORMAL_BITS) -> np.ndarray:
+    """Unit vectors as two signed ints each, folded onto the octahedron"""
+    vectors = np.asarray(vectors, dtype=np.float64)
+    projected = vectors / np.maximum(np.abs(vectors).sum(axis=1, keepdims=True), 1e-12)
+    x, y, z = projected[:, 0], projected[:, 1], projected[:, 2]
+    # Lower hemisphere folds over the diagonals onto the outer triangles
+    lower = z < 0
+    x, y = (np.where(lower, (1 - np.abs(y)) * _sign(x), x),
+            np.where(lower, (1 - np.abs(x)) * _sign(y), y))
+    limit = 2 ** (bits - 1) - 1
+    return np.rint(np.clip(np.stack([x, y], axis=1), -1, 1) * limit).astype(np.int16)
+
+
+def octahedral_decode(encoded: np.ndarray, bits: int = NORMAL_BITS) -> np.ndarray:
+    limit = 2 ** (bits - 1) - 1
+    xy = encoded.astype(np.float64) / limit
+    x, y = xy[:, 0], xy[:, 1]
+    z = 1 - np.abs(x) - np.abs(y)
+    fold = np.clip(-z, 0, None)
+    vectors = np.stack([x - fold * _sign(x), y - fold * _sign(y), z], axis=1)
+    return (vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)).astype(np.float32)
+
+
+def encode_indices(indices: np.ndarray) -> bytes:
+    """Delta, zigzag, then LEB128 varint bytes, all vectorized"""
+    values = np.asarray(indices, dtype=np.int64)
+    deltas = np.diff(values, prepend=0)
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+    lengths = np.ones(len(zigzag), dtype=np.int64)
+    for shift in (7, 14, 21, 28):
+        lengths += zigzag >= (1 << shift)
+    starts = np.cumsum(lengths) - lengths
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for byte in range(5):
+        present = lengths > byte
+        chunk = (zigzag[present] >> np.uint64(7 * byte)) & np.uint64(0x7F)
+        more = (lengths[present] > byte + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[present] + byte] = chunk | more
+    return out.tobytes()
+
+
+def decode_indices(data: bytes) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if len(raw) == 0:
+        return np.zeros(0, dtype=np.uint32)
+    last = (raw & 0x80) == 0
+    starts = np.flatnonzero(np.concatenate([[True], last[:-1]]))
+    position = np.arange(len(raw)) - np.repeat(starts, np.diff(np.append(starts, len(raw))))
+    payload = (raw & 0x7F).astype(np.uint64) << (np.uint64(7) * position.astype(np.uint64))
+    zigzag = np.add.reduceat(payload, starts).astype(np.int64)
+    deltas = (zigzag >> 1) ^ -(zigzag & 1)
+    return np.cumsum(deltas).astype(np.uint32)
+
+
+def _quantization_error(original: np.ndarray, steps: np.ndarray, offset, step) -> float:
+    """Largest per-axis difference between the values and what a client decodes (float32)"""
+    if len(original) == 0:
+        return 0.0
+    return float(np.abs(dequantize(steps, offset, step).astype(np.float64) - original).max())
+
+
+def _angular_error(original: np.ndarray, decoded: np.ndarray) -> float:
+    if len(original) == 0:
+        return 0.0
+    unit = original / np.maximum(np.linalg.norm(original, axis=1, keepdims=True), 1e-12)
+    cosines = np.clip((unit * decoded).sum(axis=1), -1.0, 1.0)
+    return float(np.degrees(np.arccos(cosines.min())))
+
+
+def encode_mesh(mesh: Mesh, position_bits: int = POSITION_BITS, normal_bits: int = NORMAL_BITS) -> Dict[str, Any]:
+    """JSON-ready quantized form of one part, with its measured error bounds"""
+    steps, offset, step = quantize(mesh.vertices, position_bits)
+    data = {
+        "type": mesh.type,
+        "vertex_count": mesh.vertex_count,
+        "positions": {"bits": position_bits, "offset": offset.tolist(), "step": step.tolist(),
+                      "data": _buffer(steps)},
+        "indices": {"count": len(mesh.indices), "data": base64.b64encode(encode_indices(mesh.indices)).decode("ascii")}
+    }
+    # Measured on the decoded float32 values: half a step plus their rounding, at most
+    max_error = {"position": _quantization_error(mesh.vertices, steps, offset, step)}
+    if mesh.normals is not None:
+        encoded = octahedral_encode(mesh.normals, normal_bits)
+        data["normals"] = {"bits": normal_bits, "data": _buffer(encoded)}
+        max_error["normal_degrees"] = _angular_error(mesh.normals, octahedral_decode(encoded, normal_bits))
+    if mesh.uvs is not None:
+        uv_steps, uv_offset, uv_step = quantize(mesh.uvs, position_bits)
+        data["uvs"] = {"bits": position_bits, "offset": uv_offset.tolist(), "step": uv_step.tolist(),
+                       "data": _buffer(uv_steps)}
+        max_error["uv"] = _quantization_error(mesh.uvs, uv_steps, uv_offset, uv_step)
+    if mesh.tangents is not None:
+        # Direction as for normals; handedness (w) as one more int16 per vertex
+        encoded = octahedral_encode(mesh.tangents[:, :3], normal_bits)
+        handedness = np.where(mesh.tangents[:, 3] < 0, -1, 1).astype(np.int16)[:, None]
+        data["tangents"] = {"bits": normal_bits, "data": _buffer(np.hstack([encoded, handedness]))}
+    data.update(mesh.meta)
+    data["max_error"] = max_error
+    return data
+
+
+def decode_mesh(data: Dict[str, Any]) -> Mesh:
+    """Inverse of encode_mesh, within its max_error"""
+    count = data["vertex_count"]
+    positions = data["positions"]
+    vertices = dequantize(_unbuffer(positions["data"], np.uint16).reshape(count, 3),
+                          positions["offset"], positions["step"])
+    indices = decode_indices(base64.b64decode(data["indices"]["data"]))
+    attributes = {}
+    if "normals" in data:
+        encoded = _unbuffer(data["normals"]["data"], np.int16).reshape(count, 2)
+        attributes["normals"] = octahedral_decode(encoded, data["normals"]["bits"])
+    if "uvs" in data:
+        uvs = data["uvs"]
+        attributes["uvs"] = dequantize(_unbuffer(uvs["data"], np.uint16).reshape(count, 2), uvs["offset"], uvs["step"])
+    if "tangents" in data:
+        encoded = _unbuffer(data["tangents"]["data"], np.int16).reshape(count, 3)
+        direction = octahedral_decode(encoded[:, :2], data["tangents"]["bits"])
+        attributes["tangents"] = np.hstack([direction, encoded[:, 2:].astype(np.float32)])
+    reserved = {"type", "vertex_count", "positions", "indices", "normals", "uvs", "tangents", "max_error"}
+    meta = {key: value for key, value in data.items() if key not in reserved}
+    return Mesh(vertices, indices, data["type"], meta, **attributes)
+
+
+def encode_geometry(node: Any) -> Any:
+    """geometry_to_dict, with every mesh in its quantized form"""
+    if isinstance(node, Mesh):
+        return encode_mesh(node)
+    if isinstance(node, dict):
+        return {key: encode_geometry(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [encode_geometry(item) for item in node]
+    if isinstance(node, np.ndarray):
+        return node.tolist()
+    if isinstance(node, np.generic):
+        return node.item()
+    return node
+
+
+def encode_model(model: Model) -> Dict[str, Any]:
+    """Model.to_dict with quantized meshes (for clients that asked for it)"""
+    data = {"type": model.type, "encoding": ENCODING_NAME, "geometry": encode_geometry(model.geometry)}
+    if model.parameters is not None:
+        data["parameters"] = model.parameters
+    if model.metadata is not None:
+        data["metadata"] = model.metadata
+    return data
@@ -0,0 +1,211 @@
+import numpy as np
+from typing import Any, List, Tuple
+
+from models.mesh import Mesh, iter_meshes, map_meshes
+
+# Quadric weight for the constraint planes that pin open edges and seams
+BOUNDARY_WEIGHT = 1000.0
+# Parts at or below this size are never worth simplifying
+MIN_PART_TRIANGLES = 8
+
+
+def face_quadrics(vertices: np.ndarray, tris: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Area-weighted plane quadrics per triangle, plus the unit face normals"""
+    v0, v1, v2 = vertices[tris[:, 0]], vertices[tris[:, 1]], vertices[tris[:, 2]]
+    cross = np.cross(v1 - v0, v2 - v0)
+    area = np.linalg.norm(cross, axis=1)
+    normals = np.divide(cross, area[:, None], out=np.zeros_like(cross), where=area[:, None] > 1e-12)
+    d = -np.sum(normals * v0, axis=1)
+    planes = np.concatenate([normals, d[:, None]], axis=1)
+    quadrics = planes[:, :, None] * planes[:, None, :] * (0.5 * area)[:, None, None]
+    return quadrics, normals
+
+
+def boundary_quadrics(vertices: np.ndarray, tris: np.ndarray, normals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Constraint quadrics perpendicular to every edge used by exactly one triangle"""
+    edges = np.concatenate([tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]])
+    face_of_edge = np.tile(np.arange(len(tris)), 3)
+    keys = np.sort(edges, axis=1)
+    _, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    is_boundary = counts[inverse.ravel()] == 1
+    edges = edges[is_boundary]
+    if len(edges) == 0:
+        return np.zeros((0, 4, 4)), edges
+
+    direction = vertices[edges[:, 1]] - vertices[edges[:, 0]]
+    plane_normals = np.cross(direction, normals[face_of_edge[is_boundary]])
+    length = np.linalg.norm(plane_normals, axis=1, keepdims=True)
+    plane_normals = np.divide(plane_normals, length, out=np.zeros_like(plane_normals), where=length > 1e-12)
+    d = -np.sum(plane_normals * vertices[edges[:, 0]], axis=1)
+    planes = np.concatenate([plane_normals, d[:, None]], axis=1)
+    quadrics = planes[:, :, None] * planes[:, None, :] * BOUNDARY_WEIGHT
+    return quadrics, edges
+
+
+def decimate(vertices: np.ndarray, indices: np.ndarray, target_triangles: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Quadric-error edge-collapse simplification down to a triangle budget.
+
+    Collapses run in rounds: every vertex nominates its cheapest incident edge and
+    an edge collapses when both endpoints nominate it, which gives an independent
+    set that can be applied in one vectorized step.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3).copy()
+    tris = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    target_triangles = max(int(target_triangles), 1)
+    if len(tris) <= target_triangles:
+        return vertices, tris.ravel()
+
+    quadrics = np.zeros((len(vertices), 4, 4))
+    tri_quadrics, normals = face_quadrics(vertices, tris)
+    for corner in range(3):
+        np.add.at(quadrics, tris[:, corner], tri_quadrics)
+    edge_quadrics, boundary_edges = boundary_quadrics(vertices, tris, normals)
+    for end in range(2):
+        np.add.at(quadrics, boundary_edges[:, end], edge_quadrics)
+
+    while len(tris) > target_triangles:
+        edges = np.unique(np.sort(np.concatenate([tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]]), axis=1), axis=0)
+        if len(edges) == 0:
+            break
+        a, b = edges[:, 0], edges[:, 1]
+        q = quadrics[a] + quadrics[b]
+
+        # Pick the best of the two endpoints and the midpoint
+        candidates = np.stack([vertices[a], vertices[b], 0.5 * (vertices[a] + vertices[b])], axis=1)
+        homogeneous = np.concatenate([candidates, np.ones(candidates.shape[:2] + (1,))], axis=2)
+        errors = np.einsum("eci,eij,ecj->ec", homogeneous, q, homogeneous)
+        best = np.argmin(errors, axis=1)
+        cost = errors[np.arange(len(edges)), best]
+        targets = candidates[np.arange(len(edges)), best]
+
+        # Each vertex nominates its cheapest edge (ties broken by edge order)
+        order = np.lexsort((np.arange(len(edges)), cost))
+        rank = np.empty(len(edges), dtype=np.int64)
+        rank[order] = np.arange(len(edges))
+        best_rank = np.full(len(vertices), len(edges), dtype=np.int64)
+        np.minimum.at(best_rank, a, rank)
+        np.minimum.at(best_rank, b, rank)
+        selected = np.nonzero((best_rank[a] == rank) & (best_rank[b] == rank))[0]
+        if len(selected) == 0:
+            break
+
+        # An interior collapse removes two triangles; don't overshoot the budget
+        allowed = max((len(tris) - target_triangles + 1) // 2, 1)
+        selected = selected[np.argsort(rank[selected])][:allowed]
+
+        keep, drop = a[selected], b[selected]
+        remap = np.arange(len(vertices))
+        remap[drop] = keep
+        collapsed = remap[tris]
+        degenerate = ((collapsed[:, 0] == collapsed[:, 1]) | (collapsed[:, 1] == collapsed[:, 2])
+                      | (collapsed[:, 2] == collapsed[:, 0]))
+        if degenerate.all():
+            # A closed part would vanish; stop at its last non-empty shape
+            break
+        vertices[keep] = targets[selected]
+        quadrics[keep] += quadrics[drop]
+        tris = collapsed[~degenerate]
+
+    # Drop vertices that are no longer referenced
+    used, compact = np.unique(tris, return_inverse=True)
+    return vertices[used], compact.reshape(-1).astype(np.int64)
+
+
+def allocate_budget(triangle_counts: List[int], triangle_budget: int) -> List[int]:
+    """Per-part triangle targets that never add up to more than the budget; 0 drops a part.
+
+    The budget is shared in proportion to part size, over the largest parts
+    for which every share stays at least MIN_PART_TRIANGLES (smaller parts
+    stay whole). When that can't hold for every part the smallest parts are
+    dropped whole, so the band keeps its shape before stones go; the largest
+    part is always kept, with the whole budget if nothing else fits.
+    """
+    total = sum(triangle_counts)
+    targets = [0] * len(triangle_counts)
+    if total <= triangle_budget:
+        return list(triangle_counts)
+    if triangle_budget <= 0:
+        return targets
+    order = sorted(range(len(triangle_counts)), key=lambda part: -triangle_counts[part])
+    # Parts are added largest first; each one lowers the share of the smallest kept part
+    kept, whole, reducible, smallest = 1, 0, 0, 0
+    for count_kept, part in enumerate(order, start=1):
+        count = triangle_counts[part]
+        if count <= MIN_PART_TRIANGLES:
+            whole += count
+        else:
+            reducible += count
+            smallest = count
+        spare = triangle_budget - whole
+        if spare < 0 or smallest * spare < MIN_PART_TRIANGLES * reducible:
+            break
+        kept = count_kept
+    largest = order[0]
+    if kept == 1:
+        targets[largest] = min(triangle_counts[largest], triangle_budget)
+        return targets
+    whole = sum(triangle_counts[part] for part in order[:kept] if triangle_counts[part] <= MIN_PART_TRIANGLES)
+    reducible = sum(triangle_counts[part] for part in order[:kept] if triangle_counts[part] > MIN_PART_TRIANGLES)
+    scale = min((triangle_budget - whole) / reducible, 1.0) if reducible else 0.0
+    for part in order[:kept]:
+        count = triangle_counts[part]
+        targets[part] = count if count <= MIN_PART_TRIANGLES else max(int(count * scale), MIN_PART_TRIANGLES)
+    return targets
+
+
+def largest_triangles(mesh: Mesh, count: int) -> Mesh:
+    """The part cut down to its count largest triangles, for a budget too small to simplify to"""
+    vertices = np.asarray(mesh.vertices, dtype=np.float64).reshape(-1, 3)
+    tris = np.asarray(mesh.indices, dtype=np.int64).reshape(-1, 3)
+    area = np.linalg.norm(np.cross(vertices[tris[:, 1]] - vertices[tris[:, 0]],
+                                   vertices[tris[:, 2]] - vertices[tris[:, 0]]), axis=1)
+    tris = tris[np.sort(np.argsort(-area, kind="stable")[:count])]
+    used, compact = np.unique(tris, return_inverse=True)
+    meta = dict(mesh.meta, decimated_from=mesh.meta.get("decimated_from", mesh.triangle_count))
+    meta.pop("surface", None)
+    return Mesh(vertices[used], compact.reshape(-1).astype(np.int64), mesh.type, meta)
+
+
+def empty_part(mesh: Mesh) -> Mesh:
+    """A part dropped to meet the budget: same type and place in the tree, no triangles"""
+    return Mesh(np.zeros((0, 3)), np.zeros(0), mesh.type, dict(mesh.meta, decimated_from=mesh.triangle_count))
+
+
+def decimate_geometry(geometry: Any, triangle_budget: int) -> Any:
+    """Geometry tree simplified part by part so the whole fits the triangle budget.
+
+    The budget is a hard cap: a part that can't be simplified down to its
+    target (a closed stone stops collapsing short of one triangle) costs
+    the smallest remaining parts their place instead. A positive budget
+    never leaves the model empty; the largest part is cut down to its
+    largest triangles as a last resort.
+    """
+    meshes = list(iter_meshes(geometry))
+    targets = allocate_budget([mesh.triangle_count for mesh in meshes], triangle_budget)
+
+    def simplify(mesh: Mesh, target: int) -> Mesh:
+        if target >= mesh.triangle_count:
+            return mesh
+        if target <= 0:
+            return empty_part(mesh)
+        vertices, indices = decimate(mesh.vertices, mesh.indices, target)
+        meta = dict(mesh.meta, decimated_from=mesh.triangle_count)
+        # The parametric grid no longer describes the simplified surface
+        meta.pop("surface", None)
+        return Mesh(vertices, indices, mesh.type, meta)
+
+    simplified = [simplify(mesh, target) for mesh, target in zip(meshes, targets)]
+    total = sum(mesh.triangle_count for mesh in simplified)
+    largest = max(range(len(meshes)), key=lambda part: meshes[part].triangle_count, default=None)
+    for part in sorted(range(len(simplified)), key=lambda part: simplified[part].triangle_count):
+        if total <= triangle_budget:
+            break
+        total -= simplified[part].triangle_count
+        if part == largest and triangle_budget > total:
+            # The largest part is the last to go: cut it down to what is left rather than empty the model
+            simplified[part] = largest_triangles(simplified[part], triangle_budget - total)
+            total += simplified[part].triangle_count
+        else:
+            simplified[part] = empty_part(meshes[part])
+    parts = iter(simplified)
+    return map_meshes(geometry, lambda mesh: next(parts))
@@ -0,0 +1,214 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.mesh import Mesh, map_meshes
+from models.mesh_attributes import FLAT_SHADED_TYPES
+
+# Post-transform vertex cache the triangle order is tuned for (Tipsify's k)
+VERTEX_CACHE_SIZE = 16
+# Positions closer than this (mm) are the same vertex when welding
+WELD_TOLERANCE = 1e-5
+ATTRIBUTE_ARRAYS = ("normals", "uvs", "tangents")
+
+
+def weld_vertices(mesh: Mesh, tolerance: float = WELD_TOLERANCE) -> Mesh:
+    """Merge duplicated vertices (grid seams, instance joints) and drop degenerate triangles.
+
+    Vertices only merge when every attribute they carry matches too, so UV
+    seams stay split. Flat-shaded parts are left alone: their duplicates are
+    what keeps the facets hard, and welding them would give every placed
+    stone a slightly different topology.
+    """
+    flat = mesh.meta.get("shading") == "flat" or mesh.type in FLAT_SHADED_TYPES
+    if mesh.vertex_count == 0 or flat:
+        return mesh
+    columns = [np.rint(mesh.vertices.astype(np.float64) / tolerance)]
+    for name in ATTRIBUTE_ARRAYS:
+        array = getattr(mesh, name)
+        if array is not None:
+            columns.append(np.rint(array.astype(np.float64) / tolerance))
+    keys = np.concatenate(columns, axis=1).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    if len(first) == mesh.vertex_count:
+        return mesh
+    tris = inverse.reshape(-1)[mesh.indices].reshape(-1, 3)
+    degenerate = (tris[:, 0] == tris[:, 1]) | (tris[:, 1] == tris[:, 2]) | (tris[:, 2] == tris[:, 0])
+    changes = {name: getattr(mesh, name)[first] for name in ATTRIBUTE_ARRAYS if getattr(mesh, name) is not None}
+    return mesh.replace(vertices=mesh.vertices[first], indices=tris[~degenerate].ravel(), **changes)
+
+
+def tipsify(indices: np.ndarray, vertex_count: int,
+            cache_size: int = VERTEX_CACHE_SIZE) -> Tuple[np.ndarray, List[int]]:
+    """Triangle order for a FIFO vertex cache (Sander, Nehab and Barczak, 2007).
+
+    Fans around one vertex at a time and moves on to the candidate still in
+    the cache with the most triangles left. Returns the triangle order and
+    the positions where it had to jump (no cached candidate); those split it
+    into clusters that can be reordered against overdraw.
+    """
+    tris = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    triangle_count = len(tris)
+    # Vertex -> triangle adjacency as CSR arrays
+    adjacency = (np.argsort(tris.ravel(), kind="stable") // 3).tolist()
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(tris.ravel(), minlength=vertex_count))]).tolist()
+    live = np.bincount(tris.ravel(), minlength=vertex_count).tolist()
+    corners = tris.tolist()
+    cache_time = [0] * vertex_count
+    emitted = [False] * triangle_count
+    dead_end: List[int] = []
+    order: List[int] = []
+    jumps: List[int] = []
+    timestamp = cache_size + 1
+    cursor = 0
+    fan = 0 if vertex_count and triangle_count else -1
+    while fan >= 0:
+        candidates: List[int] = []
+        for triangle in adjacency[offsets[fan]:offsets[fan + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            order.append(triangle)
+            for vertex in corners[triangle]:
+                dead_end.append(vertex)
+                candidates.append(vertex)
+                live[vertex] -= 1
+                if timestamp - cache_time[vertex] > cache_size:
+                    cache_time[vertex] = timestamp
+                    timestamp += 1
+        # Next fan: the cached candidate with most triangles left that stays cached meanwhile
+        fan, best = -1, -1
+        for vertex in candidates:
+            if live[vertex] <= 0:
+                continue
+            age = timestamp - cache_time[vertex]
+            priority = age if age + 2 * live[vertex] <= cache_size else 0
+            if priority > best:
+                fan, best = vertex, priority
+        if fan >= 0:
+            continue
+        if len(order) < triangle_count:
+            jumps.append(len(order))
+        while dead_end:
+            vertex = dead_end.pop()
+            if live[vertex] > 0:
+                fan = vertex
+                break
+        while fan < 0 and cursor < vertex_count:
+            if live[cursor] > 0:
+                fan = cursor
+            cursor += 1
+    return np.asarray(order, dtype=np.int64), jumps
+
+
+def sort_clusters(tris: np.ndarray, vertices: np.ndarray, starts: List[int]) -> np.ndarray:
+    """Cluster order against overdraw: outward-facing clusters first (Tipsify's fast pass)"""
+    if len(starts) < 2:
+        return np.arange(len(tris))
+    v0, v1, v2 = vertices[tris[:, 0]], vertices[tris[:, 1]], vertices[tris[:, 2]]
+    cross = np.cross(v1 - v0, v2 - v0)
+    area = np.linalg.norm(cross, axis=1)
+    centroids = (v0 + v1 + v2) / 3.0
+    mesh_centroid = (centroids * area[:, None]).sum(axis=0) / max(area.sum(), 1e-12)
+    cluster_normal = np.add.reduceat(cross, starts, axis=0)
+    cluster_centroid = np.add.reduceat(centroids * area[:, None], starts, axis=0)
+    cluster_area = np.maximum(np.add.reduceat(area, starts), 1e-12)
+    cluster_centroid /= cluster_area[:, None]
+    lengths = np.maximum(np.linalg.norm(cluster_normal, axis=1), 1e-12)
+    facing = np.einsum("ij,ij->i", cluster_centroid - mesh_centroid, cluster_normal) / lengths
+    ends = starts[1:] + [len(tris)]
+    ranges = [np.arange(start, end) for start, end in zip(starts, ends)]
+    return np.concatenate([ranges[cluster] for cluster in np.argsort(-facing, kind="stable")])
+
+
+def fetch_order(indices: np.ndarray) -> np.ndarray:
+    """Vertices in the order the index buffer first uses them (unused ones dropped)"""
+    used, first = np.unique(indices, return_index=True)
+    return used[np.argsort(first)]
+
+
+def acmr(indices: np.ndarray, cache_size: int = VERTEX_CACHE_SIZE) -> float:
+    """Average cache miss ratio: vertex shader runs per triangle under a FIFO cache"""
+    cache: List[int] = []
+    misses = 0
+    for vertex in np.asarray(indices).tolist():
+        if vertex not in cache:
+            misses += 1
+            cache.append(vertex)
+            if len(cache) > cache_size:
+                cache.pop(0)
+    return misses / max(len(indices) // 3, 1)
+
+
+class TopologyOrderCache:
+    """Triangle and vertex orders per index buffer.
+
+    The orders depend only on topology, which for the parametric builders
+    depends only on segment counts, so a slider moving vertices around (or
+    another request for the same shape) reuses them and the pass is reduced
+    to two gathers. The overdraw cluster order is taken from the geometry
+    that first filled the entry; variants of one topology keep its shape.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(indices: np.ndarray, vertex_count: int) -> str:
+        digest = hashlib.blake2b(np.ascontiguousarray(indices, dtype=np.uint32).tobytes(), digest_size=16)
+        digest.update(vertex_count.to_bytes(8, "little"))
+        return digest.hexdigest()
+
+    def orders(self, indices: np.ndarray, vertices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(vertex order, reordered index buffer) for this topology"""
+        key = self.key(indices, len(vertices))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        tris = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+        triangle_order, jumps = tipsify(tris, len(vertices))
+        tris = tris[triangle_order]
+        tris = tris[sort_clusters(tris, vertices.astype(np.float64), [0] + jumps)]
+        vertex_order = fetch_order(tris.ravel())
+        remap = np.empty(len(vertices), dtype=np.int64)
+        remap[vertex_order] = np.arange(len(vertex_order))
+        reordered = remap[tris.ravel()].astype(np.uint32)
+        # Shared by every mesh of this topology, so never written to
+        reordered.flags.writeable = False
+        with self._lock:
+            self._entries[key] = (vertex_order, reordered)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vertex_order, reordered
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def optimize_mesh(mesh: Mesh, cache: Optional[TopologyOrderCache] = None) -> Mesh:
+    """Welded, cache-ordered and fetch-ordered copy of a part"""
+    mesh = weld_vertices(mesh)
+    if mesh.triangle_count < 2:
+        return mesh
+    vertex_order, indices = (cache or TopologyOrderCache(max_entries=1)).orders(mesh.indices, mesh.vertices)
+    changes = {name: getattr(mesh, name)[vertex_order] for name in ATTRIBUTE_ARRAYS if getattr(mesh, name) is not None}
+    meta = dict(mesh.meta)
+    # The (u, v) grid layout no longer matches the vertex order
+    meta.pop("surface", None)
+    return Mesh(mesh.vertices[vertex_order], indices, mesh.type, meta, **changes)
+
+
+def optimize_geometry(geometry: Any, cache: Optional[TopologyOrderCache] = None) -> Any:
+    """Optimization stage: every part welded and reordered for the GPU vertex cache"""
+    return map_meshes(geometry, lambda mesh: optimize_mesh(mesh, cache))
@@ -0,0 +1,197 @@
+from abc import abstractmethod
+from typing import Dict, Any, ClassVar, Literal, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from models.stone_layout import max_placed_stones, ring_size_to_diameter
+
+# Default cap on the vertices one request may generate. The field bounds allow
+# about 66k (a carved ring densely set with 500 stones); typical designs stay
+# under 2k, so only the densest rings are rejected
+DEFAULT_VERTEX_BUDGET = 50_000
+
+# Upper bounds per gem (the largest cut, cushion, has 121 vertices and 238 triangles)
+STONE_VERTICES = 128
+STONE_TRIANGLES = 240
+# Vertices per gem once shaded per facet (each facet's corners get their own normal)
+STONE_SHADED_VERTICES = 480
+# Vertices and triangles per placed chain link asset
+LINK_VERTICES = 4
+LINK_TRIANGLES = 2
+
+
+class ParameterError(ValueError):
+    """Parameters that fail validation or would exceed the geometry budget"""
+
+
+class TemplateParameters(BaseModel):
+    """Validated, defaulted and frozen template parameters.
+
+    Instances are hashable, so the normalized form doubles as the cache key.
+    Unknown keys are ignored, which lets the AI path pass a whole processed
+    prompt.
+    """
+    model_config = ConfigDict(frozen=True, extra="ignore", str_strip_whitespace=True)
+    # Fields that fix the overall shape; once these are known a streamed
+    # extraction can start a speculative preview build
+    preview_fields: ClassVar[Tuple[str, ...]] = ()
+
+    # Upper bounds on the template's output before decimation, with attributes
+    # when asked for (pydantic's metaclass is an ABCMeta, so a schema missing
+    # one cannot be instantiated)
+    @abstractmethod
+    def estimated_vertices(self, attributes: bool = False) -> int:
+        ...
+
+    @abstractmethod
+    def estimated_triangles(self) -> int:
+        ...
+
+    def estimated_parts(self) -> int:
+        """Upper bound on the separate meshes the template emits"""
+        return 1
+
+
+class RingParameters(TemplateParameters):
+    preview_fields: ClassVar[Tuple[str, ...]] = ("ring_size", "band_width", "band_thickness")
+
+    ring_size: float = Field(18.0, ge=0.0, le=40.0, description="US ring size")
+    band_width: float = Field(3.0, ge=0.5, le=20.0, description="mm")
+    band_thickness: float = Field(1.5, ge=0.3, le=10.0, description="mm")
+    stone_count: int = Field(1, ge=0, le=500, description="stones")
+    stone_size: float = Field(2.0, ge=0.1, le=20.0, description="mm (girdle radius)")
+    stone_type: str = Field("diamond", max_length=32)
+    stone_cut: Optional[Literal["round_brilliant", "princess", "oval", "pear", "cushion", "emerald"]] = None
+    stone_setting: Optional[Literal["solitaire", "channel", "pave", "halo", "eternity"]] = None
+    stone_arc: Optional[float] = Field(None, ge=0.0, le=360.0, description="degrees")
+    band_style: Literal["plain", "carved", "braided"] = "plain"
+
+    def estimated_vertices(self, attributes: bool = False) -> int:
+        band = {"plain": 33 * 17, "carved": 65 * 33, "braided": 3 * 33 * 17}[self.band_style]
+        return band + self.placed_stones() * (STONE_SHADED_VERTICES if attributes else STONE_VERTICES)
+    
+    def estimated_triangles(self) -> int:
+        band = {"plain": 32 * 16 * 2, "carved": 64 * 32 * 2, "braided": 3 * 32 * 16 * 2}[self.band_style]
+        return band + self.placed_stones() * STONE_TRIANGLES
+
+    def estimated_parts(self) -> int:
+        # The band and one mesh per stone
+        return 1 + self.placed_stones()
+
+    def placed_stones(self) -> int:
+        """Upper bound on the stones that fit; a full band places fewer than requested"""
+        return max_placed_stones(self.stone_setting, self.stone_count, self.stone_size,
+                                 ring_size_to_diameter(self.ring_size) / 2, self.band_thickness,
+                                 self.band_width, self.stone_arc)
+
+
+class NecklaceParameters(TemplateParameters):
+    preview_fields: ClassVar[Tuple[str, ...]] = ("chain_length", "chain_style", "link_size")
+
+    chain_length: float = Field(450.0, ge=50.0, le=2000.0, description="mm")
+    chain_style: Literal["cable", "figaro", "rope"] = "cable"
+    link_size: float = Field(3.0, ge=0.5, le=20.0, description="mm")
+    pendant_size: float = Field(15.0, ge=1.0, le=100.0, description="mm")
+    pendant_style: Literal["geometric", "organic", "minimal"] = "geometric"
+
+    def link_count(self) -> int:
+        return int(self.chain_length / (self.link_size * (3 if self.chain_style == "figaro" else 2)))
+    
+    def estimated_vertices(self, attributes: bool = False) -> int:
+        return self.link_count() * LINK_VERTICES + 17
+    
+    def estimated_triangles(self) -> int:
+        return self.link_count() * LINK_TRIANGLES + 16
+
+    def estimated_parts(self) -> int:
+        # Chain and pendant
+        return 2
+
+
+class EarringsParameters(TemplateParameters):
+    preview_fields: ClassVar[Tuple[str, ...]] = ("earring_type", "size")
+
+    earring_type: Literal["stud", "hoop", "drop"] = "stud"
+    size: float = Field(8.0, ge=1.0, le=50.0, description="mm")
+    stone_size: float = Field(2.0, ge=0.1, le=20.0, description="mm")
+
+    def estimated_vertices(self, attributes: bool = False) -> int:
+        return {"stud": 24 + (24 if attributes else 8), "hoop": 17 * 9, "drop": 16}[self.earring_type]
+    
+    def estimated_triangles(self) -> int:
+        return {"stud": 24 + 8, "hoop": 16 * 8 * 2, "drop": 14}[self.earring_type]
+
+    def estimated_parts(self) -> int:
+        # A stud is a post and a stone
+        return 2 if self.earring_type == "stud" else 1
+
+
+class BraceletParameters(TemplateParameters):
+    preview_fields: ClassVar[Tuple[str, ...]] = ("wrist_size", "bracelet_style", "width")
+
+    wrist_size: float = Field(170.0, ge=100.0, le=300.0, description="mm (circumference)")
+    bracelet_style: Literal["chain", "bangle", "cuff"] = "chain"
+    width: float = Field(5.0, ge=0.5, le=50.0, description="mm")
+
+    def estimated_vertices(self, attributes: bool = False) -> int:
+        if self.bracelet_style == "chain":
+            # Links are width / 2 long and laid out every width
+            return int(self.wrist_size / self.width) * LINK_VERTICES
+        return {"bangle": 25 * 9, "cuff": 19 * 9}[self.bracelet_style]
+    
+    def estimated_triangles(self) -> int:
+        if self.bracelet_style == "chain":
+            return int(self.wrist_size / self.width) * LINK_TRIANGLES
+        return {"bangle": 24 * 8 * 2, "cuff": 18 * 8 * 2}[self.bracelet_style]
+
+
+PARAMETER_SCHEMAS: Dict[str, Type[TemplateParameters]] = {
+    "ring": RingParameters,
+    "necklace": NecklaceParameters,
+    "earrings": EarringsParameters,
+    "bracelet": BraceletParameters,
+}
+
+
+def normalize_parameters(jewelry_type: str, raw: Union[Dict[str, Any], TemplateParameters], strict: bool = True,
+                         vertex_budget: Optional[int] = None) -> TemplateParameters:
+    """Validate raw parameters into the template's canonical frozen form.
+
+    With strict=False (used for AI-extracted values) invalid fields fall back
+    to their defaults instead of failing the request. A vertex budget, when
+    given, is checked either way, before any geometry is built; the engine
+    passes its own (DEFAULT_VERTEX_BUDGET unless configured otherwise).
+    """
+    schema = PARAMETER_SCHEMAS.get(jewelry_type)
+    if schema is None:
+        raise ParameterError(f"Unsupported jewelry type: {jewelry_type}")
+    if isinstance(raw, schema):
+        parameters = raw
+    else:
+        values = {key: value for key, value in dict(raw).items() if value is not None}
+        while True:
+            try:
+                parameters = schema.model_validate(values)
+                break
+            except ValidationError as e:
+                if strict:
+                    raise ParameterError(_describe(e)) from None
+                invalid = {error["loc"][0] for error in e.errors() if error["loc"]}
+                if not invalid & values.keys():
+                    raise ParameterError(_describe(e)) from None
+                print(f"[parameter_schema.py] Ignoring invalid parameters: {sorted(invalid)}")
+                values = {key: value for key, value in values.items() if key not in invalid}
+
+    if vertex_budget is not None:
+        estimate = parameters.estimated_vertices()
+        if estimate > vertex_budget:
+            raise ParameterError(
+                f"{jewelry_type} would generate about {estimate} vertices (budget {vertex_budget})"
+            )
+    return parameters
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
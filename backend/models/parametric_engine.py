@@ -1,47 +1,126 @@
 import numpy as np
 import json
-from typing import Dict, Any, List
+from concurrent.futures import Executor
+from functools import partial
+from typing import Dict, Any, List, Optional, Union
 import asyncio
 
+from models.mesh import Mesh, Model
+from models.mesh_attributes import add_attributes
+from models.mesh_decimation import decimate_geometry
+from models.mesh_optimization import TopologyOrderCache, optimize_geometry
+from models.topology import repeated_grid_indices, grid_indices, torus_vertices
+from models.geometry_assets import GeometryAssetLibrary, default_library
+from models.gem_cuts import place_cut, resolve_cut
+from models.stone_layout import ring_size_to_diameter, solve_stone_layout
+from models.parameter_schema import DEFAULT_VERTEX_BUDGET, ParameterError, TemplateParameters, normalize_parameters
+from utils.model_cache import ModelCache
+
+# Cache slot for the template's raw output, which every variant is derived from
+TEMPLATE_VARIANT = "template"
+
 class ParametricEngine:
-    def __init__(self):
-        print("[parametric_engine.py] ParametricEngine initialized.")
+    def __init__(self, cache_size: int = 128, assets: Optional[GeometryAssetLibrary] = None,
+                 vertex_budget: Optional[int] = DEFAULT_VERTEX_BUDGET, executor: Optional[Executor] = None,
+                 quiet: bool = False):
+        # Skip the per-request logging (benchmarks time thousands of builds)
+        self.quiet = quiet
+        self._log("ParametricEngine initialized.")
+        # Canonical stone, post, prong and link meshes shared via memory map
+        self.assets = assets or default_library()
         self.jewelry_templates = {
             "ring": self._ring_template,
             "necklace": self._necklace_template,
             "earrings": self._earrings_template,
             "bracelet": self._bracelet_template
         }
-        
-    async def create_model(self, jewelry_type: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
-        print(f"[parametric_engine.py] create_model called with: {jewelry_type}, {parameters}")
-        """Create parametric jewelry model with specific parameters"""
+        # Full meshes and their decimated/attributed variants, per design
+        self.model_cache = ModelCache(max_entries=cache_size)
+        # Vertex-cache orders per topology, shared by every design with the same segment counts
+        self.topology_cache = TopologyOrderCache()
+        # Requests predicted to generate more vertices than this are rejected up front
+        # with a ParameterError (None: only the parameter bounds limit a template's size)
+        self.vertex_budget = vertex_budget
+        # Where geometry is built, off the event loop (None: the loop's default executor)
+        self.executor = executor
+        
+    async def create_model(self, jewelry_type: str, parameters: Union[Dict[str, Any], TemplateParameters],
+                           attributes: bool = False,
+                           triangle_budget: Optional[int] = None) -> Model:
+        """Create parametric jewelry model with specific parameters.
+
+        Cache hits are answered on the event loop; anything to build runs
+        on the engine's executor, so the loop keeps serving other requests.
+        """
+        if jewelry_type in self.jewelry_templates:
+            normalized = normalize_parameters(jewelry_type, parameters, vertex_budget=self.vertex_budget)
+            if self.is_cached(jewelry_type, normalized, attributes, triangle_budget):
+                return self.build_model(jewelry_type, normalized, attributes, triangle_budget)
+            parameters = normalized
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(self.build_model, jewelry_type, parameters, attributes, triangle_budget)
+        )
+
+    def build_model(self, jewelry_type: str, parameters: Union[Dict[str, Any], TemplateParameters],
+                    attributes: bool = False, triangle_budget: Optional[int] = None) -> Model:
+        """create_model's pipeline, run in the calling thread"""
+        self._log(f"create_model called with: {jewelry_type}, {parameters}")
         if jewelry_type not in self.jewelry_templates:
-            print(f"[parametric_engine.py] Unsupported jewelry type: {jewelry_type}")
-            raise ValueError(f"Unsupported jewelry type: {jewelry_type}")
+            self._log(f"Unsupported jewelry type: {jewelry_type}")
+            raise ParameterError(f"Unsupported jewelry type: {jewelry_type}")
         # Get the template function
         template_func = self.jewelry_templates[jewelry_type]
-        print(f"[parametric_engine.py] Using template function: {template_func.__name__}")
-        # Create the model using the template
-        model_data = await template_func(parameters)
-        print(f"[parametric_engine.py] Model data generated: {model_data}")
-        return {
-            "type": jewelry_type,
-            "geometry": model_data,
-            "parameters": parameters
-        }
+        self._log(f"Using template function: {template_func.__name__}")
+        # Typed, bounded and defaulted before any geometry is built
+        normalized = normalize_parameters(jewelry_type, parameters, vertex_budget=self.vertex_budget)
+        parameters = normalized.model_dump()
+        
+        cache_key = ModelCache.make_key(jewelry_type, normalized)
+        variant = (triangle_budget, attributes)
+        geometry = self.model_cache.get(cache_key, variant)
+        if geometry is None:
+            geometry = self.model_cache.get(cache_key, TEMPLATE_VARIANT)
+            if geometry is None:
+                # Create the model using the template
+                geometry = template_func(parameters)
+                self.model_cache.put(cache_key, TEMPLATE_VARIANT, geometry)
+            # Stages return new trees, so the cached template output is never modified
+            if triangle_budget:
+                geometry = decimate_geometry(geometry, triangle_budget)
+            if attributes:
+                # Normals, UVs and tangents are computed here instead of on the client
+                geometry = add_attributes(geometry)
+            # Last, since welding and reordering lose the parametric grid the stages above use
+            geometry = optimize_geometry(geometry, self.topology_cache)
+            self.model_cache.put(cache_key, variant, geometry)
+        model = Model(jewelry_type, geometry, parameters=parameters)
+        self._log(f"Model data generated: {model}")
+        return model
+    
+    def _log(self, message: str) -> None:
+        if not self.quiet:
+            print(f"[parametric_engine.py] {message}")
+
+    def is_cached(self, jewelry_type: str, parameters: TemplateParameters,
+                  attributes: bool = False, triangle_budget: Optional[int] = None) -> bool:
+        """Whether create_model would be served from the cache (no geometry work)"""
+        cache_key = ModelCache.make_key(jewelry_type, parameters)
+        return self.model_cache.contains(cache_key, (triangle_budget, attributes))
     
-    async def _ring_template(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _ring_template(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Parametric ring template"""
         
         # Extract parameters with defaults
-        ring_size = params.get("ring_size", 18.0)
-        band_width = params.get("band_width", 3.0)
-        band_thickness = params.get("band_thickness", 1.5)
-        stone_count = params.get("stone_count", 1)
-        stone_size = params.get("stone_size", 2.0)
-        stone_type = params.get("stone_type", "diamond")
-        band_style = params.get("band_style", "plain")
+        ring_size = params["ring_size"]
+        band_width = params["band_width"]
+        band_thickness = params["band_thickness"]
+        stone_count = params["stone_count"]
+        stone_size = params["stone_size"]
+        stone_type = params["stone_type"]
+        stone_cut = params["stone_cut"]
+        stone_setting = params["stone_setting"]
+        stone_arc = params["stone_arc"]
+        band_style = params["band_style"]
         
         # Convert ring size to diameter
         diameter = self._ring_size_to_diameter(ring_size)
@@ -55,39 +134,54 @@ class ParametricEngine:
             style=band_style
         )
         
+        # Lay stones out on the outer surface of the band
+        layout = solve_stone_layout(
+            setting=stone_setting,
+            stone_count=stone_count,
+            stone_size=stone_size,
+            ring_radius=radius,
+            band_radius=band_thickness,
+            band_width=band_width,
+            arc_degrees=stone_arc
+        )
+        
         # Create stones
         stones = []
-        if stone_count > 0:
-            stone_positions = self._calculate_stone_positions(stone_count, radius)
-            for i, pos in enumerate(stone_positions):
-                stone = self._create_parametric_stone(
-                    size=stone_size,
-                    position=pos,
-                    stone_type=stone_type
-                )
-                stones.append(stone)
+        if layout["placed"] > 0:
+            stones = self._create_parametric_stones(
+                transforms=layout["transforms"],
+                stone_type=stone_type,
+                stone_cut=stone_cut
+            )
         
         return {
             "band": band,
             "stones": stones,
+            "stone_layout": {
+                "setting": layout["setting"],
+                "requested": layout["requested"],
+                "placed": layout["placed"],
+                "transforms": layout["transforms"].astype(np.float32).reshape(-1)
+            },
             "parameters": {
                 "ring_size": ring_size,
                 "diameter": diameter,
                 "band_width": band_width,
                 "band_thickness": band_thickness,
                 "stone_count": stone_count,
-                "stone_size": stone_size
+                "stone_size": stone_size,
+                "stone_cut": resolve_cut(stone_type, stone_cut)
             }
         }
     
-    async def _necklace_template(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _necklace_template(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Parametric necklace template"""
         
-        chain_length = params.get("chain_length", 450)
-        chain_style = params.get("chain_style", "cable")
-        link_size = params.get("link_size", 3.0)
-        pendant_size = params.get("pendant_size", 15.0)
-        pendant_style = params.get("pendant_style", "geometric")
+        chain_length = params["chain_length"]
+        chain_style = params["chain_style"]
+        link_size = params["link_size"]
+        pendant_size = params["pendant_size"]
+        pendant_style = params["pendant_style"]
         
         # Create chain
         chain = self._create_parametric_chain(
@@ -114,12 +208,12 @@ class ParametricEngine:
             }
         }
     
-    async def _earrings_template(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _earrings_template(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Parametric earrings template"""
         
-        earring_type = params.get("earring_type", "stud")
-        size = params.get("size", 8.0)
-        stone_size = params.get("stone_size", 2.0)
+        earring_type = params["earring_type"]
+        size = params["size"]
+        stone_size = params["stone_size"]
         
         if earring_type == "stud":
             geometry = self._create_parametric_stud(size, stone_size)
@@ -139,12 +233,12 @@ class ParametricEngine:
             }
         }
     
-    async def _bracelet_template(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _bracelet_template(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Parametric bracelet template"""
         
-        wrist_size = params.get("wrist_size", 170)
-        bracelet_style = params.get("bracelet_style", "chain")
-        width = params.get("width", 5.0)
+        wrist_size = params["wrist_size"]
+        bracelet_style = params["bracelet_style"]
+        width = params["width"]
         
         if bracelet_style == "chain":
             geometry = self._create_parametric_chain_bracelet(wrist_size, width)
@@ -165,7 +259,7 @@ class ParametricEngine:
         }
     
     def _create_parametric_band(self, radius: float, width: float, 
-                               thickness: float, style: str) -> Dict[str, Any]:
+                               thickness: float, style: str) -> Mesh:
         """Create parametric ring band"""
         
         if style == "plain":
@@ -177,184 +271,56 @@ class ParametricEngine:
         else:
             return self._create_torus(radius, thickness, 32, 16)
     
-    def _create_carved_band(self, radius: float, width: float, thickness: float) -> Dict[str, Any]:
+    def _create_carved_band(self, radius: float, width: float, thickness: float) -> Mesh:
         """Create carved band with decorative pattern"""
         # Create base torus
         base_torus = self._create_torus(radius, thickness, 64, 32)
         
-        # Add carved pattern (simplified as geometric cuts)
-        carved_vertices = base_torus["vertices"].copy()
-        carved_indices = base_torus["indices"].copy()
+        # Add carved pattern (simplified as geometric cuts): every 3rd vertex
+        # is pulled in slightly along x
+        carved_vertices = base_torus.vertices.copy()
+        carved_vertices[::3, 0] *= 0.95
         
-        # Add decorative cuts
-        for i in range(0, len(carved_vertices), 3):
-            if i % 9 == 0:  # Every 3rd vertex
-                carved_vertices[i] *= 0.95  # Slight inward cut
+        # Cuts break the analytic torus normals, but the (u, v) grid is unchanged
+        surface = dict(base_torus.meta["surface"], kind="grid")
         
-        return {
-            "vertices": carved_vertices,
-            "indices": carved_indices,
-            "type": "carved_band"
-        }
+        return Mesh(carved_vertices, base_torus.indices, "carved_band", {"surface": surface})
     
-    def _create_braided_band(self, radius: float, width: float, thickness: float) -> Dict[str, Any]:
+    def _create_braided_band(self, radius: float, width: float, thickness: float) -> Mesh:
         """Create braided band pattern"""
         # Create multiple interwoven bands
-        bands = []
         strands = 3
+        vertices = []
         
         for i in range(strands):
             angle_offset = i * 2 * np.pi / strands
-            band = self._create_torus(
-                radius + i * 0.2,
-                thickness / strands,
-                32,
-                16
-            )
-            # Rotate band
-            rotated_vertices = []
-            for j in range(0, len(band["vertices"]), 3):
-                x, y, z = band["vertices"][j:j+3]
-                # Apply rotation
-                new_x = x * np.cos(angle_offset) - y * np.sin(angle_offset)
-                new_y = x * np.sin(angle_offset) + y * np.cos(angle_offset)
-                rotated_vertices.extend([new_x, new_y, z])
-            band["vertices"] = rotated_vertices
-            bands.append(band)
-        
-        # Combine all bands
-        combined_vertices = []
-        combined_indices = []
-        index_offset = 0
-        
-        for band in bands:
-            combined_vertices.extend(band["vertices"])
-            for index in band["indices"]:
-                combined_indices.append(index + index_offset)
-            index_offset += len(band["vertices"]) // 3
-        
-        return {
-            "vertices": combined_vertices,
-            "indices": combined_indices,
-            "type": "braided_band"
-        }
-    
-    def _create_parametric_stone(self, size: float, position: List[float], 
-                                stone_type: str) -> Dict[str, Any]:
-        """Create parametric stone with different cuts"""
-        
-        if stone_type == "diamond":
-            return self._create_diamond_cut(size, position)
-        elif stone_type == "ruby":
-            return self._create_ruby_cut(size, position)
-        elif stone_type == "emerald":
-            return self._create_emerald_cut(size, position)
-        else:
-            return self._create_diamond_cut(size, position)
-    
-    def _create_diamond_cut(self, size: float, position: List[float]) -> Dict[str, Any]:
-        """Create diamond-cut stone (octahedron)"""
-        vertices = [
-            [0, size, 0], [0, -size, 0], [size, 0, 0], [-size, 0, 0],
-            [0, 0, size], [0, 0, -size]
-        ]
+            band = torus_vertices(radius + i * 0.2, thickness / strands, 32, 16)
+            # Rotate band around the ring axis
+            cos_a, sin_a = np.cos(angle_offset), np.sin(angle_offset)
+            rotation = np.array([[cos_a, -sin_a, 0], [sin_a, cos_a, 0], [0, 0, 1]])
+            vertices.append(band @ rotation.T)
+        
+        # The strands' index buffers, one after another, are cached like a single grid's
+        return Mesh(np.concatenate(vertices), repeated_grid_indices(32, 16, strands), "braided_band")
+    
+    def _create_parametric_stones(self, transforms: np.ndarray, stone_type: str,
+                                  stone_cut: Optional[str] = None) -> List[Mesh]:
+        """Create stones of one cut, transforming its facet table for all of them at once"""
+        cut = resolve_cut(stone_type, stone_cut)
+        asset = self.assets.get(f"gem/{cut}")
+        # Instance transforms already carry each stone's scale
+        vertices, indices = place_cut(asset["vertices"], asset["indices"],
+                                      transforms[:, :3, 3], 1.0, transforms[:, :3, :3])
+        # Every stone shares the cut's (memory-mapped) index buffer
+        shared_indices = asset["indices"]
         
-        indices = [
-            0, 2, 4, 0, 4, 3, 0, 3, 5, 0, 5, 2,
-            1, 2, 4, 1, 4, 3, 1, 3, 5, 1, 5, 2
-        ]
-        
-        # Apply position
-        positioned_vertices = []
-        for vertex in vertices:
-            positioned_vertices.extend([
-                vertex[0] + position[0],
-                vertex[1] + position[1],
-                vertex[2] + position[2]
-            ])
-        
-        return {
-            "vertices": positioned_vertices,
-            "indices": indices,
-            "type": "diamond_cut"
-        }
-    
-    def _create_ruby_cut(self, size: float, position: List[float]) -> Dict[str, Any]:
-        """Create ruby-cut stone (hexagonal prism)"""
-        # Create hexagonal prism
-        vertices = []
-        indices = []
-        
-        # Top and bottom hexagons
-        for i in range(6):
-            angle = i * np.pi / 3
-            x = size * np.cos(angle)
-            y = size * np.sin(angle)
-            
-            # Top hexagon
-            vertices.extend([x + position[0], y + position[1], size/2 + position[2]])
-            # Bottom hexagon
-            vertices.extend([x + position[0], y + position[1], -size/2 + position[2]])
-        
-        # Create side faces
-        for i in range(6):
-            base = i * 2
-            next_base = ((i + 1) % 6) * 2
-            
-            # Side rectangle
-            indices.extend([base, base + 1, next_base, next_base, base + 1, next_base + 1])
-        
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "ruby_cut"
-        }
-    
-    def _create_emerald_cut(self, size: float, position: List[float]) -> Dict[str, Any]:
-        """Create emerald-cut stone (rectangular prism with beveled edges)"""
-        # Simplified emerald cut as rectangular prism
-        half_size = size / 2
-        vertices = [
-            # Top face
-            [-half_size, -half_size, half_size],
-            [half_size, -half_size, half_size],
-            [half_size, half_size, half_size],
-            [-half_size, half_size, half_size],
-            # Bottom face
-            [-half_size, -half_size, -half_size],
-            [half_size, -half_size, -half_size],
-            [half_size, half_size, -half_size],
-            [-half_size, half_size, -half_size]
-        ]
-        
-        indices = [
-            # Top face
-            0, 1, 2, 0, 2, 3,
-            # Bottom face
-            4, 6, 5, 4, 7, 6,
-            # Side faces
-            0, 4, 1, 1, 4, 5,
-            1, 5, 2, 2, 5, 6,
-            2, 6, 3, 3, 6, 7,
-            3, 7, 0, 0, 7, 4
+        return [
+            Mesh(stone_vertices, shared_indices, f"{cut}_cut",
+                 {"stone_type": stone_type, "shading": "flat"}, facets=asset["facets"])
+            for stone_vertices in vertices.astype(np.float32)
         ]
-        
-        # Apply position
-        positioned_vertices = []
-        for vertex in vertices:
-            positioned_vertices.extend([
-                vertex[0] + position[0],
-                vertex[1] + position[1],
-                vertex[2] + position[2]
-            ])
-        
-        return {
-            "vertices": positioned_vertices,
-            "indices": indices,
-            "type": "emerald_cut"
-        }
     
-    def _create_parametric_chain(self, length: float, style: str, link_size: float) -> Dict[str, Any]:
+    def _create_parametric_chain(self, length: float, style: str, link_size: float) -> Mesh:
         """Create parametric chain"""
         
         if style == "cable":
@@ -366,108 +332,46 @@ class ParametricEngine:
         else:
             return self._create_cable_chain(length, link_size)
     
-    def _create_cable_chain(self, length: float, link_size: float) -> Dict[str, Any]:
+    def _create_cable_chain(self, length: float, link_size: float) -> Mesh:
         """Create cable chain pattern"""
         link_count = int(length / (link_size * 2))
-        vertices = []
-        indices = []
+        offsets = np.zeros((link_count, 3))
+        offsets[:, 0] = np.arange(link_count) * link_size * 2
+        links = self.assets.instance("link/oval", offsets, link_size)
         
-        for i in range(link_count):
-            x = i * link_size * 2
-            # Create oval link
-            link_vertices = self._create_oval_link(x, 0, 0, link_size)
-            vertices.extend(link_vertices)
-            
-            # Add indices
-            base_index = i * 8
-            link_indices = [
-                base_index, base_index + 1, base_index + 2,
-                base_index + 1, base_index + 3, base_index + 2
-            ]
-            indices.extend(link_indices)
-        
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "cable_chain"
-        }
+        return Mesh(links["vertices"], links["indices"], "cable_chain")
     
-    def _create_figaro_chain(self, length: float, link_size: float) -> Dict[str, Any]:
+    def _create_figaro_chain(self, length: float, link_size: float) -> Mesh:
         """Create figaro chain pattern (alternating link sizes)"""
         link_count = int(length / (link_size * 3))
-        vertices = []
-        indices = []
-        
-        for i in range(link_count):
-            x = i * link_size * 3
-            # Alternate between large and small links
-            current_link_size = link_size * (2 if i % 2 == 0 else 1)
-            link_vertices = self._create_oval_link(x, 0, 0, current_link_size)
-            vertices.extend(link_vertices)
-            
-            # Add indices
-            base_index = i * 8
-            link_indices = [
-                base_index, base_index + 1, base_index + 2,
-                base_index + 1, base_index + 3, base_index + 2
-            ]
-            indices.extend(link_indices)
+        offsets = np.zeros((link_count, 3))
+        offsets[:, 0] = np.arange(link_count) * link_size * 3
+        # Alternate between large and small links
+        sizes = np.where(np.arange(link_count) % 2 == 0, link_size * 2, link_size)
+        links = self.assets.instance("link/oval", offsets, sizes)
         
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "figaro_chain"
-        }
+        return Mesh(links["vertices"], links["indices"], "figaro_chain")
     
-    def _create_rope_chain(self, length: float, link_size: float) -> Dict[str, Any]:
+    def _create_rope_chain(self, length: float, link_size: float) -> Mesh:
         """Create rope chain pattern (twisted)"""
         link_count = int(length / (link_size * 2))
-        vertices = []
-        indices = []
-        
-        for i in range(link_count):
-            x = i * link_size * 2
-            # Create twisted oval link
-            twist_angle = i * np.pi / 4  # Gradual twist
-            link_vertices = self._create_twisted_oval_link(x, 0, 0, link_size, twist_angle)
-            vertices.extend(link_vertices)
-            
-            # Add indices
-            base_index = i * 8
-            link_indices = [
-                base_index, base_index + 1, base_index + 2,
-                base_index + 1, base_index + 3, base_index + 2
-            ]
-            indices.extend(link_indices)
-        
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "rope_chain"
-        }
-    
-    def _create_twisted_oval_link(self, x: float, y: float, z: float, size: float, twist: float) -> List[float]:
-        """Create twisted oval link"""
-        # Apply twist transformation
-        cos_twist = np.cos(twist)
-        sin_twist = np.sin(twist)
-        
-        base_vertices = [
-            x, y, z, x + size, y, z,
-            x, y + size/2, z, x + size, y + size/2, z
-        ]
-        
-        twisted_vertices = []
-        for i in range(0, len(base_vertices), 3):
-            vx, vy, vz = base_vertices[i:i+3]
-            # Apply twist rotation around Y axis
-            new_x = vx * cos_twist - vz * sin_twist
-            new_z = vx * sin_twist + vz * cos_twist
-            twisted_vertices.extend([new_x, vy, new_z])
-        
-        return twisted_vertices
-    
-    def _create_parametric_pendant(self, size: float, style: str) -> Dict[str, Any]:
+        offsets = np.zeros((link_count, 3))
+        offsets[:, 0] = np.arange(link_count) * link_size * 2
+        links = self.assets.instance("link/oval", offsets, link_size)
+        
+        # Gradual twist: rotate each placed link around the Y axis
+        vertices = links["vertices"].reshape(link_count, -1, 3)
+        twist = np.arange(link_count) * np.pi / 4
+        cos_twist = np.cos(twist)[:, None]
+        sin_twist = np.sin(twist)[:, None]
+        x = vertices[:, :, 0].copy()
+        z = vertices[:, :, 2].copy()
+        vertices[:, :, 0] = x * cos_twist - z * sin_twist
+        vertices[:, :, 2] = x * sin_twist + z * cos_twist
+        
+        return Mesh(vertices, links["indices"], "rope_chain")
+    
+    def _create_parametric_pendant(self, size: float, style: str) -> Mesh:
         """Create parametric pendant"""
         
         if style == "geometric":
@@ -479,7 +383,7 @@ class ParametricEngine:
         else:
             return self._create_geometric_pendant(size)
     
-    def _create_geometric_pendant(self, size: float) -> Dict[str, Any]:
+    def _create_geometric_pendant(self, size: float) -> Mesh:
         """Create geometric pendant (hexagon)"""
         vertices = []
         for i in range(6):
@@ -490,13 +394,9 @@ class ParametricEngine:
         
         indices = [0, 1, 2, 0, 2, 3, 0, 3, 4, 0, 4, 5]
         
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "geometric_pendant"
-        }
+        return Mesh(vertices, indices, "geometric_pendant")
     
-    def _create_organic_pendant(self, size: float) -> Dict[str, Any]:
+    def _create_organic_pendant(self, size: float) -> Mesh:
         """Create organic pendant (flower-like)"""
         vertices = []
         petal_count = 8
@@ -524,13 +424,9 @@ class ParametricEngine:
             next_base = ((i + 1) % petal_count) * 2
             indices.extend([base, next_base, base + 1, next_base, next_base + 1, base + 1])
         
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "organic_pendant"
-        }
+        return Mesh(vertices, indices, "organic_pendant")
     
-    def _create_minimal_pendant(self, size: float) -> Dict[str, Any]:
+    def _create_minimal_pendant(self, size: float) -> Mesh:
         """Create minimal pendant (circle)"""
         segments = 16
         vertices = []
@@ -550,11 +446,7 @@ class ParametricEngine:
         for i in range(segments):
             indices.extend([0, i + 1, (i + 1) % segments + 1])
         
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "minimal_pendant"
-        }
+        return Mesh(vertices, indices, "minimal_pendant")
     
     def _create_parametric_stud(self, size: float, stone_size: float) -> Dict[str, Any]:
         """Create parametric stud earring"""
@@ -573,7 +465,7 @@ class ParametricEngine:
             "type": "parametric_stud"
         }
     
-    def _create_parametric_hoop(self, size: float) -> Dict[str, Any]:
+    def _create_parametric_hoop(self, size: float) -> Mesh:
         """Create parametric hoop earring"""
         radius = size
         tube_radius = size / 4
@@ -585,7 +477,7 @@ class ParametricEngine:
             tubular_segments=8
         )
     
-    def _create_parametric_drop(self, size: float, stone_size: float) -> Dict[str, Any]:
+    def _create_parametric_drop(self, size: float, stone_size: float) -> Mesh:
         """Create parametric drop earring"""
         # Create drop shape (teardrop)
         vertices = []
@@ -605,13 +497,9 @@ class ParametricEngine:
         for i in range(segments - 2):
             indices.extend([0, i + 1, i + 2])
         
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "parametric_drop"
-        }
+        return Mesh(vertices, indices, "parametric_drop")
     
-    def _create_parametric_chain_bracelet(self, wrist_size: float, width: float) -> Dict[str, Any]:
+    def _create_parametric_chain_bracelet(self, wrist_size: float, width: float) -> Mesh:
         """Create parametric chain bracelet"""
         # Similar to necklace chain but closed loop
         return self._create_parametric_chain(
@@ -620,7 +508,7 @@ class ParametricEngine:
             link_size=width / 2
         )
     
-    def _create_parametric_bangle(self, wrist_size: float, width: float) -> Dict[str, Any]:
+    def _create_parametric_bangle(self, wrist_size: float, width: float) -> Mesh:
         """Create parametric bangle bracelet"""
         radius = wrist_size / (2 * np.pi)
         tube_radius = width / 2
@@ -632,165 +520,68 @@ class ParametricEngine:
             tubular_segments=8
         )
     
-    def _create_parametric_cuff(self, wrist_size: float, width: float) -> Dict[str, Any]:
+    def _create_parametric_cuff(self, wrist_size: float, width: float) -> Mesh:
         """Create parametric cuff bracelet"""
         # Create open cuff (partial torus with gap)
         radius = wrist_size / (2 * np.pi)
         tube_radius = width / 2
         
         # Create partial torus (3/4 circle)
-        vertices = []
-        indices = []
         radial_segments = 18  # 3/4 of 24
         tubular_segments = 8
-        
-        for i in range(radial_segments + 1):
-            for j in range(tubular_segments + 1):
-                u = i / radial_segments * 1.5 * np.pi  # 3/4 circle
-                v = j / tubular_segments * 2 * np.pi
-                
-                x = (radius + tube_radius * np.cos(v)) * np.cos(u)
-                y = (radius + tube_radius * np.cos(v)) * np.sin(u)
-                z = tube_radius * np.sin(v)
-                
-                vertices.extend([x, y, z])
-        
-        # Generate indices
-        for i in range(radial_segments):
-            for j in range(tubular_segments):
-                a = i * (tubular_segments + 1) + j
-                b = a + tubular_segments + 1
-                c = a + 1
-                d = b + 1
-                
-                indices.extend([a, b, c, b, d, c])
-        
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "parametric_cuff"
-        }
+        vertices = torus_vertices(radius, tube_radius, radial_segments, tubular_segments, arc=1.5 * np.pi)
+        
+        # Same grid layout as a closed torus, so the cached index buffer is shared
+        return Mesh(vertices, grid_indices(radial_segments, tubular_segments), "parametric_cuff", {
+            "surface": {
+                "kind": "torus",
+                "radius": radius,
+                "tube_radius": tube_radius,
+                "radial_segments": radial_segments,
+                "tubular_segments": tubular_segments
+            }
+        })
     
-    def _create_cylinder(self, radius: float, height: float) -> Dict[str, Any]:
+    def _create_cylinder(self, radius: float, height: float) -> Mesh:
         """Create cylinder geometry"""
-        segments = 12
-        vertices = []
-        indices = []
-        
-        # Top and bottom circles
-        for i in range(segments):
-            angle = i * 2 * np.pi / segments
-            x = radius * np.cos(angle)
-            y = radius * np.sin(angle)
-            
-            # Top circle
-            vertices.extend([x, y, height/2])
-            # Bottom circle
-            vertices.extend([x, y, -height/2])
-        
-        # Create side faces
-        for i in range(segments):
-            base = i * 2
-            next_base = ((i + 1) % segments) * 2
-            
-            # Side rectangle
-            indices.extend([base, base + 1, next_base, next_base, base + 1, next_base + 1])
-        
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "cylinder"
-        }
+        vertices = self.assets.place("stud/post", np.array([radius, radius, height]))
+        return self._asset_part("stud/post", vertices, "cylinder")
     
-    def _create_stone_setting(self, stone_size: float, post_radius: float) -> Dict[str, Any]:
+    def _create_stone_setting(self, stone_size: float, post_radius: float) -> Mesh:
         """Create stone setting geometry"""
         # Create prong setting
-        prong_count = 4
         prong_length = stone_size * 0.8
         prong_width = post_radius * 0.3
         
-        vertices = []
-        indices = []
-        
-        for i in range(prong_count):
-            angle = i * 2 * np.pi / prong_count
-            
-            # Prong base
-            base_x = post_radius * np.cos(angle)
-            base_y = post_radius * np.sin(angle)
-            vertices.extend([base_x, base_y, 0])
-            
-            # Prong tip
-            tip_x = (post_radius + prong_length) * np.cos(angle)
-            tip_y = (post_radius + prong_length) * np.sin(angle)
-            vertices.extend([tip_x, tip_y, prong_width])
+        # The asset stores unit prong directions with z = 0 at the base and 1 at the tip
+        template = self.assets.vertices("setting/prong4").astype(np.float64)
+        radial = np.where(template[:, 2] > 0, post_radius + prong_length, post_radius)
+        vertices = np.empty_like(template)
+        vertices[:, :2] = template[:, :2] * radial[:, None]
+        vertices[:, 2] = template[:, 2] * prong_width
         
-        # Create prong faces
-        for i in range(prong_count):
-            base = i * 2
-            next_base = ((i + 1) % prong_count) * 2
-            indices.extend([base, next_base, base + 1, next_base, next_base + 1, base + 1])
-        
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "stone_setting"
-        }
+        return self._asset_part("setting/prong4", vertices, "stone_setting")
     
     def _create_torus(self, radius: float, tube_radius: float, 
-                     radial_segments: int = 32, tubular_segments: int = 16) -> Dict[str, Any]:
+                     radial_segments: int = 32, tubular_segments: int = 16) -> Mesh:
         """Create torus geometry"""
-        vertices = []
-        indices = []
-        
-        for i in range(radial_segments + 1):
-            for j in range(tubular_segments + 1):
-                u = i / radial_segments * 2 * np.pi
-                v = j / tubular_segments * 2 * np.pi
-                
-                x = (radius + tube_radius * np.cos(v)) * np.cos(u)
-                y = (radius + tube_radius * np.cos(v)) * np.sin(u)
-                z = tube_radius * np.sin(v)
-                
-                vertices.extend([x, y, z])
-        
-        # Generate indices
-        for i in range(radial_segments):
-            for j in range(tubular_segments):
-                a = i * (tubular_segments + 1) + j
-                b = a + tubular_segments + 1
-                c = a + 1
-                d = b + 1
-                
-                indices.extend([a, b, c, b, d, c])
-        
-        return {
-            "vertices": vertices,
-            "indices": indices,
-            "type": "torus"
-        }
-    
-    def _create_oval_link(self, x: float, y: float, z: float, size: float) -> List[float]:
-        """Create oval link vertices"""
-        return [
-            x, y, z, x + size, y, z,
-            x, y + size/2, z, x + size, y + size/2, z
-        ]
+        # Vertices from cached trig tables; the index buffer is shared per resolution
+        vertices = torus_vertices(radius, tube_radius, radial_segments, tubular_segments)
+        
+        return Mesh(vertices, grid_indices(radial_segments, tubular_segments), "torus", {
+            "surface": {
+                "kind": "torus",
+                "radius": radius,
+                "tube_radius": tube_radius,
+                "radial_segments": radial_segments,
+                "tubular_segments": tubular_segments
+            }
+        })
     
-    def _calculate_stone_positions(self, stone_count: int, ring_radius: float) -> List[List[float]]:
-        """Calculate positions for stones around the ring"""
-        positions = []
-        angle_step = 2 * np.pi / stone_count
-        
-        for i in range(stone_count):
-            angle = i * angle_step
-            x = ring_radius * np.cos(angle)
-            y = ring_radius * np.sin(angle)
-            z = 0
-            positions.append([x, y, z])
-        
-        return positions
+    def _asset_part(self, asset_id: str, vertices: np.ndarray, part_type: str) -> Mesh:
+        """Wrap placed asset vertices with the asset's shared topology"""
+        return Mesh(vertices, self.assets.indices(asset_id), part_type)
     
     def _ring_size_to_diameter(self, ring_size: float) -> float:
         """Convert US ring size to diameter in mm"""
-        return 16.5 + ring_size * 0.8 
\ No newline at end of file
+        return ring_size_to_diameter(ring_size) 
\ No newline at end of file
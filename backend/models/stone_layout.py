@@ -0,0 +1,184 @@
+import numpy as np
+from typing import Dict, Any, Optional, Tuple
+
+STONE_SETTINGS = ("solitaire", "channel", "pave", "halo", "eternity")
+
+# Default arc (degrees) covered by each setting, centred on the top of the ring
+DEFAULT_ARCS = {"solitaire": 0.0, "channel": 120.0, "pave": 120.0, "halo": 0.0, "eternity": 360.0}
+
+# How far pavé rows may wrap around the tube (radians from the outer crown line)
+MAX_ROW_ANGLE = np.radians(70.0)
+
+# Fraction of the stone's girdle radius sunk below the metal surface
+SEAT_DEPTH = 0.35
+
+
+def ring_size_to_diameter(ring_size: float) -> float:
+    """Convert US ring size to inner diameter in mm"""
+    return 16.5 + ring_size * 0.8
+
+
+def surface_frames(phi: np.ndarray, theta: np.ndarray, ring_radius: float,
+                   band_radius: float) -> Dict[str, np.ndarray]:
+    """Points and orthonormal frames on the torus surface at (phi, theta).
+
+    phi runs around the finger and theta around the tube; theta = 0 is the
+    outermost line of the band.
+    """
+    cos_phi, sin_phi = np.cos(phi), np.sin(phi)
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+    normal = np.stack([cos_theta * cos_phi, cos_theta * sin_phi, sin_theta], axis=1)
+    centre = np.stack([ring_radius * cos_phi, ring_radius * sin_phi, np.zeros_like(phi)], axis=1)
+    tangent = np.stack([-sin_phi, cos_phi, np.zeros_like(phi)], axis=1)
+    return {
+        "points": centre + band_radius * normal,
+        "normals": normal,
+        "tangents": tangent,
+        "bitangents": np.cross(normal, tangent)
+    }
+
+
+def instance_transforms(points: np.ndarray, normals: np.ndarray, tangents: np.ndarray,
+                        bitangents: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """4x4 transforms mapping a unit cut (table along +z) onto the surface"""
+    transforms = np.zeros((len(points), 4, 4))
+    transforms[:, :3, 0] = tangents * sizes[:, None]
+    transforms[:, :3, 1] = bitangents * sizes[:, None]
+    transforms[:, :3, 2] = normals * sizes[:, None]
+    # Seat the girdle slightly below the surface so the pavilion sits in the metal
+    transforms[:, :3, 3] = points + normals * (sizes * (1.0 - SEAT_DEPTH))[:, None]
+    transforms[:, 3, 3] = 1.0
+    return transforms
+
+
+def _row_angles(count_cap: int, pitch: float, arc: float, offset: float = 0.0) -> np.ndarray:
+    """Evenly pitched angles centred on 0 that fit inside the arc (or a full circle)"""
+    if arc >= 2 * np.pi - 1e-9:
+        # A full circle closes on itself, so the pitch is stretched to divide it evenly
+        count = min(int(2 * np.pi // pitch), count_cap)
+        return np.arange(count) * (2 * np.pi / max(count, 1)) + offset
+    count = min(int(arc // pitch) + 1, count_cap)
+    angles = (np.arange(count) - (count - 1) / 2) * pitch + offset
+    return angles[np.abs(angles) <= arc / 2 + 1e-9]
+
+
+def remove_overlaps(centres: np.ndarray, radii: np.ndarray, min_gap: float) -> np.ndarray:
+    """Keep-mask that drops later stones closer than min_gap to an earlier one.
+
+    Candidate pairs come from a KD-tree query at the largest possible contact
+    distance, so the check stays near-linear for hundreds of stones.
+    """
+    keep = np.ones(len(centres), dtype=bool)
+    if len(centres) < 2:
+        return keep
+    # scipy.spatial costs ~0.4s to import; only multi-stone layouts pay it, on first use
+    from scipy.spatial import cKDTree
+    tree = cKDTree(centres)
+    pairs = tree.query_pairs(2 * radii.max() + min_gap, output_type="ndarray")
+    if len(pairs) == 0:
+        return keep
+    distance = np.linalg.norm(centres[pairs[:, 0]] - centres[pairs[:, 1]], axis=1)
+    clashing = pairs[distance < radii[pairs[:, 0]] + radii[pairs[:, 1]] + min_gap - 1e-9]
+    for first, second in clashing[np.argsort(clashing.max(axis=1))]:
+        if keep[first] and keep[second]:
+            keep[max(first, second)] = False
+    return keep
+
+
+def _stone_angles(setting: str, stone_count: int, stone_size: float, ring_radius: float, band_radius: float,
+                  band_width: float, arc_degrees: Optional[float], min_gap: float
+                  ) -> Tuple[str, np.ndarray, np.ndarray, np.ndarray]:
+    """(setting, phi, theta, sizes) of the stones that fit, before accents and overlaps"""
+    if setting not in STONE_SETTINGS:
+        setting = "solitaire" if stone_count <= 1 else "channel"
+    arc = np.radians(DEFAULT_ARCS[setting] if arc_degrees is None else min(max(arc_degrees, 0.0), 360.0))
+    outer_radius = ring_radius + band_radius
+    diameter = 2 * stone_size
+
+    if stone_count <= 0:
+        phi = theta = sizes = np.zeros(0)
+    elif setting == "solitaire":
+        phi, theta, sizes = np.zeros(1), np.zeros(1), np.full(1, stone_size)
+    elif setting in ("channel", "eternity"):
+        phi = _row_angles(stone_count, (diameter + min_gap) / outer_radius,
+                          2 * np.pi if setting == "eternity" else arc)
+        theta = np.zeros_like(phi)
+        sizes = np.full(len(phi), stone_size)
+    elif setting == "pave":
+        # Honeycomb rows: sqrt(3)/2 row spacing, odd rows shifted by half a pitch
+        row_pitch = (diameter + min_gap) * np.sqrt(3) / 2 / band_radius
+        max_rows = int(2 * MAX_ROW_ANGLE // row_pitch) + 1
+        rows = int(np.clip((band_width + min_gap) // (diameter + min_gap), 1, max_rows))
+        row_theta = (np.arange(rows) - (rows - 1) / 2) * row_pitch
+        row_radius = ring_radius + band_radius * np.cos(row_theta)
+        pitches = (diameter + min_gap) / row_radius
+        per_row = [_row_angles(stone_count, pitch, arc, (r % 2) * pitch / 2)
+                   for r, pitch in enumerate(pitches)]
+        phi = np.concatenate(per_row)
+        theta = np.repeat(row_theta, [len(row) for row in per_row])
+        sizes = np.full(len(phi), stone_size)
+        # Fill from the top outwards when the count caps the layout
+        order = np.argsort(np.abs(phi), kind="stable")[:stone_count]
+        phi, theta, sizes = phi[order], theta[order], sizes[order]
+    else:  # halo
+        phi, theta, sizes = np.zeros(1), np.zeros(1), np.full(1, stone_size)
+    return setting, phi, theta, sizes
+
+
+def _halo_accents(stone_count: int, stone_size: float, accent_size: Optional[float],
+                  min_gap: float) -> Tuple[float, float, int]:
+    """(accent size, halo radius, accent count) around a halo's centre stone"""
+    accent = accent_size or stone_size * 0.3
+    halo_radius = stone_size + accent + min_gap
+    # Neighbouring accents are a chord apart, so size the count from the chord angle
+    chord_angle = 2 * np.arcsin(min((2 * accent + min_gap) / (2 * halo_radius), 1.0))
+    return accent, halo_radius, min(int(2 * np.pi / chord_angle + 1e-9), stone_count - 1)
+
+
+def max_placed_stones(setting: str, stone_count: int, stone_size: float, ring_radius: float,
+                      band_radius: float, band_width: float, arc_degrees: Optional[float] = None,
+                      min_gap: float = 0.1, accent_size: Optional[float] = None) -> int:
+    """Upper bound on solve_stone_layout's placed count, without building the layout"""
+    setting, phi, _, _ = _stone_angles(setting, stone_count, stone_size, ring_radius, band_radius,
+                                       band_width, arc_degrees, min_gap)
+    if setting == "halo" and stone_count > 1:
+        return len(phi) + _halo_accents(stone_count, stone_size, accent_size, min_gap)[2]
+    return len(phi)
+
+
+def solve_stone_layout(setting: str, stone_count: int, stone_size: float, ring_radius: float,
+                       band_radius: float, band_width: float, arc_degrees: Optional[float] = None,
+                       min_gap: float = 0.1, accent_size: Optional[float] = None) -> Dict[str, Any]:
+    """Place stones on the outer surface of a ring band.
+
+    Returns per-stone 4x4 instance transforms (scale included), sizes and how
+    many of the requested stones fit. The top of the ring is phi = 0.
+    """
+    setting, phi, theta, sizes = _stone_angles(setting, stone_count, stone_size, ring_radius, band_radius,
+                                               band_width, arc_degrees, min_gap)
+
+    frames = surface_frames(phi, theta, ring_radius, band_radius)
+    transforms = instance_transforms(frames["points"], frames["normals"], frames["tangents"],
+                                     frames["bitangents"], sizes)
+
+    if setting == "halo" and stone_count > 1:
+        # Accent stones ring the centre stone in its own girdle plane
+        accent, halo_radius, count = _halo_accents(stone_count, stone_size, accent_size, min_gap)
+        angles = np.arange(count) * 2 * np.pi / count
+        centre = transforms[0]
+        accents = np.repeat(centre[None], count, axis=0)
+        accents[:, :3, :3] *= accent / stone_size
+        offsets = np.stack([np.cos(angles), np.sin(angles), np.zeros(count)], axis=1) * halo_radius
+        accents[:, :3, 3] += offsets @ (centre[:3, :3] / stone_size).T
+        transforms = np.concatenate([transforms, accents])
+        sizes = np.concatenate([sizes, np.full(count, accent)])
+
+    keep = remove_overlaps(transforms[:, :3, 3], sizes, min_gap)
+
+    return {
+        "setting": setting,
+        "transforms": transforms[keep],
+        "sizes": sizes[keep],
+        "requested": int(stone_count),
+        "placed": int(keep.sum())
+    }
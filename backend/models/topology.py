@@ -0,0 +1,64 @@
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+# Index buffers, UV grids and trig tables depend only on segment counts, never
+# on sizes, so each resolution is built once per process and shared by every
+# request and part. Everything returned here is read-only: meshes hold these
+# arrays directly, and a stage that wants different indices must build new ones.
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@lru_cache(maxsize=None)
+def grid_indices(radial_segments: int, tubular_segments: int) -> np.ndarray:
+    """Two triangles per cell of a (radial + 1) x (tubular + 1) row-major vertex grid"""
+    i, j = np.meshgrid(np.arange(radial_segments), np.arange(tubular_segments), indexing="ij")
+    a = (i * (tubular_segments + 1) + j).ravel()
+    b = a + tubular_segments + 1
+    c = a + 1
+    d = b + 1
+    return _frozen(np.stack([a, b, c, b, d, c], axis=1).astype(np.uint32).ravel())
+
+
+@lru_cache(maxsize=None)
+def repeated_grid_indices(radial_segments: int, tubular_segments: int, copies: int) -> np.ndarray:
+    """grid_indices for several grids stored one after another (braided strands)"""
+    indices = grid_indices(radial_segments, tubular_segments)
+    vertex_count = (radial_segments + 1) * (tubular_segments + 1)
+    offsets = np.arange(copies, dtype=np.uint32)[:, None] * vertex_count
+    return _frozen((indices[None, :] + offsets).ravel())
+
+
+@lru_cache(maxsize=None)
+def grid_uvs(radial_segments: int, tubular_segments: int) -> np.ndarray:
+    """Texture coordinates for a (radial + 1) x (tubular + 1) row-major vertex grid"""
+    u = np.linspace(0.0, 1.0, radial_segments + 1)
+    v = np.linspace(0.0, 1.0, tubular_segments + 1)
+    uu, vv = np.meshgrid(u, v, indexing="ij")
+    return _frozen(np.stack([uu.ravel(), vv.ravel()], axis=1))
+
+
+@lru_cache(maxsize=None)
+def sweep_table(segments: int, arc: float = 2 * np.pi) -> Tuple[np.ndarray, np.ndarray]:
+    """cos and sin at segments + 1 evenly spaced angles over the arc (both ends included)"""
+    angles = np.arange(segments + 1) / segments * arc
+    return _frozen(np.cos(angles)), _frozen(np.sin(angles))
+
+
+def torus_vertices(radius: float, tube_radius: float, radial_segments: int, tubular_segments: int,
+                   arc: float = 2 * np.pi) -> np.ndarray:
+    """Torus (or an arc of one) on the grid_indices layout, as one broadcast over the trig tables"""
+    cos_u, sin_u = sweep_table(radial_segments, arc)
+    cos_v, sin_v = sweep_table(tubular_segments)
+    ring = radius + tube_radius * cos_v
+    vertices = np.empty((radial_segments + 1, tubular_segments + 1, 3))
+    vertices[:, :, 0] = cos_u[:, None] * ring[None, :]
+    vertices[:, :, 1] = sin_u[:, None] * ring[None, :]
+    vertices[:, :, 2] = tube_radius * sin_v[None, :]
+    return vertices.reshape(-1, 3)
+
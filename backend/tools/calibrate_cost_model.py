@@ -0,0 +1,192 @@
+"""Benchmark the geometry pipeline and fit the cost model coefficients.
+
+Usage (from backend/):
+    python tools/calibrate_cost_model.py [output.json]
+
+Each template runs over a grid of parameters, and each result is decimated
+to a range of triangle budgets. Template build, decimation, attributes,
+optimization and serialization are timed separately (best of several
+runs, fewer for slow cases) and fitted with non-negative least squares
+against the vertex, triangle and part counts the parameter schemas
+predict, derived the same way CostModel.estimate derives them. The result
+is written to assets/cost_model.json, which CostModel.load() picks up.
+"""
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, Callable, List, Tuple
+
+import numpy as np
+from scipy.optimize import nnls
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.cost_model import DEFAULT_CALIBRATION_PATH, CostModel
+from models.mesh import Model
+from models.mesh_attributes import add_attributes
+from models.mesh_decimation import MIN_PART_TRIANGLES, decimate_geometry
+from models.mesh_optimization import TopologyOrderCache, optimize_geometry
+from models.parameter_schema import normalize_parameters
+from models.parametric_engine import ParametricEngine
+
+REPEATS = 5
+# Stop repeating a case once this much time has gone into it
+CASE_BUDGET_MS = 1000.0
+# Triangle budgets each template result is decimated to (None: a quarter of its triangles)
+BUDGETS = [50, 200, 1000, None]
+
+# Parameter grids per template, crossed into every combination
+GRIDS: Dict[str, Dict[str, List[Any]]] = {
+    "ring": {
+        "band_style": ["plain", "carved", "braided"],
+        "stone_count": [0, 1, 12, 60, 200, 500],
+        "stone_setting": ["channel", "pave", "eternity"],
+        "stone_size": [0.5, 2.0],
+        "stone_cut": ["round_brilliant", "cushion"]
+    },
+    "necklace": {
+        "chain_style": ["cable", "figaro", "rope"],
+        "chain_length": [200, 450, 1200, 2000],
+        "link_size": [0.5, 1.0, 3.0, 8.0]
+    },
+    "earrings": {
+        "earring_type": ["stud", "hoop", "drop"],
+        "size": [4.0, 8.0, 20.0]
+    },
+    "bracelet": {
+        "bracelet_style": ["chain", "bangle", "cuff"],
+        "width": [0.5, 2.0, 5.0, 12.0]
+    }
+}
+
+
+def timed_runs(func: Callable[[], Any]) -> Tuple[float, Any]:
+    """(fastest of up to REPEATS runs in milliseconds, last result)"""
+    times = []
+    while len(times) < REPEATS and sum(times) < CASE_BUDGET_MS:
+        started = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - started) * 1000.0)
+    return min(times), result
+
+
+def best_time(func: Callable[[], Any]) -> float:
+    return timed_runs(func)[0]
+
+
+def fit(features: List[List[float]], times: List[float]) -> np.ndarray:
+    coefficients, _ = nnls(np.array(features, dtype=np.float64), np.array(times, dtype=np.float64))
+    return coefficients
+
+
+def calibrate() -> Dict[str, Any]:
+    engine = ParametricEngine(cache_size=0, vertex_budget=None, quiet=True)
+    templates = {}
+    stages = {name: ([], []) for name in ("attributes", "decimation", "optimization", "serialize")}
+    cached_times = []
+
+    def sample(stage: str, features: List[float], func: Callable[[], Any]) -> Any:
+        rows, times = stages[stage]
+        elapsed, result = timed_runs(func)
+        rows.append(features)
+        times.append(elapsed)
+        return result
+
+    for jewelry_type, grid in GRIDS.items():
+        template_func = engine.jewelry_templates[jewelry_type]
+        rows, times = [], []
+        for values in itertools.product(*grid.values()):
+            parameters = normalize_parameters(jewelry_type, dict(zip(grid.keys(), values)), vertex_budget=None)
+            params = parameters.model_dump()
+            geometry = template_func(params)
+            model = Model(jewelry_type, geometry, params)
+            # Fit against the schema's predictions, which are all admission control has
+            vertices, triangles = parameters.estimated_vertices(), parameters.estimated_triangles()
+            shaded, parts = parameters.estimated_vertices(attributes=True), parameters.estimated_parts()
+
+            rows.append([1.0, vertices, triangles, parts])
+            times.append(best_time(lambda: template_func(params)))
+
+            sample("attributes", [1.0, shaded, parts], lambda: add_attributes(geometry))
+            # The template's topology repeats across requests, so its vertex orders are cached
+            optimize_geometry(geometry, engine.topology_cache)
+            sample("optimization", [1.0, vertices, parts, 0.0],
+                   lambda: optimize_geometry(geometry, engine.topology_cache))
+
+            for budget in BUDGETS:
+                budget = budget or triangles // 4
+                if budget < 4 or budget >= triangles:
+                    continue
+                kept_parts = min(parts, max(budget // MIN_PART_TRIANGLES, 1))
+                kept_triangles = triangles * kept_parts // parts
+                decimated = sample("decimation", [1.0, kept_triangles, max(kept_triangles - budget, 0), kept_parts],
+                                   lambda: decimate_geometry(geometry, budget))
+                scale = budget / triangles
+                sample("attributes", [1.0, shaded * scale, kept_parts], lambda: add_attributes(decimated))
+                # A decimated topology is new, so its orders are computed from scratch
+                sample("optimization", [1.0, vertices * scale, kept_parts, budget],
+                       lambda: optimize_geometry(decimated, TopologyOrderCache()))
+
+            sample("serialize", [1.0, 3 * vertices + 3 * triangles], model.to_dict)
+
+            key = (jewelry_type, parameters)
+            cached_times.append(best_time(lambda: engine.model_cache.contains(key, (None, False))))
+
+        base, vertex, triangle, part = fit(rows, times)
+        templates[jewelry_type] = {"base_ms": base, "vertex_ms": vertex, "triangle_ms": triangle, "part_ms": part}
+        print(f"[calibrate_cost_model.py] {jewelry_type}: {len(rows)} runs, base={base:.3f} ms, "
+              f"vertex={vertex * 1000:.3f} us, triangle={triangle * 1000:.3f} us, part={part * 1000:.3f} us")
+
+    names = {
+        "attributes": ("base_ms", "vertex_ms", "part_ms"),
+        "decimation": ("base_ms", "triangle_ms", "collapse_ms", "part_ms"),
+        "optimization": ("base_ms", "vertex_ms", "part_ms", "fresh_triangle_ms"),
+        "serialize": ("base_ms", "value_ms")
+    }
+    coefficients: Dict[str, Any] = {
+        "templates": {name: {key: float(value) for key, value in row.items()} for name, row in templates.items()}
+    }
+    for stage, (rows, times) in stages.items():
+        coefficients[stage] = {key: float(value) for key, value in zip(names[stage], fit(rows, times))}
+        print(f"[calibrate_cost_model.py] {stage}: {len(rows)} runs, {coefficients[stage]}")
+    coefficients["cached_ms"] = float(np.median(cached_times))
+    return coefficients
+
+
+def report(coefficients: Dict[str, Any]) -> None:
+    """Predicted vs measured end-to-end time for a few representative requests"""
+    engine = ParametricEngine(cache_size=0, vertex_budget=None, quiet=True)
+    model = CostModel(coefficients)
+    eternity = {"stone_count": 500, "stone_setting": "eternity", "stone_size": 0.5, "stone_cut": "cushion"}
+    samples = [
+        ("ring", {"stone_count": 1}, None), ("ring", {"stone_count": 1}, 100),
+        ("ring", {"band_style": "carved", "stone_count": 60, "stone_setting": "pave"}, None),
+        ("ring", {"band_style": "carved", "stone_count": 60, "stone_setting": "pave"}, 500),
+        ("ring", eternity, None), ("ring", eternity, 100), ("ring", eternity, 1000),
+        ("necklace", {}, None), ("necklace", {"chain_length": 2000, "link_size": 0.5}, None),
+        ("necklace", {"chain_length": 2000, "link_size": 0.5}, 200),
+        ("earrings", {"earring_type": "hoop"}, None), ("earrings", {"earring_type": "hoop"}, 50),
+        ("bracelet", {"bracelet_style": "chain", "width": 0.5}, None)
+    ]
+    for jewelry_type, raw, budget in samples:
+        for attributes in (False, True):
+            parameters = normalize_parameters(jewelry_type, raw, vertex_budget=None)
+            estimate = model.estimate(jewelry_type, parameters, attributes=attributes, triangle_budget=budget)
+            # A fresh topology cache per run, as for a design no one has requested before
+            engine.topology_cache = TopologyOrderCache()
+            measured = best_time(lambda: engine.build_model(jewelry_type, parameters, attributes=attributes,
+                                                            triangle_budget=budget).to_dict())
+            print(f"[calibrate_cost_model.py] {jewelry_type:9s} {json.dumps(raw):60s} budget={budget!s:5s} "
+                  f"attributes={attributes!s:5s} predicted={estimate.cpu_ms:8.2f} ms measured={measured:8.2f} ms")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CALIBRATION_PATH
+    coefficients = calibrate()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as handle:
+        json.dump(coefficients, handle, indent=2)
+    print(f"[calibrate_cost_model.py] Wrote {path}")
+    report(coefficients)
@@ -0,0 +1,214 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Usage (from backend/):
+    python tools/fake_openai.py [--port 8100] [--latency 0.2] [--jitter 0.1]
+                                [--slow-rate 0.05] [--slow-latency 5] [--fail-rate 0.1]
+                                [--token-delay 0.03] [--output-rate 40]
+
+then point the backend at it:
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=test uvicorn main:app
+
+Replies are canned parameter JSON picked by keywords in the prompt, either
+whole or streamed as server-sent events ("stream": true). A user message of
+the form {"descriptions": [{"id": ..., "text": ...}]} gets a packed
+{"results": [...]} reply, as bulk extraction sends; requests with "tools"
+get a tool call restricted to the declared fields. Latency, tail
+latency, failure rate and streaming pace are configurable, so timeouts,
+retries, hedging, the circuit breaker and early geometry start can be
+exercised without a real upstream.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+CANNED_PARAMETERS: Dict[str, Dict[str, Any]] = {
+    "ring": {"jewelry_type": "ring", "band_width": 3.0, "band_thickness": 1.5, "ring_size": 7.0,
+             "stone_count": 1, "stone_size": 2.0, "stone_type": "diamond", "band_style": "plain"},
+    "necklace": {"jewelry_type": "necklace", "chain_length": 450, "chain_style": "cable",
+                 "link_size": 3.0, "pendant_size": 15.0, "pendant_style": "geometric"},
+    "earrings": {"jewelry_type": "earrings", "earring_type": "stud", "size": 8.0, "stone_size": 2.0},
+    "bracelet": {"jewelry_type": "bracelet", "wrist_size": 170, "bracelet_style": "chain", "width": 5.0}
+}
+
+
+def canned_reply(prompt: str) -> Dict[str, Any]:
+    prompt = prompt.lower()
+    # "earring" contains "ring", so it is matched first
+    jewelry_type = next((name for name in ("earrings", "necklace", "bracelet")
+                         if name.rstrip("s") in prompt), "ring")
+    parameters = dict(CANNED_PARAMETERS[jewelry_type])
+    # Type and core dimensions first, as the real schema orders them
+    return {"jewelry_type": parameters.pop("jewelry_type"), **parameters,
+            "style": "modern", "material": "gold", "complexity": "medium"}
+
+
+def usage(messages, content: str) -> Dict[str, int]:
+    """Token counts at the usual ~4 characters per token (tool definitions count as input)"""
+    prompt_tokens = sum(len(json.dumps(message)) for message in messages) // 4 + 1
+    completion_tokens = len(content) // 4 + 1
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/chat/completions (and GET /v1/models); behaviour comes from server.options"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        # Model listing, which the backend's connection warm-up requests
+        if not self.path.rstrip("/").endswith("/models"):
+            return self._reply(404, {"error": {"message": f"unknown path {self.path}"}})
+        self._reply(200, {"object": "list", "data": [{"id": "gpt-4", "object": "model"}]})
+
+    def do_POST(self):
+        options = self.server.options
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._reply(400, {"error": {"message": "invalid JSON"}})
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._reply(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        with self.server.lock:
+            self.server.requests += 1
+        latency = max(options.latency + random.uniform(-options.jitter, options.jitter), 0.0)
+        if random.random() < options.slow_rate:
+            latency = options.slow_latency
+        time.sleep(latency)
+        if random.random() < options.fail_rate:
+            return self._reply(options.fail_status, {"error": {"message": "injected failure"}},
+                               {"Retry-After": "0"} if options.fail_status == 429 else None)
+
+        prompt = " ".join(str(message.get("content", "")) for message in body.get("messages", [])
+                          if message.get("role") == "user")
+        try:
+            batch = json.loads(prompt)["descriptions"]
+        except (ValueError, KeyError, TypeError):
+            batch = None
+        if batch is not None:
+            # Packed request: one result per description, tagged with its id
+            content = json.dumps({"results": [{"id": item.get("id"), **canned_reply(str(item.get("text", "")))}
+                                              for item in batch]})
+        elif body.get("tools"):
+            # Function calling: only the fields the tool declares, type implied by its name
+            function = body["tools"][0]["function"]
+            properties = function.get("parameters", {}).get("properties", {})
+            words = function.get("name", "").split("_")
+            jewelry_type = next((name for name in CANNED_PARAMETERS if name in words), None)
+            reply = canned_reply(prompt if jewelry_type is None else jewelry_type)
+            content = json.dumps({key: value for key, value in reply.items() if key in properties})
+        else:
+            # The all-types schema asks for every field, so a model fills in all of them
+            reply = canned_reply(prompt)
+            for parameters in CANNED_PARAMETERS.values():
+                reply.update({key: value for key, value in parameters.items() if key not in reply})
+            content = json.dumps(reply)
+        tool_name = body["tools"][0]["function"]["name"] if body.get("tools") and batch is None else None
+        if body.get("stream"):
+            return self._stream(content, body.get("model", "fake"), tool_name)
+        tokens = usage(body.get("messages", []) + body.get("tools", []), content)
+        if options.output_rate > 0:
+            time.sleep(tokens["completion_tokens"] / options.output_rate)
+        if tool_name:
+            message = {"role": "assistant", "content": None, "tool_calls": [
+                {"id": "call_fake", "type": "function", "function": {"name": tool_name, "arguments": content}}
+            ]}
+        else:
+            message = {"role": "assistant", "content": content}
+        self._reply(200, {
+            "id": f"chatcmpl-fake-{self.server.requests}",
+            "object": "chat.completion",
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            "usage": tokens
+        })
+
+    def _reply(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (deadline or lost hedge race)
+            pass
+
+    def _stream(self, content: str, model: str, tool_name: Optional[str] = None):
+        """Server-sent events, a few characters per chunk, like a token stream"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        size = self.server.options.chunk_chars
+        try:
+            for start in range(0, len(content), size):
+                text = content[start:start + size]
+                delta = {"content": text} if tool_name is None else {"tool_calls": [
+                    {"index": 0, "function": {"arguments": text, **({"name": tool_name} if start == 0 else {})}}
+                ]}
+                chunk = {"object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(self.server.options.token_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        if self.server.options.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 0, **overrides) -> ThreadingHTTPServer:
+    """Stub server (not yet serving); port 0 picks a free port, see server.server_address"""
+    options = parse_args([])
+    for name, value in overrides.items():
+        setattr(options, name, value)
+    server = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.options = options
+    server.requests = 0
+    server.lock = threading.Lock()
+    return server
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.2, help="typical response time (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="uniform +/- jitter (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of tail-latency responses")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="tail response time (s)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of failed responses")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--token-delay", type=float, default=0.03, help="delay between streamed chunks (s)")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="characters per streamed chunk")
+    parser.add_argument("--output-rate", type=float, default=0.0,
+                        help="completion tokens/s for whole replies; 0 answers after --latency alone")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = make_server(args.host, args.port)
+    server.options = args
+    print(f"[fake_openai.py] Listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,452 @@
+"""Capacity test: drive the HTTP and WebSocket endpoints with a realistic mix against a stub LLM.
+
+Usage (from backend/):
+    python tools/load_test.py [--duration 30] [--users 16] [--mix slider=5,variants=3,ai=2]
+                              [--workers 1] [--llm-latency 0.5] [--llm-fail-rate 0.0]
+                              [--max-p99-ms slider=200] [--max-error-rate 0.01] [--min-rps 50]
+
+Everything runs on this machine without network access: the fake OpenAI
+server (tools/fake_openai.py) and the backend (main.py with WEB_CONCURRENCY
+workers) start as subprocesses on free ports with a throwaway design store
+and prompt cache, and load starts once GET /api/ready answers. Per-client
+CPU budgets are lifted, since every virtual user shares 127.0.0.1
+(--client-limits keeps them). Each virtual user repeatedly picks a
+scenario by weight:
+    slider    a /ws connection dragging a slider: a burst of delta parametric
+              updates, each sent when the previous reply has arrived
+    variants  POST /api/parametric-jewelry for a random catalogue variant
+    ai        POST /api/generate-jewelry with a sample prompt, repeated
+              verbatim (--ai-repeat of the time) or varied
+Reported per scenario: requests, throughput, latency percentiles, errors,
+and rejections (429/503, i.e. admission control); then the backend's CPU
+use and peak RSS over all its processes, sampled from /proc. With --url
+an already running backend is loaded instead (--pid for its metrics).
+Any --max-p99-ms, --max-error-rate or --min-rps limit that is missed makes
+the exit status 1, so a release pipeline can fail on lost capacity.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+
+import httpx
+import websockets
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("slider", "variants", "ai")
+# Statuses that mean the server shed load on purpose rather than failed
+REJECTED_STATUSES = {429, 503}
+
+PROMPTS = [
+    "A modern gold ring with a large diamond center stone",
+    "Vintage silver necklace with geometric pendant",
+    "Rose gold earrings with multiple small sapphires",
+    "Chunky platinum cuff bracelet, about 12mm wide",
+    "Thin braided band, size 7, with a row of tiny rubies",
+    "Long figaro chain with a small organic pendant",
+    "Simple hoop earrings",
+    "Eternity ring set with emeralds all the way around"
+]
+# Appended to a sample prompt to make it new to the prompt cache and the design store
+PROMPT_VARIATIONS = ["size {n}", "about {n}mm wide", "with {n} small stones", "{n}mm band"]
+
+VARIANTS = {
+    "ring": lambda rng: {"ring_size": rng.choice(range(4, 14)), "band_width": rng.choice([2.0, 3.0, 4.0, 6.0]),
+                         "band_style": rng.choice(["plain", "carved", "braided"]),
+                         "stone_count": rng.choice([1, 1, 5, 12, 24]),
+                         "stone_setting": rng.choice([None, "channel", "pave", "halo"])},
+    "necklace": lambda rng: {"chain_length": rng.choice([400, 450, 500, 600]), "link_size": rng.choice([2.0, 3.0, 4.0]),
+                             "chain_style": rng.choice(["cable", "figaro", "rope"])},
+    "earrings": lambda rng: {"earring_type": rng.choice(["stud", "hoop", "drop"]), "size": rng.choice([6.0, 8.0, 12.0])},
+    "bracelet": lambda rng: {"bracelet_style": rng.choice(["chain", "bangle", "cuff"]),
+                             "wrist_size": rng.choice([160, 170, 180]), "width": rng.choice([3.0, 5.0, 10.0])}
+}
+
+
+class ScenarioStats:
+    """Outcomes and latencies of one scenario"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def record(self, started: float, ok: bool, status: Optional[int] = None, error: Optional[str] = None) -> None:
+        if ok:
+            self.latencies.append(time.perf_counter() - started)
+        elif status in REJECTED_STATUSES:
+            self.rejected += 1
+        else:
+            self.errors += 1
+            self.last_error = error or f"HTTP {status}"
+
+    def to_dict(self, seconds: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        requests = len(latencies) + self.errors + self.rejected
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000.0, 1)
+
+        return {
+            "requests": requests,
+            "ok": len(latencies),
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "error_rate": round(self.errors / requests, 4) if requests else 0.0,
+            "rps": round(len(latencies) / seconds, 2) if seconds > 0 else 0.0,
+            "p50_ms": percentile(0.50),
+            "p90_ms": percentile(0.90),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(latencies[-1] * 1000.0, 1) if latencies else None,
+            "last_error": self.last_error
+        }
+
+
+class ProcessSampler:
+    """CPU time and resident memory of a process and all its descendants, from /proc"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.peak_rss = 0
+        self._start: Optional[Tuple[float, float]] = None
+        self._last: Optional[Tuple[float, float]] = None
+
+    def _tree(self) -> List[int]:
+        parents: Dict[int, int] = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as handle:
+                        # Fields after the parenthesised command name: state, ppid, ...
+                        parents[int(entry)] = int(handle.read().rsplit(")", 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+        tree, frontier = [self.pid], [self.pid]
+        while frontier:
+            children = [pid for pid, parent in parents.items() if parent in frontier]
+            tree.extend(children)
+            frontier = children
+        return tree
+
+    def sample(self) -> None:
+        cpu, rss = 0.0, 0
+        for pid in self._tree():
+            try:
+                with open(f"/proc/{pid}/stat") as handle:
+                    fields = handle.read().rsplit(")", 1)[1].split()
+                with open(f"/proc/{pid}/statm") as handle:
+                    resident = int(handle.read().split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            # utime and stime: fields 14 and 15 of stat, counted from after the command name
+            cpu += (int(fields[11]) + int(fields[12])) / self.ticks
+            rss += resident * self.page_size
+        self.peak_rss = max(self.peak_rss, rss)
+        self._last = (time.perf_counter(), cpu)
+        if self._start is None:
+            self._start = self._last
+
+    async def run(self, interval: float = 0.5) -> None:
+        while True:
+            self.sample()
+            await asyncio.sleep(interval)
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self._start is None or self._last is None or self._last[0] <= self._start[0]:
+            return {}
+        cpu_seconds = self._last[1] - self._start[1]
+        return {
+            "cpu_seconds": round(cpu_seconds, 2),
+            # 1.0 is one core fully busy
+            "cpu_cores": round(cpu_seconds / (self._last[0] - self._start[0]), 2),
+            "peak_rss_mb": round(self.peak_rss / 2 ** 20, 1)
+        }
+
+
+async def slider(http: httpx.AsyncClient, ws_url: str, stats: ScenarioStats, rng: random.Random,
+                 deadline: float) -> None:
+    """One slider drag: ring size (or band width) stepped back and forth over a delta /ws session"""
+    parameters = VARIANTS["ring"](rng)
+    name, values = rng.choice([("ring_size", [4 + step * 0.25 for step in range(41)]),
+                               ("band_width", [1.5 + step * 0.25 for step in range(35)])])
+    start = rng.randrange(len(values))
+    # Towards the longer side, stopping at the end of the range as a slider does
+    direction = 1 if start < len(values) // 2 else -1
+    steps = [values[min(max(start + direction * step, 0), len(values) - 1)] for step in range(rng.randint(8, 30))]
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        seq = None
+        for value in steps:
+            if time.perf_counter() > deadline:
+                return
+            started = time.perf_counter()
+            await ws.send(json.dumps({
+                "type": "parametric_jewelry", "delta": True, "base": seq, "quantum": 0.0001,
+                "data": {"jewelry_type": "ring", "parameters": {**parameters, name: value}}
+            }))
+            try:
+                reply = json.loads(await ws.recv())
+            except websockets.ConnectionClosed as e:
+                stats.record(started, False, error=f"socket closed: {e}")
+                return
+            data = reply.get("data", {})
+            ok = reply.get("type") == "parametric_delta" and data.get("success", False)
+            # Errors come back as frames with the HTTP status the endpoint would have used
+            stats.record(started, ok, data.get("status"), None if ok else json.dumps(reply)[:200])
+            if ok:
+                seq = data["model_data"]["seq"]
+
+
+async def variants(http: httpx.AsyncClient, ws_url: str, stats: ScenarioStats, rng: random.Random,
+                   deadline: float) -> None:
+    """One catalogue variant over HTTP, in either geometry encoding"""
+    jewelry_type = rng.choice(list(VARIANTS))
+    await post(http, "/api/parametric-jewelry", {
+        "jewelry_type": jewelry_type,
+        "parameters": VARIANTS[jewelry_type](rng),
+        "include_attributes": rng.random() < 0.3,
+        "geometry_encoding": rng.choice(["json", "quantized"])
+    }, stats)
+
+
+async def ai(http: httpx.AsyncClient, ws_url: str, stats: ScenarioStats, rng: random.Random,
+             deadline: float, repeat: float = 0.5) -> None:
+    """One AI generation; repeated prompts exercise the prompt cache and stored designs"""
+    prompt = rng.choice(PROMPTS)
+    if rng.random() >= repeat:
+        prompt = f"{prompt}, {rng.choice(PROMPT_VARIATIONS).format(n=rng.randint(2, 40))}"
+    await post(http, "/api/generate-jewelry", {"prompt": prompt}, stats)
+
+
+async def post(http: httpx.AsyncClient, path: str, payload: Dict[str, Any], stats: ScenarioStats) -> None:
+    started = time.perf_counter()
+    try:
+        response = await http.post(path, json=payload)
+    except httpx.HTTPError as e:
+        stats.record(started, False, error=repr(e))
+        return
+    try:
+        ok = response.status_code == 200 and response.json().get("success", False)
+    except ValueError:
+        ok = False
+    # A 200 can still be a failure ("success": false), so keep its body
+    stats.record(started, ok, response.status_code, None if ok or response.status_code != 200 else response.text[:200])
+
+
+Scenario = Callable[[httpx.AsyncClient, str, ScenarioStats, random.Random, float], Awaitable[None]]
+
+
+async def virtual_user(index: int, http: httpx.AsyncClient, ws_url: str, scenarios: Dict[str, Scenario],
+                       results: Dict[str, ScenarioStats], mix: Dict[str, float], seed: int, deadline: float) -> None:
+    rng = random.Random(seed * 1000 + index)
+    names = [name for name in mix if mix[name] > 0]
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        try:
+            await scenarios[name](http, ws_url, results[name], rng, deadline)
+        except Exception as e:
+            # A scenario that failed outside a request (e.g. the socket never opened)
+            results[name].record(time.perf_counter(), False, error=repr(e))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float) -> None:
+    """Poll until the URL answers 200"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not answer within {timeout:.0f}s")
+
+
+def start_stack(args: argparse.Namespace, data_dir: str) -> Tuple[List[subprocess.Popen], str, int]:
+    """Fake OpenAI plus backend subprocesses; returns them, the backend URL and the backend pid"""
+    llm_port, port = free_port(), free_port()
+    fake = subprocess.Popen([sys.executable, "tools/fake_openai.py", "--port", str(llm_port),
+                             "--latency", str(args.llm_latency), "--jitter", str(args.llm_jitter),
+                             "--fail-rate", str(args.llm_fail_rate), "--token-delay", str(args.llm_token_delay)],
+                            cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    env = dict(os.environ,
+               OPENAI_API_KEY="load-test",
+               OPENAI_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+               DESIGN_STORE_DIR=os.path.join(data_dir, "designs"),
+               PROMPT_CACHE_PATH=os.path.join(data_dir, "prompt_cache.npz"),
+               WEB_CONCURRENCY=str(args.workers),
+               BACKEND_HOST="127.0.0.1",
+               BACKEND_PORT=str(port))
+    env.pop("PROMPT_CACHE_RING", None)
+    if not args.client_limits:
+        env.update(CLIENT_CPU_MS_PER_SECOND="1e9", CLIENT_CPU_MS_BURST="1e9")
+    log = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    backend = subprocess.Popen([sys.executable, "main.py"], cwd=BACKEND_DIR, env=env, stdout=log,
+                               stderr=subprocess.STDOUT)
+    processes = [backend, fake]
+    try:
+        wait_for(f"http://127.0.0.1:{llm_port}/v1/models", 10.0)
+        wait_for(f"http://127.0.0.1:{port}/api/ready", args.ready_timeout)
+    except Exception:
+        stop_stack(processes)
+        raise
+    return processes, f"http://127.0.0.1:{port}", backend.pid
+
+
+def stop_stack(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run_load(args: argparse.Namespace, url: str, pid: Optional[int]) -> Dict[str, Any]:
+    results = {name: ScenarioStats() for name in SCENARIOS}
+    scenarios = {"slider": slider, "variants": variants, "ai": partial(ai, repeat=args.ai_repeat)}
+    ws_url = url.replace("http", "ws", 1) + "/ws"
+    sampler = ProcessSampler(pid) if pid else None
+    sampling = asyncio.create_task(sampler.run()) if sampler else None
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as http:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(virtual_user(index, http, ws_url, scenarios, results, args.mix, args.seed, deadline)
+                               for index in range(args.users)))
+        seconds = time.perf_counter() - started
+    if sampling is not None:
+        sampling.cancel()
+        sampler.sample()
+    rows = {name: stats.to_dict(seconds) for name, stats in results.items() if args.mix.get(name, 0) > 0}
+    requests = sum(row["requests"] for row in rows.values())
+    errors = sum(row["errors"] for row in rows.values())
+    return {
+        "seconds": round(seconds, 2),
+        "users": args.users,
+        "workers": args.workers if not args.url else None,
+        "scenarios": rows,
+        "total": {
+            "requests": requests,
+            "rps": round(sum(row["ok"] for row in rows.values()) / seconds, 2),
+            "errors": errors,
+            "rejected": sum(row["rejected"] for row in rows.values()),
+            "error_rate": round(errors / requests, 4) if requests else 0.0
+        },
+        "server": sampler.to_dict() if sampler else {}
+    }
+
+
+def check_gates(report: Dict[str, Any], args: argparse.Namespace) -> List[str]:
+    """Release gates that the run missed"""
+    failures = []
+    for name, limit in args.max_p99_ms.items():
+        p99 = report["scenarios"].get(name, {}).get("p99_ms")
+        if p99 is None or p99 > limit:
+            failures.append(f"{name} p99 {p99} ms > {limit} ms")
+    if args.max_error_rate is not None and report["total"]["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {report['total']['error_rate']} > {args.max_error_rate}")
+    if args.min_rps is not None and report["total"]["rps"] < args.min_rps:
+        failures.append(f"throughput {report['total']['rps']} rps < {args.min_rps} rps")
+    return failures
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"[load_test.py] {report['users']} users for {report['seconds']} s")
+    for name, row in report["scenarios"].items():
+        print(f"[load_test.py] {name:9s} requests={row['requests']:6d}  rps={row['rps']:8.2f}  "
+              f"p50={row['p50_ms']} ms  p90={row['p90_ms']} ms  p99={row['p99_ms']} ms  max={row['max_ms']} ms  "
+              f"errors={row['errors']}  rejected={row['rejected']}")
+        if row["last_error"]:
+            print(f"[load_test.py]           last error: {row['last_error']}")
+    total = report["total"]
+    print(f"[load_test.py] total     requests={total['requests']:6d}  rps={total['rps']:8.2f}  "
+          f"error_rate={total['error_rate']:.2%}  rejected={total['rejected']}")
+    server = report["server"]
+    if server:
+        print(f"[load_test.py] server    cpu={server['cpu_cores']:.2f} cores ({server['cpu_seconds']} s)  "
+              f"peak_rss={server['peak_rss_mb']} MB")
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """Comma-separated scenario=value pairs (e.g. slider=5,ai=2) as a dict"""
+    weights = {}
+    for item in filter(None, text.split(",")):
+        name, _, value = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r} (expected one of {', '.join(SCENARIOS)})")
+        weights[name] = float(value)
+    return weights
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--users", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--mix", type=parse_weights, default=parse_weights("slider=5,variants=3,ai=2"),
+                        help="scenario weights, e.g. slider=5,variants=3,ai=2")
+    parser.add_argument("--ai-repeat", type=float, default=0.5, help="fraction of AI prompts repeated verbatim")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--workers", type=int, default=1, help="backend worker processes (WEB_CONCURRENCY)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake upstream response time (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="fake upstream +/- jitter (s)")
+    parser.add_argument("--llm-fail-rate", type=float, default=0.0, help="fraction of failed upstream calls")
+    parser.add_argument("--llm-token-delay", type=float, default=0.03, help="delay between streamed chunks (s)")
+    parser.add_argument("--client-limits", action="store_true", help="keep the per-client CPU budgets")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="seconds to wait for /api/ready")
+    parser.add_argument("--server-log", help="write the backend's output here")
+    parser.add_argument("--url", help="load an already running backend instead of starting one")
+    parser.add_argument("--pid", type=int, help="with --url: backend pid to sample CPU and memory from")
+    parser.add_argument("--json", help="also write the report here")
+    parser.add_argument("--max-p99-ms", type=parse_weights, default={},
+                        help="gate, e.g. slider=200,variants=400")
+    parser.add_argument("--max-error-rate", type=float, help="gate on the overall error rate")
+    parser.add_argument("--min-rps", type=float, help="gate on overall successful requests per second")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        processes: List[subprocess.Popen] = []
+        if args.url:
+            url, pid = args.url.rstrip("/"), args.pid
+        else:
+            print(f"[load_test.py] Starting fake OpenAI and backend ({args.workers} worker(s))...")
+            processes, url, pid = start_stack(args, data_dir)
+        try:
+            report = asyncio.run(run_load(args, url, pid))
+        finally:
+            stop_stack(processes)
+
+    print_report(report)
+    failures = check_gates(report, args)
+    report["gate_failures"] = failures
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+    for failure in failures:
+        print(f"[load_test.py] GATE FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Compare LLM token use and latency of the full and compact prompt modes.
+
+Usage (from backend/):
+    python tools/prompt_token_report.py [--repeats 3]
+
+Sample descriptions go through AIPromptProcessor.process_prompt in both
+modes, against whatever OPENAI_BASE_URL points at. Input and output tokens
+come from the API's usage report. To run offline, start
+    python tools/fake_openai.py --output-rate 40
+and set OPENAI_BASE_URL=http://127.0.0.1:8100/v1.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ai_prompt_processor import AIPromptProcessor
+from utils.llm_client import LLMClient
+
+SAMPLES = [
+    "A modern gold ring with a large diamond center stone",
+    "Vintage silver necklace with geometric pendant",
+    "Rose gold earrings with multiple small sapphires",
+    "Chunky platinum cuff bracelet, about 12mm wide",
+    "Thin braided band, size 7, with a row of tiny rubies",
+    "Long figaro chain with a small organic pendant",
+    "Simple hoop earrings",
+    "Eternity ring set with emeralds all the way around"
+]
+
+
+async def measure(client: LLMClient, mode: str, repeats: int) -> Dict[str, Any]:
+    processor = AIPromptProcessor(client, prompt_mode=mode)
+    input_tokens: List[int] = []
+    output_tokens: List[int] = []
+    latencies: List[float] = []
+    for _ in range(repeats):
+        for prompt in SAMPLES:
+            prompt_before, completion_before = client.prompt_tokens, client.completion_tokens
+            started = time.perf_counter()
+            # The UI always sends jewelry_type="ring"; keep that default here
+            await processor.process_prompt(prompt)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            input_tokens.append(client.prompt_tokens - prompt_before)
+            output_tokens.append(client.completion_tokens - completion_before)
+    latencies.sort()
+    return {
+        "input": sum(input_tokens) / len(input_tokens),
+        "output": sum(output_tokens) / len(output_tokens),
+        "mean_ms": sum(latencies) / len(latencies),
+        "p95_ms": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+    }
+
+
+async def main(repeats: int) -> None:
+    client = LLMClient.from_env(os.getenv("OPENAI_API_KEY", "test"))
+    # Hedged duplicates would blur both the token counts and the latencies
+    client.hedge_percentile = None
+    try:
+        results = {mode: await measure(client, mode, repeats) for mode in ("full", "compact")}
+    finally:
+        await client.aclose()
+    for mode, row in results.items():
+        print(f"[prompt_token_report.py] {mode:8s} input={row['input']:7.1f} tok  output={row['output']:6.1f} tok  "
+              f"mean={row['mean_ms']:7.1f} ms  p95={row['p95_ms']:7.1f} ms")
+    full, compact = results["full"], results["compact"]
+    for key, label in (("input", "input tokens"), ("output", "output tokens"), ("mean_ms", "mean latency")):
+        if full[key]:
+            print(f"[prompt_token_report.py] {label}: {100.0 * (1 - compact[key] / full[key]):.0f}% lower in compact mode")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the sample descriptions")
+    args = parser.parse_args()
+    import builtins
+    # The processor logs every call; keep the report readable
+    quiet_print = builtins.print
+    builtins.print = lambda *args, **kwargs: None if not str(args[0] if args else "").startswith(
+        "[prompt_token_report.py]") else quiet_print(*args, **kwargs)
+    asyncio.run(main(args.repeats))
@@ -0,0 +1,111 @@
+"""Measure how long a fresh backend process takes to import and to serve.
+
+Usage (from backend/):
+    python tools/startup_benchmark.py [--runs 5] [--top 10] [--no-serve]
+
+Each run starts a new interpreter, so nothing is warm but the OS page
+cache. Reported per run:
+    import   `import main` (module loading and component setup)
+    ready    uvicorn started until GET /api/ready first answers 200 (after warm-up)
+and the modules with the largest cumulative import time (-X importtime)
+from one extra run. OPENAI_API_KEY is blanked in the child environment
+unless --with-llm is given, as for a parametric-only deployment.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def child_environment(store_dir: str, with_llm: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    if not with_llm:
+        # main.py loads backend/.env, which never overrides a variable already set
+        env["OPENAI_API_KEY"] = ""
+    # A throwaway store and prompt cache, so runs neither read nor grow the real ones
+    env["DESIGN_STORE_DIR"] = store_dir
+    env["PROMPT_CACHE_PATH"] = os.path.join(store_dir, "prompt_cache.npz")
+    env.pop("PROMPT_CACHE_RING", None)
+    return env
+
+
+def time_import(env: Dict[str, str]) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_ready(env: Dict[str, str], timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn until the app answers"""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                               "--log-level", "warning"], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/ready", timeout=1.0) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            # Connection refused, or 503 while warming up (HTTPError is an OSError)
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"Server did not answer within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def slowest_imports(env: Dict[str, str], top: int) -> List[Tuple[float, str]]:
+    """(cumulative seconds, module) for the top-level imports main.py pulls in"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Direct imports of main only (one level of nesting), so times don't double count
+        if name.startswith("   ") and not name.startswith("     "):
+            rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(runs: int, top: int, serve: bool, with_llm: bool) -> None:
+    with tempfile.TemporaryDirectory() as store_dir:
+        env = child_environment(store_dir, with_llm)
+        imports = [time_import(env) for _ in range(runs)]
+        print(f"[startup_benchmark.py] import  median={statistics.median(imports) * 1000:7.1f} ms  "
+              f"min={min(imports) * 1000:7.1f} ms  max={max(imports) * 1000:7.1f} ms")
+        if serve:
+            ready = [time_ready(env) for _ in range(runs)]
+            print(f"[startup_benchmark.py] ready   median={statistics.median(ready) * 1000:7.1f} ms  "
+                  f"min={min(ready) * 1000:7.1f} ms  max={max(ready) * 1000:7.1f} ms")
+        for seconds, name in slowest_imports(env, top):
+            print(f"[startup_benchmark.py]   {seconds * 1000:7.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--no-serve", dest="serve", action="store_false", help="skip the time-to-ready runs")
+    parser.add_argument("--with-llm", action="store_true", help="keep OPENAI_API_KEY in the environment")
+    args = parser.parse_args()
+    main(args.runs, args.top, args.serve, args.with_llm)
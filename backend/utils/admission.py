@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Callable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# How many queued seconds one predicted CPU-second is worth when ordering the
+# queue: cheap requests jump ahead of expensive ones, but every request's
+# position still advances with waiting time, so nothing starves
+COST_WEIGHT = 20.0
+
+
+class AdmissionError(Exception):
+    """Request refused before it runs; maps onto an HTTP status"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    def headers(self) -> Dict[str, str]:
+        if self.retry_after is None:
+            return {}
+        return {"Retry-After": str(max(int(self.retry_after + 0.999), 1))}
+
+
+class ClientBudget:
+    """Token bucket of CPU milliseconds for one client"""
+
+    __slots__ = ("tokens", "updated", "queued")
+
+    def __init__(self, capacity_ms: float):
+        self.tokens = capacity_ms
+        self.updated = time.monotonic()
+        self.queued = 0
+
+
+class AdmissionController:
+    """Cost-aware admission control in front of the geometry workers.
+
+    At most max_concurrent requests run at once. The rest wait in a priority
+    queue ordered by arrival time plus weighted predicted cost. Every client
+    draws predicted CPU time from its own token bucket, so one client's batch
+    work can't starve everyone else's interactive requests.
+
+    The workers are a thread pool of max_concurrent threads (executor): an
+    admitted request owns one of them, so its geometry work (run) starts at
+    once and never waits behind anything but other admitted requests, while
+    the event loop stays free for I/O and cache hits.
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_queue: int = 64,
+                 client_rate_ms: float = 500.0, client_burst_ms: float = 5000.0,
+                 client_max_queued: int = 8, max_clients: int = 10000):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.client_rate_ms = client_rate_ms
+        self.client_burst_ms = client_burst_ms
+        self.client_max_queued = client_max_queued
+        self.max_clients = max_clients
+        self._running = 0
+        self._queue: List[Tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._clients: Dict[str, ClientBudget] = {}
+        self.executor = ThreadPoolExecutor(max_workers=max(max_concurrent, 1), thread_name_prefix="geometry")
+        self.admitted = 0
+        self.rejected = 0
+
+    def _budget(self, client_id: str) -> ClientBudget:
+        budget = self._clients.get(client_id)
+        now = time.monotonic()
+        if budget is None:
+            if len(self._clients) >= self.max_clients:
+                # Forget idle clients whose buckets have refilled anyway
+                for key in [key for key, value in self._clients.items() if value.queued == 0]:
+                    del self._clients[key]
+            budget = self._clients[client_id] = ClientBudget(self.client_burst_ms)
+        budget.tokens = min(self.client_burst_ms,
+                            budget.tokens + (now - budget.updated) * self.client_rate_ms / 1000.0)
+        budget.updated = now
+        return budget
+
+    def _check(self, client_id: str, cost_ms: float) -> ClientBudget:
+        budget = self._budget(client_id)
+        # A request costlier than the whole burst is let through on a full bucket
+        needed = min(cost_ms, self.client_burst_ms)
+        if budget.tokens < needed:
+            self.rejected += 1
+            retry_after = (needed - budget.tokens) / self.client_rate_ms
+            raise AdmissionError(429, f"Client geometry budget exhausted ({cost_ms:.0f} ms requested)",
+                                 retry_after)
+        if budget.queued >= self.client_max_queued:
+            self.rejected += 1
+            raise AdmissionError(429, "Too many queued requests for this client", 1.0)
+        if self._running >= self.max_concurrent and len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionError(503, "Geometry queue is full", 1.0)
+        return budget
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, cost_ms: float):
+        """Wait for a worker slot, charging the client's budget; yields once admitted"""
+        budget = self._check(client_id, cost_ms)
+        budget.tokens -= cost_ms
+        budget.queued += 1
+        try:
+            if self._running >= self.max_concurrent or self._queue:
+                priority = time.monotonic() + COST_WEIGHT * cost_ms / 1000.0
+                waiter = asyncio.get_running_loop().create_future()
+                entry = (priority, next(self._order), waiter)
+                heapq.heappush(self._queue, entry)
+                try:
+                    await waiter
+                except BaseException:
+                    if waiter.done() and not waiter.cancelled():
+                        # Slot was handed over just as we were cancelled; pass it on
+                        self._release()
+                    elif entry in self._queue:
+                        self._queue.remove(entry)
+                        heapq.heapify(self._queue)
+                    # Never ran, so nothing is charged
+                    budget.tokens += cost_ms
+                    raise
+            else:
+                self._running += 1
+        finally:
+            budget.queued -= 1
+
+        self.admitted += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Settle the bucket against the time actually used
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self._budget(client_id).tokens -= elapsed_ms - cost_ms
+            self._release()
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run blocking geometry work (serialization, say) on the worker pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def _release(self) -> None:
+        while self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                # The slot passes straight to the next waiter
+                waiter.set_result(None)
+                return
+        self._running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "queued": len(self._queue),
+            "clients": len(self._clients),
+            "admitted": self.admitted,
+            "rejected": self.rejected
+        }
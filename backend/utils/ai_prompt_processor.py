@@ -1,45 +1,16 @@
-import openai
 import os
+import re
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 import asyncio
+import time
 
-class AIPromptProcessor:
-    def __init__(self):
-        # Fix OpenAI client initialization
-        print("[ai_prompt_processor.py] AIPromptProcessor initialized.")
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable is required")
-        
-        # Initialize OpenAI client with proper error handling
-        try:
-            self.openai_client = openai.AsyncOpenAI(api_key=api_key)
-        except Exception as e:
-            print(f"Error initializing OpenAI client: {e}")
-            self.openai_client = None
-        
-    async def process_prompt(self, prompt: str, jewelry_type: str = "ring", 
-                           style: str = "modern", material: str = "gold") -> Dict[str, Any]:
-        """Process natural language prompt into structured jewelry parameters"""
-        print(f"[ai_prompt_processor.py] process_prompt called with: {prompt}, {jewelry_type}, {style}, {material}")
-        
-        # Create enhanced prompt for AI processing
-        enhanced_prompt = self._create_enhanced_prompt(prompt, jewelry_type, style, material)
-        
-        try:
-            # Check if OpenAI client is available
-            if not self.openai_client:
-                print("OpenAI client not available, using fallback")
-                return self._create_default_parameters(prompt, jewelry_type, style, material)
-        
-            # Use OpenAI to extract parameters
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a jewelry design expert. Extract specific parameters from natural language descriptions of jewelry. Return only valid JSON with the following structure:
+from models.parameter_schema import PARAMETER_SCHEMAS, ParameterError, normalize_parameters
+from utils.llm_client import LLMClient, LLMError
+from utils.incremental_json import IncrementalJSONParser
+from utils.prompt_cache import PromptCache
+
+SYSTEM_PROMPT = """You are a jewelry design expert. Extract specific parameters from natural language descriptions of jewelry. Return only valid JSON with the following structure:
 {
     "jewelry_type": "ring|necklace|earrings|bracelet",
     "style": "modern|vintage|classic|artistic",
@@ -63,31 +34,391 @@ class AIPromptProcessor:
     "width": 5.0,
     "band_style": "plain|carved|braided"
 }"""
-                    },
-                    {
-                        "role": "user",
-                        "content": enhanced_prompt
-                    }
-                ],
+
+BATCH_INSTRUCTIONS = """You will receive several descriptions as JSON: {"descriptions": [{"id": 0, "text": "..."}, ...]}.
+Return only valid JSON of the form {"results": [...]} with one object per description, each with the structure above plus the "id" of its description."""
+
+# Compact mode: once the type is known only its fields are requested, through
+# function calling, so the reply is always a JSON object of known fields
+COMPACT_SYSTEM_PROMPT = "Extract jewelry parameters from the description. Set only fields it implies. Lengths in mm."
+COMPACT_MAX_TOKENS = 150
+COMMON_FIELDS: Dict[str, Dict[str, Any]] = {
+    "style": {"enum": ["modern", "vintage", "classic", "artistic"]},
+    "material": {"enum": ["gold", "silver", "platinum", "rose_gold"]},
+    "complexity": {"enum": ["simple", "medium", "complex"]}
+}
+FIELD_CHOICES = {"stone_type": ["diamond", "ruby", "emerald", "sapphire"]}
+
+# Checked in order: "bracelet band" and "chain bracelet" are bracelets
+TYPE_KEYWORDS = [
+    ("bracelet", {"bracelet", "bracelets", "bangle", "bangles", "cuff", "cuffs"}),
+    ("earrings", {"earring", "earrings", "stud", "studs", "hoop", "hoops"}),
+    ("necklace", {"necklace", "necklaces", "chain", "pendant"}),
+    ("ring", {"ring", "rings", "band", "engagement"})
+]
+
+
+def _compact_property(spec: Dict[str, Any]) -> Dict[str, Any]:
+    # Optional fields are anyOf [value, null]; the null branch is implied.
+    # Bounds are left out: normalize_parameters enforces them on the reply
+    branch = next((option for option in spec.get("anyOf", [spec]) if option.get("type") != "null"), spec)
+    if "enum" in branch:
+        return {"enum": branch["enum"]}
+    compact = {"type": branch["type"]}
+    description = spec.get("description", "").replace("mm", "").strip(" ()")
+    if description:
+        compact["description"] = description
+    return compact
+
+
+def _parameters_tool(jewelry_type: str) -> Dict[str, Any]:
+    """Function-calling tool whose arguments are one template's parameters"""
+    properties = dict(COMMON_FIELDS)
+    for name, spec in PARAMETER_SCHEMAS[jewelry_type].model_json_schema()["properties"].items():
+        properties[name] = _compact_property(spec)
+        if name in FIELD_CHOICES:
+            properties[name] = {"enum": FIELD_CHOICES[name]}
+    return {
+        "type": "function",
+        "function": {
+            "name": f"set_{jewelry_type}_parameters",
+            "parameters": {"type": "object", "properties": properties}
+        }
+    }
+
+
+PARAMETER_TOOLS = {jewelry_type: _parameters_tool(jewelry_type) for jewelry_type in PARAMETER_SCHEMAS}
+
+
+def _detect_jewelry_type(prompt: str) -> Optional[str]:
+    words = set(re.findall(r"[a-z]+", prompt.lower()))
+    return next((jewelry_type for jewelry_type, keywords in TYPE_KEYWORDS if words & keywords), None)
+
+
+def _tool_arguments(completion: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments of the first tool call (or a JSON content reply from servers without tools)"""
+    message = completion["choices"][0]["message"]
+    calls = message.get("tool_calls")
+    arguments = json.loads(calls[0]["function"]["arguments"] if calls else message["content"])
+    if not isinstance(arguments, dict):
+        raise TypeError("tool arguments are not an object")
+    return arguments
+
+
+# Extra deadline per packed description, on top of the client's timeout
+BATCH_SECONDS_PER_ITEM = 5.0
+BATCH_TOKENS_PER_ITEM = 300
+
+
+class BatchReport:
+    """Throughput and upstream token use of a bulk extraction"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.prompts = 0
+        self.llm_items = 0
+        self.cached_items = 0
+        self.fallback_items = 0
+        self.llm_requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        seconds = (self.finished or time.perf_counter()) - self.started
+        tokens = self.prompt_tokens + self.completion_tokens
+        return {
+            "prompts": self.prompts,
+            "llm": self.llm_items,
+            "cached": self.cached_items,
+            "fallback": self.fallback_items,
+            "llm_requests": self.llm_requests,
+            "seconds": round(seconds, 3),
+            "prompts_per_second": round(self.prompts / seconds, 2) if seconds > 0 else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_prompt": round(tokens / self.prompts, 1) if self.prompts else 0.0
+        }
+
+
+class AIPromptProcessor:
+    def __init__(self, llm_client: Optional[LLMClient] = None, prompt_cache: Optional[PromptCache] = None,
+                 prompt_mode: Optional[str] = None):
+        print("[ai_prompt_processor.py] AIPromptProcessor initialized.")
+        api_key = os.getenv("OPENAI_API_KEY")
+        if llm_client is None and not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+        
+        # Pooled client with deadlines, retries, hedging and a circuit breaker
+        self.llm_client = llm_client or LLMClient.from_env(api_key)
+        # Near-duplicate prompts reuse an earlier extraction instead of calling the LLM
+        self.prompt_cache = prompt_cache
+        # "compact" (per-type schema via function calling) or "full" (one schema for every type)
+        self.prompt_mode = prompt_mode or os.getenv("LLM_PROMPT_MODE", "compact")
+        
+    async def process_prompt(self, prompt: str, jewelry_type: str = "ring", 
+                           style: str = "modern", material: str = "gold") -> Dict[str, Any]:
+        """Process natural language prompt into structured jewelry parameters"""
+        print(f"[ai_prompt_processor.py] process_prompt called with: {prompt}, {jewelry_type}, {style}, {material}")
+        
+        cached = self._cached_parameters(prompt, jewelry_type, style, material)
+        if cached is not None:
+            return cached
+        
+        compact = self._compact_request(prompt, jewelry_type, style, material)
+        if compact is not None:
+            base, request = compact
+            try:
+                completion = await self.llm_client.complete(**request)
+                parameters = {**base, **_tool_arguments(completion)}
+            except LLMError as e:
+                print(f"[ai_prompt_processor.py] LLM unavailable, using fallback parser: {e}")
+                return self._create_default_parameters(prompt, base["jewelry_type"], style, material)
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                print(f"[ai_prompt_processor.py] Unreadable tool call, using fallback parser: {e!r}")
+                return self._create_default_parameters(prompt, base["jewelry_type"], style, material)
+            if self.prompt_cache is not None:
+                self.prompt_cache.put(prompt, (jewelry_type, style, material), parameters)
+            parameters["original_prompt"] = prompt
+            return parameters
+        
+        # Create enhanced prompt for AI processing
+        enhanced_prompt = self._create_enhanced_prompt(prompt, jewelry_type, style, material)
+        
+        try:
+            # Use the LLM to extract parameters
+            content = await self.llm_client.chat(
+                messages=self._build_messages(enhanced_prompt),
                 temperature=0.3,
                 max_tokens=500
             )
             
             # Parse the response
-            content = response.choices[0].message.content
             try:
                 parameters = json.loads(content)
+                if self.prompt_cache is not None and isinstance(parameters, dict):
+                    self.prompt_cache.put(prompt, (jewelry_type, style, material), parameters)
                 parameters["original_prompt"] = prompt
                 return parameters
             except json.JSONDecodeError:
                 # Fallback to default parameters
                 return self._create_default_parameters(prompt, jewelry_type, style, material)
                 
+        except LLMError as e:
+            print(f"[ai_prompt_processor.py] LLM unavailable, using fallback parser: {e}")
+            return self._create_default_parameters(prompt, jewelry_type, style, material)
         except Exception as e:
             print(f"AI processing error: {e}")
             # Fallback to default parameters
             return self._create_default_parameters(prompt, jewelry_type, style, material)
     
+    async def stream_prompt(self, prompt: str, jewelry_type: str = "ring",
+                            style: str = "modern", material: str = "gold") -> AsyncIterator[Dict[str, Any]]:
+        """Stream the parameter extraction, yielding each newly completed batch of fields.
+
+        The completion is parsed as it arrives, so "jewelry_type" and the core
+        dimensions are usually available long before the whole JSON object.
+        The last item is always the full parameter set (falling back to
+        _create_default_parameters for anything the LLM did not deliver),
+        marked with "complete": True.
+        """
+        print(f"[ai_prompt_processor.py] stream_prompt called with: {prompt}, {jewelry_type}, {style}, {material}")
+        cached = self._cached_parameters(prompt, jewelry_type, style, material)
+        if cached is not None:
+            yield {**cached, "complete": True}
+            return
+        
+        compact = self._compact_request(prompt, jewelry_type, style, material)
+        if compact is not None:
+            base, request = compact
+            messages = request.pop("messages")
+            # The type is already settled, which is what a preview needs first
+            yield dict(base)
+        else:
+            base = {}
+            enhanced_prompt = self._create_enhanced_prompt(prompt, jewelry_type, style, material)
+            messages = self._build_messages(enhanced_prompt)
+            request = {"temperature": 0.3, "max_tokens": 500}
+        parser = IncrementalJSONParser()
+        try:
+            async for delta in self.llm_client.stream_chat(messages=messages, **request):
+                completed = parser.feed(delta)
+                if completed:
+                    yield completed
+            if self.prompt_cache is not None and parser.complete:
+                self.prompt_cache.put(prompt, (jewelry_type, style, material), {**base, **parser.fields})
+        except LLMError as e:
+            print(f"[ai_prompt_processor.py] LLM stream failed, using fallback parser: {e}")
+        
+        parameters = self._create_default_parameters(prompt, base.get("jewelry_type", jewelry_type), style, material)
+        parameters.update(base)
+        if parser.fields:
+            parameters.update(parser.fields)
+        if parser.complete:
+            # Defaults only filled fields the LLM chose to leave out
+            parameters.pop("source", None)
+        parameters["original_prompt"] = prompt
+        yield {**parameters, "complete": True}
+    
+    async def process_batch(self, prompts: List[str], jewelry_type: str = "auto", style: str = "auto",
+                            material: str = "auto", batch_size: int = 20, concurrency: int = 4,
+                            report: Optional[BatchReport] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Extract parameters for many descriptions, yielding results as batches finish.
+
+        Uncached descriptions are packed batch_size to a chat completion, with
+        at most `concurrency` completions in flight. Each returned parameter
+        set is validated against its template schema; any item that is
+        missing or invalid (or whose whole batch failed) falls back to
+        _create_default_parameters. Results carry the input "index" and a
+        "source" of "cache", "llm" or "fallback".
+        """
+        report = report or BatchReport()
+        semaphore = asyncio.Semaphore(concurrency)
+        pending: List[int] = []
+        for index, prompt in enumerate(prompts):
+            report.prompts += 1
+            cached = self._cached_parameters(prompt, jewelry_type, style, material)
+            if cached is not None:
+                report.cached_items += 1
+                yield {"index": index, "prompt": prompt, "source": "cache", "parameters": cached}
+            else:
+                pending.append(index)
+        
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        tasks = [asyncio.ensure_future(self._extract_batch(prompts, batch, jewelry_type, style, material,
+                                                           semaphore, report))
+                 for batch in batches]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for result in await finished:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            report.finished = time.perf_counter()
+    
+    async def _extract_batch(self, prompts: List[str], batch: List[int], jewelry_type: str, style: str,
+                             material: str, semaphore: asyncio.Semaphore,
+                             report: BatchReport) -> List[Dict[str, Any]]:
+        request = {
+            "jewelry_type": jewelry_type,
+            "style": style,
+            "material": material,
+            "descriptions": [{"id": index, "text": prompts[index]} for index in batch]
+        }
+        extracted: Dict[int, Dict[str, Any]] = {}
+        async with semaphore:
+            try:
+                completion = await self.llm_client.complete(
+                    messages=[
+                        {"role": "system", "content": f"{SYSTEM_PROMPT}\n\n{BATCH_INSTRUCTIONS}"},
+                        {"role": "user", "content": json.dumps(request)}
+                    ],
+                    timeout=self.llm_client.timeout + BATCH_SECONDS_PER_ITEM * len(batch),
+                    hedge=False,
+                    temperature=0.3,
+                    max_tokens=BATCH_TOKENS_PER_ITEM * len(batch)
+                )
+                report.llm_requests += 1
+                usage = completion.get("usage") or {}
+                report.prompt_tokens += usage.get("prompt_tokens", 0)
+                report.completion_tokens += usage.get("completion_tokens", 0)
+                results = json.loads(completion["choices"][0]["message"]["content"])["results"]
+                for item in results if isinstance(results, list) else []:
+                    if isinstance(item, dict) and item.get("id") in batch:
+                        extracted[item.pop("id")] = item
+            except LLMError as e:
+                print(f"[ai_prompt_processor.py] Batch of {len(batch)} failed, using fallback parser: {e}")
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"[ai_prompt_processor.py] Unreadable batch reply, using fallback parser: {e!r}")
+        
+        results = []
+        for index in batch:
+            prompt = prompts[index]
+            parameters = extracted.get(index)
+            if parameters is not None and self._is_valid(parameters):
+                report.llm_items += 1
+                if self.prompt_cache is not None:
+                    self.prompt_cache.put(prompt, (jewelry_type, style, material), parameters)
+                source = "llm"
+            else:
+                report.fallback_items += 1
+                parameters = self._create_default_parameters(prompt, jewelry_type, style, material)
+                source = "fallback"
+            parameters["original_prompt"] = prompt
+            results.append({"index": index, "prompt": prompt, "source": source, "parameters": parameters})
+        return results
+    
+    def _is_valid(self, parameters: Dict[str, Any]) -> bool:
+        """Whether an extracted parameter set describes buildable geometry as given.
+
+        Strict, so an out-of-range or mistyped value sends the item to the
+        fallback parser instead of being cached as an LLM answer.
+        """
+        jewelry_type = parameters.get("jewelry_type")
+        if jewelry_type not in PARAMETER_SCHEMAS:
+            return False
+        try:
+            normalize_parameters(jewelry_type, parameters)
+        except ParameterError:
+            return False
+        return True
+    
+    def _compact_request(self, prompt: str, jewelry_type: str, style: str,
+                         material: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Base parameters and client arguments for a per-type extraction.
+
+        None in "full" mode, or when neither the description nor the request
+        names a known type. A type named in the description wins over the
+        request's, which the UI always sends.
+        """
+        if self.prompt_mode != "compact":
+            return None
+        jewelry_type = _detect_jewelry_type(prompt) or jewelry_type
+        if jewelry_type not in PARAMETER_TOOLS:
+            return None
+        base = {"jewelry_type": jewelry_type, "complexity": "medium"}
+        preferences = []
+        for name, value in (("style", style), ("material", material)):
+            if value and value != "auto":
+                base[name] = value
+                preferences.append(f"{name}={value}")
+        content = prompt if not preferences else f"{prompt}\nPreferred: {', '.join(preferences)}"
+        tool = PARAMETER_TOOLS[jewelry_type]
+        return base, {
+            "messages": [
+                {"role": "system", "content": COMPACT_SYSTEM_PROMPT},
+                {"role": "user", "content": content}
+            ],
+            "tools": [tool],
+            "tool_choice": {"type": "function", "function": {"name": tool["function"]["name"]}},
+            "temperature": 0.3,
+            "max_tokens": COMPACT_MAX_TOKENS
+        }
+    
+    def _cached_parameters(self, prompt: str, jewelry_type: str, style: str,
+                           material: str) -> Optional[Dict[str, Any]]:
+        if self.prompt_cache is None:
+            return None
+        parameters = self.prompt_cache.lookup(prompt, (jewelry_type, style, material))
+        if parameters is None:
+            return None
+        print(f"[ai_prompt_processor.py] Reusing cached extraction for: {prompt}")
+        parameters["original_prompt"] = prompt
+        return parameters
+    
+    def _build_messages(self, enhanced_prompt: str) -> List[Dict[str, str]]:
+        return [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": enhanced_prompt
+            }
+        ]
+    
     def _create_enhanced_prompt(self, prompt: str, jewelry_type: str, style: str, material: str) -> str:
         """Create enhanced prompt for AI processing"""
         
@@ -118,16 +449,7 @@ Return only valid JSON with the exact structure specified.
         
         # Extract jewelry type if not specified
         if jewelry_type == "auto":
-            if any(word in prompt_lower for word in ["ring", "band", "engagement"]):
-                jewelry_type = "ring"
-            elif any(word in prompt_lower for word in ["necklace", "chain", "pendant"]):
-                jewelry_type = "necklace"
-            elif any(word in prompt_lower for word in ["earrings", "earring", "stud", "hoop"]):
-                jewelry_type = "earrings"
-            elif any(word in prompt_lower for word in ["bracelet", "bangle", "cuff"]):
-                jewelry_type = "bracelet"
-            else:
-                jewelry_type = "ring"
+            jewelry_type = _detect_jewelry_type(prompt) or "ring"
         
         # Extract style
         if style == "auto":
@@ -184,7 +506,9 @@ Return only valid JSON with the exact structure specified.
             "style": style,
             "material": material,
             "complexity": "medium",
-            "original_prompt": prompt
+            "original_prompt": prompt,
+            # Keyword guess, not an LLM answer: not worth remembering for this prompt
+            "source": "fallback"
         }
         
         # Add type-specific parameters
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Dict, Any, Optional, Union
+
+from starlette.websockets import WebSocket
+
+# Frames waiting per connection before the slow-consumer policy applies
+DEFAULT_SEND_QUEUE = 32
+# "drop": discard the oldest broadcast frame to make room; "close": disconnect the client
+SLOW_CONSUMER_POLICIES = ("drop", "close")
+# RFC 6455 "try again later", sent to a client that could not keep up
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+Frame = Union[str, bytes]
+
+
+def encode_frame(message: Any) -> Frame:
+    """Serialize a message once; the same frame is queued for every recipient"""
+    return message if isinstance(message, (str, bytes)) else json.dumps(message)
+
+
+class Connection:
+    """One socket's outgoing frames and the task that writes them.
+
+    Callers never wait on a send: frames are queued and a writer task per
+    connection sends them in order, so a slow client only ever delays
+    itself. Broadcast frames may be dropped when the queue is full (oldest
+    first, as a newer design update supersedes them); replies to the
+    client's own requests never are. A client whose queue is full of
+    replies, or any full queue under the "close" policy, is disconnected.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue: int = DEFAULT_SEND_QUEUE, policy: str = "drop"):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        self.room: Optional[str] = None
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self._frames: deque = deque()  # (frame, droppable)
+        self._pending = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._frames)
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write())
+
+    def offer(self, frame: Frame, droppable: bool = True) -> bool:
+        """Queue a frame without waiting; False if it was refused and the connection closed"""
+        if self.closed:
+            return False
+        if len(self._frames) >= self.max_queue and not (self.policy == "drop" and self._drop_oldest()):
+            print(f"[connection_manager.py] Closing slow consumer {self.websocket.client} "
+                  f"({len(self._frames)} frames queued)")
+            self.close(SLOW_CONSUMER_CLOSE_CODE)
+            return False
+        self._frames.append((frame, droppable))
+        self._pending.set()
+        return True
+
+    def _drop_oldest(self) -> bool:
+        for index, (_, droppable) in enumerate(self._frames):
+            if droppable:
+                del self._frames[index]
+                self.dropped += 1
+                return True
+        return False
+
+    async def _write(self) -> None:
+        try:
+            while True:
+                while not self._frames:
+                    self._pending.clear()
+                    await self._pending.wait()
+                frame, _ = self._frames.popleft()
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Gone mid-send; the receive loop sees the disconnect and unregisters it
+            self.closed = True
+            self._frames.clear()
+
+    def close(self, code: Optional[int] = None) -> None:
+        """Stop writing; with a code, also close the socket (the client's receive loop then ends)"""
+        if self.closed and code is None:
+            return
+        self.closed = True
+        self._frames.clear()
+        if self._writer is not None:
+            self._writer.cancel()
+        if code is not None:
+            asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.websocket.close(code)
+        except Exception:
+            pass
+
+
+class ConnectionManager:
+    """WebSocket connections and the rooms (shared design sessions) they are in.
+
+    Connections and room members are dicts keyed by socket, so connecting,
+    joining and leaving are O(1). broadcast serializes a message once and
+    queues the same frame for every recipient without awaiting any send.
+    A room remembers the last frame broadcast to it, so a client joining
+    late can be sent the current design (catch_up).
+    """
+
+    def __init__(self, max_queue: int = DEFAULT_SEND_QUEUE, policy: str = "drop"):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.connections: Dict[WebSocket, Connection] = {}
+        self.rooms: Dict[str, Dict[WebSocket, Connection]] = {}
+        self.last_frames: Dict[str, Frame] = {}
+
+    async def connect(self, websocket: WebSocket) -> Connection:
+        await websocket.accept()
+        connection = Connection(websocket, self.max_queue, self.policy)
+        connection.start()
+        self.connections[websocket] = connection
+        return connection
+
+    def disconnect(self, websocket: WebSocket) -> None:
+        self.leave(websocket)
+        connection = self.connections.pop(websocket, None)
+        if connection is not None:
+            connection.close()
+
+    def join(self, websocket: WebSocket, room: str) -> int:
+        """Move a connection into a room (leaving any other); returns the member count"""
+        connection = self.connections[websocket]
+        if connection.room != room:
+            self.leave(websocket)
+            self.rooms.setdefault(room, {})[websocket] = connection
+            connection.room = room
+        return len(self.rooms[room])
+
+    def catch_up(self, websocket: WebSocket) -> bool:
+        """Queue the last frame broadcast to this connection's room; False if there is none"""
+        connection = self.connections.get(websocket)
+        last = self.last_frames.get(connection.room) if connection is not None and connection.room else None
+        return last is not None and connection.offer(last)
+
+    def leave(self, websocket: WebSocket) -> None:
+        connection = self.connections.get(websocket)
+        if connection is None or connection.room is None:
+            return
+        members = self.rooms.get(connection.room)
+        if members is not None:
+            members.pop(websocket, None)
+            if not members:
+                # Nobody left to catch up, so the room's state goes too
+                del self.rooms[connection.room]
+                self.last_frames.pop(connection.room, None)
+        connection.room = None
+
+    def room_of(self, websocket: WebSocket) -> Optional[str]:
+        connection = self.connections.get(websocket)
+        return connection.room if connection is not None else None
+
+    async def send_personal_message(self, message: Any, websocket: WebSocket) -> None:
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.offer(encode_frame(message), droppable=False)
+
+    async def broadcast(self, message: Any, room: Optional[str] = None,
+                        exclude: Optional[WebSocket] = None) -> int:
+        """Queue one frame for a room's members (every connection when room is None); returns how many took it"""
+        frame = encode_frame(message)
+        if room is not None:
+            if room not in self.rooms:
+                return 0
+            self.last_frames[room] = frame
+        members = self.rooms[room] if room is not None else self.connections
+        # Offering can close a connection, so iterate over a snapshot
+        return sum(connection.offer(frame) for websocket, connection in list(members.items())
+                   if websocket is not exclude)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.connections),
+            "rooms": len(self.rooms),
+            "queued": sum(connection.queued for connection in self.connections.values()),
+            "dropped": sum(connection.dropped for connection in self.connections.values())
+        }
+
+    @classmethod
+    def from_env(cls) -> "ConnectionManager":
+        return cls(
+            max_queue=int(os.getenv("WS_SEND_QUEUE_SIZE", str(DEFAULT_SEND_QUEUE))),
+            policy=os.getenv("WS_SLOW_CONSUMER_POLICY", "drop")
+        )
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from models.mesh import Model
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "designs")
+# Salts every design ID. Bump it with any change that alters the geometry built
+# for the same inputs (templates, decimation, attributes, optimization): IDs are
+# served as immutable ETags, so old designs must get new IDs, not new contents
+GEOMETRY_VERSION = 2
+# Store limits before the least recently used designs are evicted (0: unlimited)
+DEFAULT_MAX_DESIGNS = 20000
+DEFAULT_MAX_BYTES = 1 << 30
+# A design's last use is written at most this often (seconds), so hits stay read-only
+TOUCH_INTERVAL = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS designs (
+    id TEXT PRIMARY KEY,
+    jewelry_type TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    nbytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS prompts (
+    key TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    processed_prompt TEXT NOT NULL,
+    design_id TEXT NOT NULL REFERENCES designs(id),
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS prompts_design ON prompts(design_id);
+"""
+
+
+class DesignStore:
+    """Persistent generated designs: a SQLite index plus one packed model file each.
+
+    A design's ID is the hash of everything that determines its geometry and
+    appearance (type, normalized parameters, variant, style/material), so
+    the same design is stored once however it was requested. Blobs are
+    written once and never change, which is what lets the HTTP layer mark
+    them immutable. Prompts map to the design they produced, so repeating a
+    prompt skips both the LLM and the geometry.
+
+    Past max_designs or max_bytes, saving a design evicts the least recently
+    used ones, with the prompts that led to them.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, max_designs: int = DEFAULT_MAX_DESIGNS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_designs = max_designs
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "designs.sqlite3"), check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(designs)")}
+        if "used_at" not in columns:
+            # Stores created before eviction: existing designs count as unused
+            self._db.execute("ALTER TABLE designs ADD COLUMN used_at REAL NOT NULL DEFAULT 0")
+        self.reads = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "DesignStore":
+        return cls(
+            os.getenv("DESIGN_STORE_DIR", DEFAULT_STORE_DIR),
+            max_designs=int(os.getenv("DESIGN_STORE_MAX_DESIGNS", str(DEFAULT_MAX_DESIGNS))),
+            max_bytes=int(os.getenv("DESIGN_STORE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+        )
+
+    @staticmethod
+    def design_id(jewelry_type: str, parameters: Union[Dict[str, Any], BaseModel], attributes: bool = False,
+                  triangle_budget: Optional[int] = None, appearance: Optional[Dict[str, Any]] = None) -> str:
+        """Canonical hash of a design's inputs (128 bits, hex)"""
+        if isinstance(parameters, BaseModel):
+            parameters = parameters.model_dump()
+        canonical = json.dumps({
+            "geometry_version": GEOMETRY_VERSION,
+            "type": jewelry_type,
+            "parameters": parameters,
+            "variant": [triangle_budget, attributes],
+            "appearance": appearance or {}
+        }, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def is_design_id(value: str) -> bool:
+        return len(value) == 32 and all(char in "0123456789abcdef" for char in value)
+
+    def blob_path(self, design_id: str) -> str:
+        return os.path.join(self.root, "blobs", design_id[:2], f"{design_id}.jmdl")
+
+    def has(self, design_id: str) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM designs WHERE id = ?", (design_id,)).fetchone()
+        return row is not None
+
+    def save(self, design_id: str, model: Model, attributes: bool = False,
+             triangle_budget: Optional[int] = None) -> None:
+        """Store a design unless it already exists (blocking; run off the event loop)"""
+        path = self.blob_path(design_id)
+        if self.has(design_id) and os.path.exists(path):
+            return
+        # The prompt belongs to the request, not the design
+        metadata = {key: value for key, value in (model.metadata or {}).items() if key != "prompt"}
+        blob = Model(model.type, model.geometry, model.parameters, metadata or None).to_bytes()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write beside the target and rename so readers never see a partial blob
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(blob)
+        os.replace(temporary, path)
+        with self._lock:
+            now = time.time()
+            self._db.execute(
+                "INSERT OR IGNORE INTO designs (id, jewelry_type, parameters, variant, nbytes, created_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (design_id, model.type, json.dumps(model.parameters, default=str),
+                 json.dumps([triangle_budget, attributes]), len(blob), now, now)
+            )
+            evicted = self._evict(keep=design_id)
+        self.writes += 1
+        for evicted_id in evicted:
+            try:
+                # Workers that mapped it keep their mapping; the file goes when they let go
+                os.remove(self.blob_path(evicted_id))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, keep: str) -> list:
+        """Drop least recently used designs past the limits; returns their IDs (call with the lock held)"""
+        designs, nbytes = self._db.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM designs").fetchone()
+        over_count = designs - self.max_designs if self.max_designs > 0 else 0
+        over_bytes = nbytes - self.max_bytes if self.max_bytes > 0 else 0
+        if over_count <= 0 and over_bytes <= 0:
+            return []
+        evicted = []
+        for design_id, size in self._db.execute(
+                "SELECT id, nbytes FROM designs WHERE id != ? ORDER BY used_at, created_at", (keep,)):
+            if over_count <= 0 and over_bytes <= 0:
+                break
+            evicted.append(design_id)
+            over_count -= 1
+            over_bytes -= size
+        self._db.execute("BEGIN")
+        self._db.executemany("DELETE FROM prompts WHERE design_id = ?", [(design_id,) for design_id in evicted])
+        self._db.executemany("DELETE FROM designs WHERE id = ?", [(design_id,) for design_id in evicted])
+        self._db.execute("COMMIT")
+        self.evictions += len(evicted)
+        return evicted
+
+    def touch(self, design_id: str) -> None:
+        """Mark a design as just used, so eviction keeps it"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE designs SET used_at = ? WHERE id = ? AND used_at < ?",
+                             (now, design_id, now - TOUCH_INTERVAL))
+
+    def read_blob(self, design_id: str) -> Optional[bytes]:
+        try:
+            with open(self.blob_path(design_id), "rb") as handle:
+                blob = handle.read()
+        except FileNotFoundError:
+            return None
+        self.reads += 1
+        self.touch(design_id)
+        return blob
+
+    def load(self, design_id: str) -> Optional[Model]:
+        """Stored design, or None (blocking; run off the event loop).
+
+        The blob is memory-mapped rather than read, so the arrays are views
+        of page-cache pages that every worker process shares; blobs are
+        replaced atomically and never modified, so the mapping stays valid.
+        """
+        try:
+            with open(self.blob_path(design_id), "rb") as handle:
+                blob = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        self.reads += 1
+        self.touch(design_id)
+        return Model.from_bytes(blob)
+
+    @staticmethod
+    def prompt_key(prompt: str, context: Tuple[str, ...]) -> str:
+        canonical = json.dumps([" ".join(prompt.lower().split()), list(context)])
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def record_prompt(self, prompt: str, context: Tuple[str, ...], processed_prompt: Dict[str, Any],
+                      design_id: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO prompts (key, prompt, processed_prompt, design_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.prompt_key(prompt, context), prompt, json.dumps(processed_prompt, default=str),
+                 design_id, time.time())
+            )
+
+    def find_prompt(self, prompt: str, context: Tuple[str, ...]) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Processed parameters and design ID recorded for this exact prompt"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT processed_prompt, design_id FROM prompts WHERE key = ?",
+                (self.prompt_key(prompt, context),)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            designs, nbytes = self._db.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM designs").fetchone()
+            prompts = self._db.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+        return {"designs": designs, "bytes": nbytes, "prompts": prompts, "reads": self.reads, "writes": self.writes,
+                "evictions": self.evictions}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,120 @@
+import base64
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from models.mesh import MESH_ARRAYS, Mesh, Model, geometry_to_dict
+
+# Narrowest integer type a quantized delta fits, tried in order
+DELTA_DTYPES = (np.int8, np.int16, np.int32)
+
+
+def encode_array(array: np.ndarray) -> Dict[str, Any]:
+    """Raw little-endian buffer as base64, a third the size of the JSON list"""
+    array = np.ascontiguousarray(array)
+    return {"dtype": array.dtype.str, "shape": list(array.shape),
+            "data": base64.b64encode(array.tobytes()).decode("ascii")}
+
+
+def decode_array(spec: Dict[str, Any]) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(spec["data"]), dtype=np.dtype(spec["dtype"])).reshape(spec["shape"])
+
+
+class GeometrySession:
+    """What one WebSocket client holds, so the next model is sent as a delta.
+
+    Parts are addressed by their path in the geometry tree ("band",
+    "stones/0"). A delta carries the geometry tree with every mesh replaced
+    by {"$part": path}, and only the parts that changed: per part, only the
+    arrays that changed (a slider moves every vertex but leaves the indices
+    alone), plus type/meta when those changed. Parts gone from the tree are
+    listed under "removed". With a quantum, a float array of unchanged shape
+    is sent as integer steps of quantum from what the client already holds;
+    the client adds steps * quantum (in double, stored as float32) and the
+    session tracks that same reconstruction, so errors stay within
+    quantum / 2 instead of accumulating.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.parts: Dict[str, Mesh] = {}
+
+    def reset(self) -> None:
+        """Forget what the client holds; the next delta is a full model"""
+        self.seq = 0
+        self.parts = {}
+
+    def encode(self, model: Model, quantum: Optional[float] = None) -> Dict[str, Any]:
+        """model_data for model as a delta against the last one encoded, updating the session"""
+        parts: Dict[str, Dict[str, Any]] = {}
+        held: Dict[str, Mesh] = {}
+
+        def node(value: Any, path: str) -> Any:
+            if isinstance(value, Mesh):
+                delta, held[path] = self._part_delta(self.parts.get(path), value, quantum)
+                if delta:
+                    parts[path] = delta
+                return {"$part": path}
+            if isinstance(value, dict):
+                return {key: node(item, f"{path}/{key}" if path else key) for key, item in value.items()}
+            if isinstance(value, list):
+                return [node(item, f"{path}/{index}" if path else str(index)) for index, item in enumerate(value)]
+            return geometry_to_dict(value)
+
+        geometry = node(model.geometry, "")
+        removed: List[str] = [path for path in self.parts if path not in held]
+        data = {
+            "type": model.type,
+            "base": self.seq or None,
+            "seq": self.seq + 1,
+            "geometry": geometry,
+            "parts": parts,
+            "removed": removed
+        }
+        if model.parameters is not None:
+            data["parameters"] = model.parameters
+        if model.metadata is not None:
+            data["metadata"] = model.metadata
+        self.seq += 1
+        self.parts = held
+        return data
+
+    @staticmethod
+    def _part_delta(previous: Optional[Mesh], mesh: Mesh, quantum: Optional[float]):
+        """(delta for one part, the mesh as the client will hold it)"""
+        delta: Dict[str, Any] = {}
+        if previous is None or previous.type != mesh.type:
+            delta["type"] = mesh.type
+        meta = geometry_to_dict(mesh.meta)
+        if previous is None or geometry_to_dict(previous.meta) != meta:
+            delta["meta"] = meta
+        arrays: Dict[str, Any] = {}
+        holding: Dict[str, Any] = {}
+        for name in MESH_ARRAYS:
+            new = getattr(mesh, name)
+            old = getattr(previous, name) if previous is not None else None
+            holding[name] = new
+            if new is None:
+                if old is not None:
+                    arrays[name] = None
+                continue
+            if old is not None and (old is new or (old.shape == new.shape and np.array_equal(old, new))):
+                holding[name] = old
+                continue
+            if quantum and old is not None and old.shape == new.shape and new.dtype.kind == "f":
+                steps = np.rint((new.astype(np.float64) - old) / quantum)
+                limit = np.abs(steps).max()
+                dtype = next((dtype for dtype in DELTA_DTYPES if limit <= np.iinfo(dtype).max), None)
+                if dtype is not None:
+                    holding[name] = old
+                    if limit == 0:
+                        # Moved by less than the quantum: the client's copy is close enough
+                        continue
+                    steps = steps.astype(dtype)
+                    holding[name] = (old + steps.astype(np.float64) * quantum).astype(np.float32)
+                    arrays[name] = {**encode_array(steps), "quantum": quantum}
+                    continue
+            arrays[name] = encode_array(new)
+        if arrays:
+            delta["arrays"] = arrays
+        return delta, Mesh(type=mesh.type, meta=mesh.meta, **holding)
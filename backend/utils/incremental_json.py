@@ -0,0 +1,80 @@
+import json
+from typing import Dict, Any
+
+
+class IncrementalJSONParser:
+    """Incremental parser for one JSON object arriving in arbitrary chunks.
+
+    feed() returns the top-level fields completed by that chunk, so callers
+    can act on "jewelry_type" before the rest of the completion has been
+    generated. Values are decoded with json.loads once their extent is known;
+    a number is only complete when the following delimiter arrives. Text
+    before the opening brace (e.g. a ```json fence) is skipped.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._token: list = []
+        self._key: Any = None
+        self._expect_key = True
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        completed: Dict[str, Any] = {}
+        for char in chunk:
+            if self.complete:
+                break
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._token.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key:
+                        self._key = json.loads("".join(self._token))
+                        self._token = []
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._token.append(char)
+            elif char in "{[":
+                self._depth += 1
+                self._token.append(char)
+            elif char in "}]" and self._depth > 1:
+                self._depth -= 1
+                self._token.append(char)
+            elif self._depth == 1 and char == ":":
+                self._expect_key = False
+                self._token = []
+            elif self._depth == 1 and char in ",}":
+                if not self._expect_key:
+                    self._finish_value(completed)
+                self._expect_key = True
+                self._token = []
+                if char == "}":
+                    self._depth = 0
+                    self.complete = True
+            elif not char.isspace() or self._depth > 1:
+                self._token.append(char)
+        return completed
+
+    def _finish_value(self, completed: Dict[str, Any]) -> None:
+        raw = "".join(self._token).strip()
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            # Malformed value: skip the field and let defaults apply
+            return
+        self.fields[self._key] = value
+        completed[self._key] = value
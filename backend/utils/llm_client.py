@@ -0,0 +1,379 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from typing import Dict, Any, AsyncIterator, List, Optional
+
+import httpx
+
+# Statuses worth retrying: rate limiting and upstream/server trouble
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """LLM call failed; callers fall back to local parsing"""
+
+
+class LLMTimeoutError(LLMError):
+    """The per-call deadline ran out"""
+
+
+class CircuitOpenError(LLMError):
+    """Upstream is considered down; the call was not attempted"""
+
+
+class _RetryableError(LLMError):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            # Let exactly one request through to test the upstream
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self) -> None:
+        """End a probe that finished without an outcome (e.g. cancelled), so the next request probes"""
+        self._probing = False
+
+
+class LLMClient:
+    """Shared async client for an OpenAI-compatible chat completions API.
+
+    One pooled httpx client serves every request. Each call gets a deadline
+    covering all of its attempts. A semaphore bounds in-flight upstream
+    calls, and failed attempts are retried with jittered exponential
+    backoff. Once enough latencies are recorded, a second (hedged) request
+    goes out if the first is slower than the chosen percentile, and the
+    first answer wins. A circuit breaker stops calling an upstream that
+    keeps failing.
+    """
+
+    def __init__(self, api_key: str, base_url: str = "https://api.openai.com/v1",
+                 model: str = "gpt-4", timeout: float = 15.0, connect_timeout: float = 3.0,
+                 max_concurrency: int = 8, max_retries: int = 2,
+                 backoff_base: float = 0.25, backoff_max: float = 2.0,
+                 hedge_percentile: Optional[float] = 0.95, hedge_min_samples: int = 20,
+                 breaker: Optional[CircuitBreaker] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._latencies: deque = deque(maxlen=256)
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_concurrency * 2,
+                                max_keepalive_connections=max_concurrency),
+            transport=transport
+        )
+        self.calls = 0
+        self.hedges = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @classmethod
+    def from_env(cls, api_key: Optional[str] = None) -> "LLMClient":
+        """Client configured from OPENAI_* / LLM_* environment variables"""
+        hedge = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+        return cls(
+            api_key=api_key or os.getenv("OPENAI_API_KEY", ""),
+            base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+            model=os.getenv("LLM_MODEL", "gpt-4"),
+            timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "15")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+            hedge_percentile=hedge if hedge > 0 else None,
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+            )
+        )
+
+    async def chat(self, messages: List[Dict[str, str]], timeout: Optional[float] = None,
+                   **options) -> str:
+        """Message content of one chat completion, within timeout seconds overall"""
+        completion = await self.complete(messages, timeout=timeout, **options)
+        return completion["choices"][0]["message"]["content"]
+
+    async def complete(self, messages: List[Dict[str, str]], timeout: Optional[float] = None,
+                       hedge: bool = True, **options) -> Dict[str, Any]:
+        """Whole chat completion response (including "usage"), within timeout seconds overall.
+
+        hedge=False sends a single request per attempt and keeps its latency
+        out of the hedging statistics; use it for calls much larger than the
+        usual single-prompt extraction.
+        """
+        probe = self.breaker.state == "half-open"
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open")
+        try:
+            return await self._complete(messages, timeout, hedge, options)
+        finally:
+            if probe:
+                # A no-op after record_success/failure; otherwise the probe was cancelled
+                self.breaker.release()
+
+    async def _complete(self, messages: List[Dict[str, str]], timeout: Optional[float], hedge: bool,
+                        options: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        payload = {"model": self.model, "messages": messages, **options}
+        self.calls += 1
+
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                send = self._hedged(payload) if hedge else self._send(payload, record=False)
+                completion = await asyncio.wait_for(send, remaining)
+                self.breaker.record_success()
+                return completion
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                raise LLMTimeoutError(f"LLM call exceeded {timeout or self.timeout:.1f}s deadline") from None
+            except _RetryableError as e:
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise LLMError(str(e)) from None
+                # Full jitter keeps retrying clients from synchronizing
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                if delay >= deadline - loop.time():
+                    self.breaker.record_failure()
+                    raise LLMError(f"{e} (no time left to retry)") from None
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+            except LLMError:
+                # Non-retryable (bad request, auth): the upstream itself is fine
+                self.breaker.record_success()
+                raise
+
+    async def _hedged(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        hedge_after = self._hedge_delay()
+        if hedge_after is None:
+            return await self._send(payload)
+
+        tasks = {asyncio.ensure_future(self._send(payload))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(self._send(payload)))
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(len(ordered) * self.hedge_percentile), len(ordered) - 1)]
+
+    async def _send(self, payload: Dict[str, Any], record: bool = True) -> Dict[str, Any]:
+        async with self._semaphore:
+            started = time.monotonic()
+            try:
+                response = await self._http.post("/chat/completions", json=payload)
+            except httpx.TransportError as e:
+                raise _RetryableError(f"LLM transport error: {e!r}") from None
+            if response.status_code in RETRYABLE_STATUSES:
+                retry_after = response.headers.get("retry-after")
+                raise _RetryableError(
+                    f"LLM upstream returned {response.status_code}",
+                    float(retry_after) if retry_after and retry_after.isdigit() else None
+                )
+            if response.status_code >= 400:
+                raise LLMError(f"LLM request rejected ({response.status_code}): {response.text[:200]}")
+            if record:
+                self._latencies.append(time.monotonic() - started)
+        try:
+            completion = response.json()
+            message = completion["choices"][0]["message"]
+            # Tool-call replies carry their payload in tool_calls, not content
+            if not isinstance(message.get("content"), str) and not message.get("tool_calls"):
+                raise TypeError()
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise _RetryableError("LLM returned a malformed completion") from None
+        usage = completion.get("usage") or {}
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.completion_tokens += usage.get("completion_tokens", 0)
+        return completion
+
+    async def stream_chat(self, messages: List[Dict[str, str]], timeout: Optional[float] = None,
+                          **options) -> AsyncIterator[str]:
+        """Content (or tool-call argument) deltas of a streamed completion, within timeout seconds overall.
+
+        Failures before the first delta are retried like chat(); once content
+        has been yielded the stream can't be replayed, so later errors are
+        raised to the caller. Streams are never hedged.
+        """
+        probe = self.breaker.state == "half-open"
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open")
+        try:
+            async for delta in self._stream_chat(messages, timeout, options):
+                yield delta
+        finally:
+            if probe:
+                # Cancelled, or the caller stopped iterating: let the next request probe
+                self.breaker.release()
+
+    async def _stream_chat(self, messages: List[Dict[str, str]], timeout: Optional[float],
+                           options: Dict[str, Any]) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        payload = {"model": self.model, "messages": messages, "stream": True, **options}
+        self.calls += 1
+
+        attempt = 0
+        yielded = False
+        while True:
+            try:
+                async with self._semaphore:
+                    async with self._http.stream("POST", "/chat/completions", json=payload) as response:
+                        if response.status_code in RETRYABLE_STATUSES:
+                            retry_after = response.headers.get("retry-after")
+                            raise _RetryableError(
+                                f"LLM upstream returned {response.status_code}",
+                                float(retry_after) if retry_after and retry_after.isdigit() else None
+                            )
+                        if response.status_code >= 400:
+                            await response.aread()
+                            raise LLMError(f"LLM request rejected ({response.status_code}): {response.text[:200]}")
+                        lines = response.aiter_lines()
+                        while True:
+                            remaining = deadline - loop.time()
+                            if remaining <= 0:
+                                raise asyncio.TimeoutError()
+                            try:
+                                line = await asyncio.wait_for(lines.__anext__(), remaining)
+                            except StopAsyncIteration:
+                                break
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            try:
+                                delta = json.loads(data)["choices"][0]["delta"]
+                                # Tool-call arguments stream the same way content does
+                                delta = delta.get("content") or "".join(
+                                    call["function"].get("arguments") or "" for call in delta.get("tool_calls") or []
+                                )
+                            except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                                continue
+                            if delta:
+                                yielded = True
+                                yield delta
+                self.breaker.record_success()
+                return
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                raise LLMTimeoutError(f"LLM stream exceeded {timeout or self.timeout:.1f}s deadline") from None
+            except httpx.TransportError as e:
+                error = _RetryableError(f"LLM transport error: {e!r}")
+            except _RetryableError as e:
+                error = e
+            except LLMError:
+                self.breaker.record_success()
+                raise
+            if yielded or attempt >= self.max_retries:
+                self.breaker.record_failure()
+                raise LLMError(str(error))
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            if error.retry_after is not None:
+                delay = max(delay, error.retry_after)
+            if delay >= deadline - loop.time():
+                self.breaker.record_failure()
+                raise LLMError(f"{error} (no time left to retry)")
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "breaker": self.breaker.state,
+            "hedge_after": self._hedge_delay()
+        }
+
+    async def warm_up(self, connections: int = 2) -> int:
+        """Open pooled connections before the first call (GET /models, no tokens spent).
+
+        Returns how many answered; any status counts, since the connection
+        (and its TLS session) is what is kept for later calls.
+        """
+        async def touch() -> bool:
+            try:
+                await self._http.get("/models")
+                return True
+            except httpx.TransportError as e:
+                print(f"[llm_client.py] Warm-up connection failed: {e!r}")
+                return False
+        # Concurrent requests, so each one opens its own connection
+        return sum(await asyncio.gather(*(touch() for _ in range(connections))))
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
@@ -0,0 +1,72 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Hashable, Union
+
+
+class ModelCache:
+    """LRU cache of generated geometry.
+
+    Each design (jewelry type + parameters) owns one entry that holds the full
+    mesh together with its derived variants (decimated LODs, attribute sets),
+    so evicting a design drops all of its variants at once. Safe to share
+    between the geometry executor's threads.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[Hashable, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(jewelry_type: str, parameters: Union[Dict[str, Any], Hashable]) -> Tuple[str, Hashable]:
+        """Key a design by its type and parameters.
+
+        Normalized (frozen) parameters are hashable and used as they are;
+        plain dicts are keyed by their order-independent JSON form.
+        """
+        if isinstance(parameters, dict):
+            return jewelry_type, json.dumps(parameters, sort_keys=True, default=str)
+        return jewelry_type, parameters
+
+    def get(self, key: Hashable, variant: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or variant not in entry:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[variant]
+
+    def contains(self, key: Hashable, variant: Hashable) -> bool:
+        """Lookup without touching recency or hit statistics"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and variant in entry
+
+    def put(self, key: Hashable, variant: Hashable, value: Any) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {}
+                self._entries[key] = entry
+            entry[variant] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "variants": sum(len(entry) for entry in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses
+            }
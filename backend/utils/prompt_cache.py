@@ -0,0 +1,257 @@
+import json
+import os
+import re
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from utils.shared_cache import SharedRing
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "prompt_cache.npz"
+)
+FORMAT_VERSION = 1
+
+STOPWORDS = frozenset(
+    "a an the with and of for in on to at by my me i we want would like please make create design "
+    "some that this is it its be very really nice beautiful pretty".split()
+)
+
+# Spelling variants and synonyms folded together before anything else
+SYNONYMS = {
+    "big": "large", "huge": "large", "oversized": "large", "statement": "large",
+    "tiny": "small", "little": "small", "petite": "small", "dainty": "small",
+    "several": "multiple", "many": "multiple", "lots": "multiple",
+    "diamonds": "diamond", "rubies": "ruby", "emeralds": "emerald", "sapphires": "sapphire",
+    "stones": "stone", "gems": "stone", "gem": "stone", "gemstone": "stone", "gemstones": "stone",
+    "rings": "ring", "band": "ring", "necklaces": "necklace", "bracelets": "bracelet",
+    "earring": "earrings", "studs": "stud", "hoops": "hoop", "drops": "drop", "bangles": "bangle",
+    "cuffs": "cuff", "antique": "vintage", "retro": "vintage", "contemporary": "modern",
+    "yellow": "gold", "golden": "gold", "pink": "rose", "plat": "platinum", "pavé": "pave",
+    "without": "no"
+}
+
+# Terms that change the extracted parameters; prompts only share an entry
+# when these (and any numbers) agree exactly
+KEY_TERMS = frozenset(
+    "ring necklace earrings bracelet gold silver platinum rose white diamond ruby emerald sapphire stone "
+    "large small multiple single solitaire modern vintage classic artistic minimal stud hoop drop chain "
+    "bangle cuff cable figaro rope pendant plain carved braided pave halo eternity channel princess oval "
+    "pear cushion round geometric organic thin thick wide narrow long short no simple complex intricate ornate".split()
+)
+
+TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|[a-zé]+")
+
+
+def _tokens(prompt: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(prompt.lower()):
+        if token[0].isdigit():
+            tokens.append(repr(float(token)))
+            continue
+        token = SYNONYMS.get(token, token)
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class HashedNgramEmbedder:
+    """Local prompt embedding: hashed word and character n-gram features.
+
+    Words count fully and character trigrams half, so plurals and small
+    typos in the free-form words still land close together. Hashing uses
+    crc32 rather than hash() so vectors stay valid across processes.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def embed(self, tokens: List[str]) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokens:
+            self._add(vector, "w:" + token, 1.0)
+            padded = f"<{token}>"
+            for start in range(len(padded) - 2):
+                self._add(vector, "c:" + padded[start:start + 3], 0.5)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float) -> None:
+        hashed = zlib.crc32(feature.encode("utf-8"))
+        # One hash bit picks the sign so collisions cancel out on average
+        vector[hashed % self.dim] += weight if hashed & 0x80000000 else -weight
+
+
+class PromptCache:
+    """Approximate cache of LLM parameter extractions.
+
+    Prompts are embedded locally and compared by cosine similarity against
+    earlier prompts with the same request context and the same
+    parameter-bearing terms, so "gold ring with a big diamond" reuses the
+    answer for "large diamond gold ring" without calling the LLM. Memory is
+    bounded by max_entries (least recently used entries go first), and the
+    index can be saved to and loaded from an .npz file.
+
+    With a SharedRing, every put is also published to the other worker
+    processes, and each lookup first takes in what they published, so the
+    hit rate does not depend on which worker answers a request.
+    """
+
+    def __init__(self, threshold: float = 0.85, max_entries: int = 10000,
+                 embedder: Optional[HashedNgramEmbedder] = None, shared: Optional[SharedRing] = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.path = DEFAULT_CACHE_PATH
+        self._vectors = np.zeros((max_entries, self.embedder.dim), dtype=np.float32)
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._buckets: Dict[str, List[int]] = {}
+        self._recency: "OrderedDict[int, None]" = OrderedDict()
+        self._free = list(range(max_entries - 1, -1, -1))
+        self.shared = shared
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "PromptCache":
+        """Cache configured from PROMPT_CACHE_* environment variables, loaded from disk if saved"""
+        return cls.load(
+            os.getenv("PROMPT_CACHE_PATH", DEFAULT_CACHE_PATH),
+            threshold=float(os.getenv("PROMPT_CACHE_THRESHOLD", "0.85")),
+            max_entries=int(os.getenv("PROMPT_CACHE_SIZE", "10000")),
+            shared=SharedRing.from_env("PROMPT_CACHE_RING")
+        )
+
+    def sync(self) -> None:
+        """Take in entries other processes published to the shared ring"""
+        if self.shared is None:
+            return
+        for payload in self.shared.read_new():
+            record = json.loads(payload)
+            if record["pid"] != os.getpid():
+                self._insert(record["prompt"], tuple(record["context"]), record["parameters"])
+
+    def lookup(self, prompt: str, context: Tuple[str, ...] = ()) -> Optional[Dict[str, Any]]:
+        """Parameters extracted for the closest cached prompt, if close enough"""
+        self.sync()
+        signature, vector, text = self._features(prompt, context)
+        slots = self._buckets.get(signature)
+        if slots:
+            similarities = self._vectors[slots] @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                slot = slots[best]
+                entry = self._entries[slot]
+                self._recency.move_to_end(slot)
+                if entry["prompt"] == prompt.strip().lower():
+                    self.exact_hits += 1
+                else:
+                    self.near_hits += 1
+                return dict(entry["parameters"])
+        self.misses += 1
+        return None
+
+    def put(self, prompt: str, context: Tuple[str, ...], parameters: Dict[str, Any]) -> None:
+        parameters = {key: value for key, value in parameters.items() if key != "original_prompt"}
+        self._insert(prompt, context, parameters)
+        if self.shared is not None:
+            self.shared.append(json.dumps({"pid": os.getpid(), "prompt": prompt, "context": list(context),
+                                           "parameters": parameters}, default=str).encode("utf-8"))
+
+    def _insert(self, prompt: str, context: Tuple[str, ...], parameters: Dict[str, Any]) -> None:
+        signature, vector, text = self._features(prompt, context)
+        for slot in self._buckets.get(signature, ()):
+            if self._entries[slot]["text"] == text:
+                # Same wording again: keep the newest answer
+                self._entries[slot].update(prompt=prompt.strip().lower(), parameters=parameters)
+                self._recency.move_to_end(slot)
+                return
+        if not self._free:
+            self._evict()
+        slot = self._free.pop()
+        self._vectors[slot] = vector
+        self._entries[slot] = {"signature": signature, "text": text, "prompt": prompt.strip().lower(),
+                               "parameters": parameters}
+        self._buckets.setdefault(signature, []).append(slot)
+        self._recency[slot] = None
+
+    def _evict(self) -> None:
+        slot, _ = self._recency.popitem(last=False)
+        signature = self._entries[slot]["signature"]
+        bucket = self._buckets[signature]
+        bucket.remove(slot)
+        if not bucket:
+            del self._buckets[signature]
+        self._entries[slot] = None
+        self._free.append(slot)
+
+    def _features(self, prompt: str, context: Tuple[str, ...]) -> Tuple[str, np.ndarray, str]:
+        tokens = _tokens(prompt)
+        guarded = sorted({token for token in tokens if token in KEY_TERMS or token[0].isdigit()})
+        signature = json.dumps([list(context), guarded])
+        return signature, self.embedder.embed(tokens), " ".join(sorted(tokens))
+
+    def __len__(self) -> int:
+        return len(self._recency)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the index (oldest entry first) atomically to an .npz file"""
+        path = path or self.path
+        # Include what other workers published, whichever of them saves last
+        self.sync()
+        slots = list(self._recency)
+        entries = [self._entries[slot] for slot in slots]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Per process: every worker saves the same (shared) index on shutdown
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as handle:
+            np.savez_compressed(
+                handle,
+                vectors=self._vectors[slots],
+                entries=np.array(json.dumps({"version": FORMAT_VERSION, "dim": self.embedder.dim,
+                                             "entries": entries}))
+            )
+        os.replace(temporary, path)
+        print(f"[prompt_cache.py] Saved {len(entries)} prompts to {path}")
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_CACHE_PATH, **kwargs) -> "PromptCache":
+        """Cache restored from path; an empty one if the file is missing or stale"""
+        cache = cls(**kwargs)
+        cache.path = path
+        if not os.path.exists(path):
+            return cache
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["entries"]))
+                vectors = data["vectors"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[prompt_cache.py] Ignoring unreadable prompt cache {path}: {e}")
+            return cache
+        if meta.get("version") != FORMAT_VERSION or meta.get("dim") != cache.embedder.dim:
+            print(f"[prompt_cache.py] Ignoring prompt cache {path} built with other settings")
+            return cache
+        # Oldest first, so a smaller max_entries keeps the most recent prompts
+        for vector, entry in zip(vectors, meta["entries"]):
+            if not cache._free:
+                cache._evict()
+            slot = cache._free.pop()
+            cache._vectors[slot] = vector
+            cache._entries[slot] = entry
+            cache._buckets.setdefault(entry["signature"], []).append(slot)
+            cache._recency[slot] = None
+        print(f"[prompt_cache.py] Loaded {len(cache)} prompts from {path}")
+        return cache
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.near_hits + self.misses
+        return {
+            "entries": len(self),
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.near_hits) / lookups if lookups else 0.0
+        }
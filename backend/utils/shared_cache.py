@@ -0,0 +1,130 @@
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from typing import Iterator, Optional
+
+# File layout: header, then a circular data area of records
+# (length, crc32, payload). Positions in the header are absolute byte
+# counts that only grow; position % capacity is the offset in the data area.
+RING_MAGIC = b"JRNG"
+RING_FORMAT_VERSION = 1
+RING_HEADER = struct.Struct("<4sIQQQ")  # magic, version, capacity, head, tail
+RECORD_HEADER = struct.Struct("<II")  # payload length, crc32
+# Length marking the rest of the data area as unused (the next record starts over at 0)
+WRAP_MARKER = 0xFFFFFFFF
+DEFAULT_RING_BYTES = 4 * 1024 * 1024
+
+
+def shared_memory_dir() -> str:
+    """/dev/shm where available, so the ring lives in memory rather than on disk"""
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+class SharedRing:
+    """Fixed-size record log shared by processes through one memory-mapped file.
+
+    Every process appends records and reads the ones it has not seen yet
+    (its own included). When the data area is full the oldest records are
+    overwritten, which is the ring's eviction; a reader that fell further
+    behind than that skips ahead to the oldest record still there. Appends
+    take an exclusive flock and reads a shared one, so no record is ever
+    seen half written.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_RING_BYTES):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < RING_HEADER.size:
+                os.ftruncate(self._fd, RING_HEADER.size + capacity)
+                os.pwrite(self._fd, RING_HEADER.pack(RING_MAGIC, RING_FORMAT_VERSION, capacity, 0, 0), 0)
+            magic, version, capacity, _, _ = RING_HEADER.unpack(os.pread(self._fd, RING_HEADER.size, 0))
+            if magic != RING_MAGIC or version != RING_FORMAT_VERSION:
+                raise ValueError(f"{path} is not a shared ring")
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.capacity = capacity
+        self._map = mmap.mmap(self._fd, RING_HEADER.size + capacity)
+        # A process attaching late starts with everything still in the ring
+        self.cursor = self._positions()[1]
+
+    def _positions(self):
+        _, _, _, head, tail = RING_HEADER.unpack_from(self._map, 0)
+        return head, tail
+
+    def _set_positions(self, head: int, tail: int) -> None:
+        RING_HEADER.pack_into(self._map, 0, RING_MAGIC, RING_FORMAT_VERSION, self.capacity, head, tail)
+
+    def _record_at(self, position: int):
+        """(payload length, crc, offset of the next record) at an absolute position"""
+        offset = position % self.capacity
+        if self.capacity - offset < RECORD_HEADER.size:
+            return None, 0, position + (self.capacity - offset)
+        length, crc = RECORD_HEADER.unpack_from(self._map, RING_HEADER.size + offset)
+        if length == WRAP_MARKER:
+            return None, 0, position + (self.capacity - offset)
+        return length, crc, position + RECORD_HEADER.size + length
+
+    def append(self, payload: bytes) -> None:
+        size = RECORD_HEADER.size + len(payload)
+        if size > self.capacity // 4:
+            raise ValueError(f"Record of {len(payload)} bytes is too large for a {self.capacity}-byte ring")
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            head, tail = self._positions()
+            offset = head % self.capacity
+            start = head
+            if self.capacity - offset < size:
+                # Not enough room before the end: mark the gap and start over at 0
+                start = head + (self.capacity - offset)
+            end = start + size
+            # Evict whole records until the new one no longer overlaps live data
+            while end - tail > self.capacity:
+                _, _, tail = self._record_at(tail)
+            if start != head and self.capacity - offset >= RECORD_HEADER.size:
+                RECORD_HEADER.pack_into(self._map, RING_HEADER.size + offset, WRAP_MARKER, 0)
+            base = RING_HEADER.size + start % self.capacity
+            RECORD_HEADER.pack_into(self._map, base, len(payload), zlib.crc32(payload))
+            self._map[base + RECORD_HEADER.size:base + size] = payload
+            # Publishing the new head is what makes the record visible
+            self._set_positions(end, tail)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def read_new(self) -> Iterator[bytes]:
+        """Records appended (by any process) since this one last read"""
+        fcntl.flock(self._fd, fcntl.LOCK_SH)
+        try:
+            head, tail = self._positions()
+            if self.cursor == head:
+                return iter(())
+            position = max(self.cursor, tail)
+            records = []
+            while position < head:
+                length, crc, following = self._record_at(position)
+                if length is not None:
+                    start = RING_HEADER.size + position % self.capacity + RECORD_HEADER.size
+                    payload = bytes(self._map[start:start + length])
+                    if zlib.crc32(payload) == crc:
+                        records.append(payload)
+                position = following
+            self.cursor = head
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return iter(records)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    @classmethod
+    def from_env(cls, variable: str) -> Optional["SharedRing"]:
+        """Ring at the path named by the environment variable, or None when it is unset"""
+        path = os.getenv(variable)
+        if not path:
+            return None
+        return cls(path, int(os.getenv(f"{variable}_BYTES", str(DEFAULT_RING_BYTES))))
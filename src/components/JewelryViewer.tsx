@@ -92,7 +92,7 @@ const JewelryViewer: React.FC<JewelryViewerProps> = ({ model }) => {
   }, [jewelryData?.parameters?.stone_type])
 
   // Create geometry from vertices and indices
-  const createGeometry = (vertices: number[], indices: number[]) => {
+  const createGeometry = (vertices: number[], indices: number[], normals?: number[], uvs?: number[]) => {
     const geometry = new THREE.BufferGeometry()
     
     // Create Float32Array for vertices
@@ -104,8 +104,16 @@ const JewelryViewer: React.FC<JewelryViewerProps> = ({ model }) => {
       geometry.setIndex(indices)
     }
     
-    // Compute normals for proper lighting
-    geometry.computeVertexNormals()
+    // Use server-computed normals when present, otherwise compute them here
+    if (normals && normals.length === vertices.length) {
+      geometry.setAttribute('normal', new THREE.BufferAttribute(new Float32Array(normals), 3))
+    } else {
+      geometry.computeVertexNormals()
+    }
+    
+    if (uvs && uvs.length > 0) {
+      geometry.setAttribute('uv', new THREE.BufferAttribute(new Float32Array(uvs), 2))
+    }
     
     return geometry
   }
@@ -114,14 +122,14 @@ const JewelryViewer: React.FC<JewelryViewerProps> = ({ model }) => {
   const renderJewelryComponent = (component: any, material: THREE.Material, position: [number, number, number] = [0, 0, 0]) => {
     if (!component || !component.vertices) return null
     
-    const geometry = createGeometry(component.vertices, component.indices)
+    const geometry = createGeometry(component.vertices, component.indices, component.normals, component.uvs)
     
     return (
       <mesh geometry={geometry} material={material} position={position}>
         {component.stones && component.stones.map((stone: any, index: number) => (
           <mesh
             key={index}
-            geometry={createGeometry(stone.vertices, stone.indices)}
+            geometry={createGeometry(stone.vertices, stone.indices, stone.normals, stone.uvs)}
             material={stoneMaterial}
           />
         ))}
@@ -141,7 +149,7 @@ const JewelryViewer: React.FC<JewelryViewerProps> = ({ model }) => {
             {jewelryData.stones && jewelryData.stones.map((stone: any, index: number) => (
               <mesh
                 key={index}
-                geometry={createGeometry(stone.vertices, stone.indices)}
+                geometry={createGeometry(stone.vertices, stone.indices, stone.normals, stone.uvs)}
                 material={stoneMaterial}
               />
             ))}
@@ -22,6 +22,7 @@ export const generateJewelry = async (
       style: options.style || 'modern',
       material: options.material || 'gold',
       complexity: options.complexity || 'medium',
+      include_attributes: true,
     })
     
     if (response.data.success) {
@@ -58,6 +59,7 @@ export const createParametricJewelry = async (
     const response = await api.post<ApiResponse>('/parametric-jewelry', {
       jewelry_type,
       parameters,
+      include_attributes: true,
     })
     
     if (response.data.success) {
@@ -7,6 +7,9 @@ export interface JewelryGeometry {
   type: string
   vertices?: number[]
   indices?: number[]
+  normals?: number[]
+  uvs?: number[]
+  tangents?: number[]
   band?: JewelryGeometry
   stones?: JewelryGeometry[]
   chain?: JewelryGeometry
@@ -38,6 +41,9 @@ export interface JewelryParameters {
   stone_count?: number
   stone_size?: number
   stone_type?: 'diamond' | 'ruby' | 'emerald' | 'sapphire'
+  stone_cut?: 'round_brilliant' | 'princess' | 'oval' | 'pear' | 'cushion' | 'emerald'
+  stone_setting?: 'solitaire' | 'channel' | 'pave' | 'halo' | 'eternity'
+  stone_arc?: number
   band_style?: 'plain' | 'carved' | 'braided'
   
   // Necklace specific